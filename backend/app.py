@@ -1,12 +1,15 @@
 from flask import Flask, send_from_directory
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from datetime import timedelta
 import os
+import click
 from dotenv import load_dotenv
 
 # Import database configuration
 from database import db, init_db
+from services.rate_limit import rate_limiter, parse_limits
 
 # Load environment variables
 load_dotenv()
@@ -30,6 +33,105 @@ else:
 
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Connection pool per worker process. The default fits one connection per
+# request thread (GUNICORN_THREADS) plus one for background flushes, overflow
+# absorbs bursts; keep workers * (size + overflow) under the server's limit.
+# gevent workers run far more requests than they should hold connections, the
+# extra requests wait for one (DB_POOL_TIMEOUT) without blocking each other
+if os.getenv('GUNICORN_WORKER_CLASS') == 'gevent':
+    threads = 10
+else:
+    threads = int(os.getenv('GUNICORN_THREADS', 1))
+app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', threads + 1))
+app.config['DB_MAX_OVERFLOW'] = int(os.getenv('DB_MAX_OVERFLOW', threads))
+app.config['DB_POOL_TIMEOUT'] = int(os.getenv('DB_POOL_TIMEOUT', 10))
+app.config['DB_POOL_RECYCLE'] = int(os.getenv('DB_POOL_RECYCLE', 1800))
+app.config['DB_POOL_PRE_PING'] = os.getenv('DB_POOL_PRE_PING', 'true') == 'true'
+app.config['DB_STATEMENT_TIMEOUT_MS'] = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 30000))
+
+# Dashboard queries: combined (one UNION ALL round trip), concurrent (each on
+# its own pooled connection, DASHBOARD_QUERY_WORKERS per process) or sequential
+app.config['DASHBOARD_QUERY_MODE'] = os.getenv('DASHBOARD_QUERY_MODE', 'combined')
+app.config['DASHBOARD_QUERY_WORKERS'] = int(os.getenv('DASHBOARD_QUERY_WORKERS', 4))
+
+# Maximum number of items accepted by the batch endpoints
+app.config['BATCH_MAX_ITEMS'] = int(os.getenv('BATCH_MAX_ITEMS', 100))
+
+# JSON encoder for API responses: auto (orjson when installed), orjson or stdlib
+app.config['JSON_PROVIDER'] = os.getenv('JSON_PROVIDER', 'auto')
+
+# Rows per database round trip for the streaming export and per commit for imports
+app.config['EXPORT_BATCH_SIZE'] = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+app.config['IMPORT_BATCH_SIZE'] = int(os.getenv('IMPORT_BATCH_SIZE', 500))
+
+# Memory reads are buffered and last_accessed is written at most this many seconds late
+app.config['ACCESS_TRACKING_FLUSH_INTERVAL'] = int(os.getenv('ACCESS_TRACKING_FLUSH_INTERVAL', 60))
+app.config['ACCESS_TRACKING_MAX_PENDING'] = int(os.getenv('ACCESS_TRACKING_MAX_PENDING', 1000))
+
+# Reminder scheduler: notifier backend, how far ahead reminders are loaded and
+# how far back due reminders are still fired after a restart (seconds)
+app.config['REMINDER_NOTIFIER'] = os.getenv('REMINDER_NOTIFIER', 'log')
+app.config['SCHEDULER_HORIZON'] = int(os.getenv('SCHEDULER_HORIZON', 900))
+app.config['SCHEDULER_CATCH_UP'] = int(os.getenv('SCHEDULER_CATCH_UP', 300))
+
+# Spaced repetition: multiplier on every review interval and the longest
+# interval in days, run `flask reschedule-reviews` after changing either
+app.config['REVIEW_INTERVAL_MODIFIER'] = float(os.getenv('REVIEW_INTERVAL_MODIFIER', 1.0))
+app.config['REVIEW_MAX_INTERVAL_DAYS'] = float(os.getenv('REVIEW_MAX_INTERVAL_DAYS', 365))
+
+# Response cache for the dashboard and list endpoints: memory (per process LRU),
+# redis (shared, needs the redis package) or none
+app.config['CACHE_BACKEND'] = os.getenv('CACHE_BACKEND', 'memory')
+app.config['CACHE_TTL'] = int(os.getenv('CACHE_TTL', 30))
+app.config['CACHE_MAX_ENTRIES'] = int(os.getenv('CACHE_MAX_ENTRIES', 2048))
+app.config['CACHE_REDIS_URL'] = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+
+# Authenticated users are cached per process for this many seconds (0 disables)
+app.config['USER_CACHE_TTL'] = int(os.getenv('USER_CACHE_TTL', 10))
+app.config['USER_CACHE_MAX_ENTRIES'] = int(os.getenv('USER_CACHE_MAX_ENTRIES', 10000))
+
+# Prometheus metrics at /metrics, optionally behind a bearer token
+app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', 'true') == 'true'
+app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN')
+
+# Similar memories: text encoder (hashed-ngrams runs locally), vector size, memory
+# each process spends on users' indexes, threads building them and how long a
+# search waits for a build before answering 202
+app.config['SIMILARITY_ENCODER'] = os.getenv('SIMILARITY_ENCODER', 'hashed-ngrams')
+app.config['SIMILARITY_DIM'] = int(os.getenv('SIMILARITY_DIM', 512))
+app.config['SIMILARITY_CACHE_MB'] = int(os.getenv('SIMILARITY_CACHE_MB', 256))
+app.config['SIMILARITY_BUILD_WORKERS'] = int(os.getenv('SIMILARITY_BUILD_WORKERS', 1))
+app.config['SIMILARITY_BUILD_WAIT'] = float(os.getenv('SIMILARITY_BUILD_WAIT', 0.5))
+
+# Per-request SQL profiling, off by default: "headers" (Server-Timing, for
+# development), "log" (one JSON line per request) or both, comma separated
+app.config['SQL_PROFILING'] = os.getenv('SQL_PROFILING', 'off')
+app.config['SQL_PROFILING_SLOWEST'] = int(os.getenv('SQL_PROFILING_SLOWEST', 3))
+app.config['SQL_PROFILING_REPEAT_THRESHOLD'] = int(os.getenv('SQL_PROFILING_REPEAT_THRESHOLD', 5))
+
+# Password hashing: werkzeug method and cost (e.g. scrypt:32768:8:1 or
+# pbkdf2:sha256:600000, existing hashes are upgraded on login), threads hashing at
+# once per process and how many more may wait before requests get 503 (0 workers
+# hashes inline)
+app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+app.config['PASSWORD_HASH_MAX_QUEUED'] = int(os.getenv('PASSWORD_HASH_MAX_QUEUED', 16))
+
+# Rate limiting: token buckets per user (per IP when anonymous), in this process
+# (memory), shared through redis, or none. RATE_LIMITS overrides the default per
+# blueprint or endpoint, e.g. "auth.login=10/minute,memories=120/minute"
+app.config['RATE_LIMIT_BACKEND'] = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+app.config['RATE_LIMIT_REDIS_URL'] = os.getenv('RATE_LIMIT_REDIS_URL', app.config['CACHE_REDIS_URL'])
+app.config['RATE_LIMIT_DEFAULT'] = os.getenv('RATE_LIMIT_DEFAULT', '300/minute')
+app.config['RATE_LIMITS'] = parse_limits(os.getenv('RATE_LIMITS', 'auth.login=10/minute,auth.register=5/minute'))
+
+# Requests served at once by one process before new ones get 503 (0 disables)
+app.config['MAX_IN_FLIGHT_REQUESTS'] = int(os.getenv('MAX_IN_FLIGHT_REQUESTS', 0))
+
+# Number of reverse proxies in front of the app, so the client IP is read from X-Forwarded-For
+if int(os.getenv('TRUSTED_PROXIES', 0)):
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=int(os.getenv('TRUSTED_PROXIES')))
+
 # Initialize extensions
 init_db(app)  # Initialize database with app
 jwt = JWTManager(app)
@@ -49,26 +151,63 @@ cors_origins = [
 CORS(app, 
      supports_credentials=True,
      origins=cors_origins,
-     allow_headers=["Content-Type", "Authorization", "X-Requested-With"],
+     allow_headers=["Content-Type", "Authorization", "X-Requested-With", "If-None-Match", "If-Modified-Since"],
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-     expose_headers=["Set-Cookie"])
+     expose_headers=["Set-Cookie", "ETag", "Last-Modified", "Retry-After", "X-RateLimit-Limit", "X-RateLimit-Remaining"])
 
 # Import models
 from models.user import User
 from models.memory import Memory
 from models.reminder import Reminder
+from models.user_counter import UserCounter
+from models.change_log import ChangeLogEntry
+from models.memory_tag import MemoryTag
+from models.review_state import ReviewState
 
 # Import routes
 from routes.auth import auth_bp
 from routes.memories import memories_bp
 from routes.reminders import reminders_bp
 from routes.users import users_bp
+from routes.sync import sync_bp
+
+# Import services
+from services.search import init_search_index
+from services.counters import reconcile_counters, reconcile_all_counters
+from services.access_tracker import access_tracker
+from services.notifiers import get_notifier
+from services.scheduler import ReminderScheduler
+from services.cache import response_cache
+from services.serialization import init_json
+from services.user_cache import user_cache
+from services.passwords import password_hasher
+from services.pool_monitor import pool_monitor
+from services.sql_profiler import sql_profiler
+from services.metrics import metrics
+from services.similarity import similarity_index
+from services.spaced_repetition import spaced_repetition
+from services.dashboard import dashboard_queries
+import services.changelog  # registers the change log session hooks
+
+init_json(app)
+user_cache.init_app(app, jwt)
+password_hasher.init_app(app)
+pool_monitor.init_app(app, db)
+sql_profiler.init_app(app, db)
+access_tracker.init_app(app)
+similarity_index.init_app(app)
+spaced_repetition.init_app(app)
+dashboard_queries.init_app(app)
+response_cache.init_app(app)
+metrics.init_app(app)  # before the rate limiter so rejected requests are counted too
+rate_limiter.init_app(app)
 
 # Register blueprints
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
 app.register_blueprint(memories_bp, url_prefix='/api/memories')
 app.register_blueprint(reminders_bp, url_prefix='/api/reminders')
 app.register_blueprint(users_bp, url_prefix='/api/users')
+app.register_blueprint(sync_bp, url_prefix='/api/sync')
 
 # Serve React app
 @app.route('/')
@@ -84,12 +223,72 @@ def serve_static(path):
 
 # Health check route
 @app.route('/api/health')
+@rate_limiter.exempt
 def health_check():
     return {'status': 'healthy', 'message': 'MemoryOS Backend is running!'}, 200
 
+@app.route('/api/health/cache')
+@rate_limiter.exempt
+def cache_stats():
+    return response_cache.stats(), 200
+
+@app.route('/api/health/rate-limit')
+@rate_limiter.exempt
+def rate_limit_stats():
+    return rate_limiter.stats(), 200
+
+@app.route('/api/health/pool')
+@rate_limiter.exempt
+def pool_stats():
+    return pool_monitor.stats(), 200
+
+@app.route('/api/health/passwords')
+@rate_limiter.exempt
+def password_hasher_stats():
+    return password_hasher.stats(), 200
+
+@app.route('/metrics')
+@rate_limiter.exempt
+def metrics_endpoint():
+    if not metrics.enabled:
+        return {'message': 'Metrics are disabled'}, 404
+    if not metrics.authorized():
+        return {'message': 'Unauthorized'}, 401
+    return metrics.render()
+
+# Counter reconciliation job
+@app.cli.command('reconcile-counters')
+@click.option('--user-id', type=int, help='Only reconcile this user')
+def reconcile_counters_command(user_id):
+    """Rebuild per-user counters from the memories and reminders tables"""
+    if user_id:
+        click.echo(f'Counters for user {user_id}: {reconcile_counters(user_id)}')
+    else:
+        click.echo(f'Reconciled counters, {reconcile_all_counters()} user(s) had drifted')
+
+# Reminder scheduler worker
+@app.cli.command('run-scheduler')
+def run_scheduler_command():
+    """Fire due reminders until interrupted"""
+    scheduler = ReminderScheduler(
+        get_notifier(app.config['REMINDER_NOTIFIER']),
+        horizon=timedelta(seconds=app.config['SCHEDULER_HORIZON']),
+        catch_up=timedelta(seconds=app.config['SCHEDULER_CATCH_UP'])
+    )
+    click.echo('Reminder scheduler started')
+    scheduler.run()
+
+# Spaced repetition batch rescheduler
+@app.cli.command('reschedule-reviews')
+@click.option('--batch-size', type=int, default=10000, help='Cards per transaction')
+def reschedule_reviews_command(batch_size):
+    """Move every pending review to the due date the current interval settings give it"""
+    click.echo(f'Rescheduled {spaced_repetition.reschedule_all(batch_size)} card(s)')
+
 # Create tables on startup
 with app.app_context():
     db.create_all()
+    init_search_index()
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5001) 
\ No newline at end of file
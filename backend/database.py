@@ -5,8 +5,32 @@ from flask_migrate import Migrate
 db = SQLAlchemy()
 migrate = Migrate()
 
+def engine_options(config):
+    """SQLAlchemy engine options from the DB_* settings, SQLite keeps its defaults"""
+    from services.pool_monitor import InstrumentedQueuePool
+    
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    if uri.startswith('sqlite'):
+        return {}
+    
+    options = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING']
+    }
+    
+    # Abort runaway queries server side instead of holding the connection
+    if config['DB_STATEMENT_TIMEOUT_MS'] and uri.startswith('postgres'):
+        options['connect_args'] = {'options': f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}"}
+    
+    return options
+
 def init_db(app):
     """Initialize database with app"""
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
     db.init_app(app)
     migrate.init_app(app, db)
     return db 
\ No newline at end of file
@@ -0,0 +1,41 @@
+# Gunicorn settings, loaded automatically when gunicorn starts in this directory
+import os
+import shutil
+import tempfile
+
+# Request threads per worker, the database pool is sized from the same variable
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+
+# sync (one request at a time per worker), gthread (GUNICORN_THREADS at a time)
+# or gevent (up to GUNICORN_WORKER_CONNECTIONS at a time, requests yield while
+# they wait on the database or the network; needs the gevent and psycogreen packages)
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread' if threads > 1 else 'sync')
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# Workers write request metrics to mmap files here and /metrics sums them
+metrics_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'memoryos-metrics'))
+
+def on_starting(server):
+    # Samples left by a previous run would be added to the new totals
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+def post_fork(server, worker):
+    if worker_class != 'gevent':
+        return
+    try:
+        from psycogreen.gevent import patch_psycopg
+    except ImportError as e:
+        # psycogreen or psycopg2 missing, fine for SQLite
+        server.log.warning('Database queries will block the whole gevent worker: %s', e)
+        return
+    # Make psycopg2 wait on the gevent hub instead of blocking the process
+    patch_psycopg()
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    # Drop the live gauges of the dead worker, its counters stay in the totals
+    multiprocess.mark_process_dead(worker.pid)
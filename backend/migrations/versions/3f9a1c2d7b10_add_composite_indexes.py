@@ -0,0 +1,41 @@
+"""Add composite indexes for the hot query shapes
+
+Revision ID: 3f9a1c2d7b10
+Revises: 
+Create Date: 2026-10-18 02:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2d7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tables are created by db.create_all() on startup, which already builds these
+    # indexes for new databases, hence if_not_exists
+    op.create_index('ix_memories_user_id_created_at', 'memories',
+                    ['user_id', sa.text('created_at DESC')], if_not_exists=True)
+    op.create_index('ix_memories_user_id_memory_type', 'memories',
+                    ['user_id', 'memory_type'], if_not_exists=True)
+    op.create_index('ix_reminders_user_id_trigger_date_pending', 'reminders',
+                    ['user_id', 'trigger_date'], if_not_exists=True,
+                    postgresql_where=sa.text('is_completed = false'),
+                    sqlite_where=sa.text('is_completed = 0'))
+    op.create_index('ix_reminders_user_id_completed_at', 'reminders',
+                    ['user_id', sa.text('completed_at DESC')], if_not_exists=True)
+    op.create_index('ix_reminders_memory_id', 'reminders',
+                    ['memory_id'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_reminders_memory_id', table_name='reminders', if_exists=True)
+    op.drop_index('ix_reminders_user_id_completed_at', table_name='reminders', if_exists=True)
+    op.drop_index('ix_reminders_user_id_trigger_date_pending', table_name='reminders', if_exists=True)
+    op.drop_index('ix_memories_user_id_memory_type', table_name='memories', if_exists=True)
+    op.drop_index('ix_memories_user_id_created_at', table_name='memories', if_exists=True)
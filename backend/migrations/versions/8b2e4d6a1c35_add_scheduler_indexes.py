@@ -0,0 +1,30 @@
+"""Add reminder indexes for the scheduler
+
+Revision ID: 8b2e4d6a1c35
+Revises: 3f9a1c2d7b10
+Create Date: 2026-10-18 02:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4d6a1c35'
+down_revision = '3f9a1c2d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_reminders_trigger_date_pending', 'reminders',
+                    ['trigger_date', 'id'], if_not_exists=True,
+                    postgresql_where=sa.text('is_completed = false'),
+                    sqlite_where=sa.text('is_completed = 0'))
+    op.create_index('ix_reminders_updated_at', 'reminders',
+                    ['updated_at'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_reminders_updated_at', table_name='reminders', if_exists=True)
+    op.drop_index('ix_reminders_trigger_date_pending', table_name='reminders', if_exists=True)
@@ -0,0 +1,27 @@
+"""Add the pending spaced repetition index for the review queue
+
+Revision ID: c4e8f2a9d713
+Revises: 8b2e4d6a1c35
+Create Date: 2026-10-18 03:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8f2a9d713'
+down_revision = '8b2e4d6a1c35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_reminders_user_id_type_trigger_date_pending', 'reminders',
+                    ['user_id', 'reminder_type', 'trigger_date'], if_not_exists=True,
+                    postgresql_where=sa.text('is_completed = false'),
+                    sqlite_where=sa.text('is_completed = 0'))
+
+
+def downgrade():
+    op.drop_index('ix_reminders_user_id_type_trigger_date_pending', table_name='reminders', if_exists=True)
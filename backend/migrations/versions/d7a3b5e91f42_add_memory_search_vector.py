@@ -0,0 +1,42 @@
+"""Add the Postgres full-text search column and index on memories
+
+Revision ID: d7a3b5e91f42
+Revises: c4e8f2a9d713
+Create Date: 2026-10-18 03:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a3b5e91f42'
+down_revision = 'c4e8f2a9d713'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite searches through the FTS5 table services/search.py maintains
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # A generated column keeps the vector in sync without any application writes
+    op.execute(
+        "ALTER TABLE memories ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(content, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(tags::text, '')), 'C')"
+        ") STORED"
+    )
+    op.create_index('ix_memories_search_vector', 'memories', ['search_vector'],
+                    if_not_exists=True, postgresql_using='gin')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.drop_index('ix_memories_search_vector', table_name='memories', if_exists=True)
+    op.execute("ALTER TABLE memories DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,51 @@
+"""Add (key, id) indexes for the memory and reminder listings
+
+Revision ID: e5c1a7d3b948
+Revises: d7a3b5e91f42
+Create Date: 2026-10-18 04:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5c1a7d3b948'
+down_revision = 'd7a3b5e91f42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_memories_user_id_created_at_id', 'memories',
+                    ['user_id', sa.text('created_at DESC'), sa.text('id DESC')], if_not_exists=True)
+    op.create_index('ix_reminders_user_id_trigger_date_id', 'reminders',
+                    ['user_id', sa.text('(trigger_date IS NULL)'), 'trigger_date', 'id'], if_not_exists=True)
+    op.create_index('ix_reminders_user_id_completed_at_id', 'reminders',
+                    ['user_id', sa.text('(completed_at IS NULL)'), sa.text('completed_at DESC'), sa.text('id DESC')],
+                    if_not_exists=True)
+    op.create_index('ix_reminders_user_id_trigger_date_id_pending', 'reminders',
+                    ['user_id', 'trigger_date', 'id'], if_not_exists=True,
+                    postgresql_where=sa.text('is_completed = false'),
+                    sqlite_where=sa.text('is_completed = 0'))
+
+    # Prefixes of the indexes above
+    op.drop_index('ix_reminders_user_id_trigger_date_pending', table_name='reminders', if_exists=True)
+    op.drop_index('ix_reminders_user_id_completed_at', table_name='reminders', if_exists=True)
+    op.drop_index('ix_memories_user_id_created_at', table_name='memories', if_exists=True)
+
+
+def downgrade():
+    op.create_index('ix_memories_user_id_created_at', 'memories',
+                    ['user_id', sa.text('created_at DESC')], if_not_exists=True)
+    op.create_index('ix_reminders_user_id_completed_at', 'reminders',
+                    ['user_id', sa.text('completed_at DESC')], if_not_exists=True)
+    op.create_index('ix_reminders_user_id_trigger_date_pending', 'reminders',
+                    ['user_id', 'trigger_date'], if_not_exists=True,
+                    postgresql_where=sa.text('is_completed = false'),
+                    sqlite_where=sa.text('is_completed = 0'))
+
+    op.drop_index('ix_reminders_user_id_trigger_date_id_pending', table_name='reminders', if_exists=True)
+    op.drop_index('ix_reminders_user_id_completed_at_id', table_name='reminders', if_exists=True)
+    op.drop_index('ix_reminders_user_id_trigger_date_id', table_name='reminders', if_exists=True)
+    op.drop_index('ix_memories_user_id_created_at_id', table_name='memories', if_exists=True)
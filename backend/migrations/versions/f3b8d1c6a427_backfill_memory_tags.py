@@ -0,0 +1,75 @@
+"""Create and backfill the memory_tags index from memories.tags
+
+Revision ID: f3b8d1c6a427
+Revises: e5c1a7d3b948
+Create Date: 2026-10-18 05:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8d1c6a427'
+down_revision = 'e5c1a7d3b948'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# As services/tag_index.py normalize_tag at the time of writing, copied so later
+# changes to the app don't alter what this migration writes
+MAX_TAG_LENGTH = 100
+
+memories = sa.table(
+    'memories',
+    sa.column('id', sa.Integer),
+    sa.column('user_id', sa.Integer),
+    sa.column('tags', sa.JSON)
+)
+
+
+def _normalized(tags):
+    if not isinstance(tags, list):
+        return set()
+    return {str(tag).strip().lower()[:MAX_TAG_LENGTH] for tag in tags if tag is not None} - {''}
+
+
+def upgrade():
+    connection = op.get_bind()
+    columns = [
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('tag', sa.String(length=100), primary_key=True),
+        sa.Column('memory_id', sa.Integer(), sa.ForeignKey('memories.id'), primary_key=True)
+    ]
+    # Created by db.create_all() when the app started first
+    if sa.inspect(connection).has_table('memory_tags'):
+        memory_tags = sa.table('memory_tags', *(sa.column(column.name, column.type) for column in columns))
+    else:
+        memory_tags = op.create_table('memory_tags', *columns)
+    op.create_index('ix_memory_tags_memory_id', 'memory_tags', ['memory_id'], if_not_exists=True)
+
+    # Memories written since the table existed were indexed by the flush hooks,
+    # only those without any rows are filled in
+    unindexed = sa.select(memories.c.id, memories.c.user_id, memories.c.tags).where(
+        ~sa.exists().where(memory_tags.c.memory_id == memories.c.id)
+    ).order_by(memories.c.id)
+
+    last_id = 0
+    while True:
+        rows = connection.execute(unindexed.where(memories.c.id > last_id).limit(BATCH_SIZE)).all()
+        if not rows:
+            break
+        tag_rows = [
+            {'user_id': row.user_id, 'tag': tag, 'memory_id': row.id}
+            for row in rows for tag in _normalized(row.tags)
+        ]
+        if tag_rows:
+            connection.execute(memory_tags.insert(), tag_rows)
+        last_id = rows[-1].id
+
+
+def downgrade():
+    # The rows are derived from memories.tags and the table belongs to the model,
+    # so there is nothing to undo
+    pass
@@ -0,0 +1,19 @@
+from database import db
+from datetime import datetime
+
+class ChangeLogEntry(db.Model):
+    __tablename__ = 'change_log'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    version = db.Column(db.Integer, nullable=False)  # the user's change version, see services/counters.py
+    entity_type = db.Column(db.String(20), nullable=False)  # memory, reminder
+    entity_id = db.Column(db.Integer, nullable=False)
+    operation = db.Column(db.String(10), nullable=False)  # upsert, delete
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ChangeLogEntry {self.user_id}@{self.version} {self.operation} {self.entity_type} {self.entity_id}>'
+
+# Sync reads a user's changes after a version
+db.Index('ix_change_log_user_id_version', ChangeLogEntry.user_id, ChangeLogEntry.version)
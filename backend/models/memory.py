@@ -13,7 +13,7 @@ class Memory(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
-    content = db.Column(db.Text)
+    content = db.deferred(db.Column(db.Text))  # loaded on first access, or with undefer()
     memory_type = db.Column(db.Enum(MemoryType), default=MemoryType.note)
     tags = db.Column(db.JSON)
     importance_level = db.Column(db.Integer, default=1)  # 1-5 scale
@@ -40,24 +40,95 @@ class Memory(db.Model):
         db.session.commit()
     
     def to_dict(self, include_content=True):
-        data = {
-            'id': self.id,
-            'title': self.title,
-            'memory_type': self.memory_type.value,
-            'tags': self.tags,
-            'importance_level': self.importance_level,
-            'is_encrypted': self.is_encrypted,
-            'media_url': self.media_url,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'last_accessed': self.last_accessed.isoformat() if self.last_accessed else None,
-            'user_id': self.user_id
-        }
-        
-        if include_content:
-            data['content'] = self.content
-            
-        return data
+        return serialize_memory(self, include_content)
     
     def __repr__(self):
-        return f'<Memory {self.title}>' 
\ No newline at end of file
+        return f'<Memory {self.title}>'
+
+# Columns read by list endpoints that serialize rows without building Memory objects
+SERIALIZED_COLUMNS = (
+    Memory.id, Memory.title, Memory.memory_type, Memory.tags, Memory.importance_level,
+    Memory.is_encrypted, Memory.media_url, Memory.created_at, Memory.updated_at,
+    Memory.last_accessed, Memory.user_id
+)
+
+def serialized_columns(include_content=True):
+    return SERIALIZED_COLUMNS + (Memory.content,) if include_content else SERIALIZED_COLUMNS
+
+# Fields a list request can select with ?fields=, content_preview is cut by the
+# database so full content never leaves it
+CONTENT_PREVIEW_LENGTH = 200
+
+LIST_FIELDS = {
+    'id': Memory.id,
+    'title': Memory.title,
+    'content': Memory.content,
+    'content_preview': db.func.substr(Memory.content, 1, CONTENT_PREVIEW_LENGTH).label('content_preview'),
+    'memory_type': Memory.memory_type,
+    'tags': Memory.tags,
+    'importance_level': Memory.importance_level,
+    'is_encrypted': Memory.is_encrypted,
+    'media_url': Memory.media_url,
+    'created_at': Memory.created_at,
+    'updated_at': Memory.updated_at,
+    'last_accessed': Memory.last_accessed,
+    'user_id': Memory.user_id
+}
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+FIELD_FORMATTERS = {
+    'memory_type': lambda value: value.value if value else None,
+    'created_at': _isoformat,
+    'updated_at': _isoformat,
+    'last_accessed': _isoformat
+}
+
+def parse_fields(value):
+    """Parse a comma separated ?fields= value, returns (fields, error message)"""
+    fields = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in LIST_FIELDS]
+    if unknown:
+        return None, f'Unknown fields: {", ".join(unknown)}'
+    if not fields:
+        return None, 'fields must name at least one field'
+    return fields, None
+
+def field_columns(fields):
+    """Columns to select for fields, plus the id and created_at keys used for ordering and cursors"""
+    names = dict.fromkeys(('id', 'created_at') + tuple(fields))
+    return [LIST_FIELDS[name] for name in names]
+
+def serialize_memory_fields(row, fields):
+    """Only the requested fields of a row selected with field_columns()"""
+    return {
+        name: FIELD_FORMATTERS[name](getattr(row, name)) if name in FIELD_FORMATTERS else getattr(row, name)
+        for name in fields
+    }
+
+def serialize_memory(row, include_content=True):
+    """API representation of a Memory, or of a row selected with serialized_columns()"""
+    data = {
+        'id': row.id,
+        'title': row.title,
+        'memory_type': row.memory_type.value,
+        'tags': row.tags,
+        'importance_level': row.importance_level,
+        'is_encrypted': row.is_encrypted,
+        'media_url': row.media_url,
+        'created_at': row.created_at.isoformat(),
+        'updated_at': row.updated_at.isoformat(),
+        'last_accessed': row.last_accessed.isoformat() if row.last_accessed else None,
+        'user_id': row.user_id
+    }
+    
+    if include_content:
+        data['content'] = row.content
+        
+    return data
+
+# Composite indexes for the per-user listing and stats queries
+# (created_at, id) is the order of the listing and of its keyset pages
+db.Index('ix_memories_user_id_created_at_id', Memory.user_id, Memory.created_at.desc(), Memory.id.desc())
+db.Index('ix_memories_user_id_memory_type', Memory.user_id, Memory.memory_type)
@@ -0,0 +1,16 @@
+from database import db
+
+class MemoryTag(db.Model):
+    """One row per (memory, tag), maintained from Memory.tags by services/tag_index.py"""
+    __tablename__ = 'memory_tags'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    tag = db.Column(db.String(100), primary_key=True)  # normalized, see normalize_tag
+    memory_id = db.Column(db.Integer, db.ForeignKey('memories.id'), primary_key=True)
+    
+    def __repr__(self):
+        return f'<MemoryTag {self.user_id} {self.tag} {self.memory_id}>'
+
+# The primary key serves per-user tag lookups and prefix scans, this one
+# finds a memory's rows when its tags change or it is deleted
+db.Index('ix_memory_tags_memory_id', MemoryTag.memory_id)
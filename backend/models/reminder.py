@@ -36,37 +36,80 @@ class Reminder(db.Model):
         self.repeat_pattern = repeat_pattern
         self.memory_id = memory_id
     
-    def mark_completed(self):
+    def mark_completed(self, commit=True):
         self.is_completed = True
         self.completed_at = datetime.utcnow()
-        db.session.commit()
+        if commit:
+            db.session.commit()
     
-    def mark_uncompleted(self):
+    def mark_uncompleted(self, commit=True):
         self.is_completed = False
         self.completed_at = None
-        db.session.commit()
+        if commit:
+            db.session.commit()
     
-    def is_overdue(self):
-        if self.trigger_date and not self.is_completed:
-            return datetime.utcnow() > self.trigger_date
-        return False
+    def is_overdue(self, now=None):
+        return _is_overdue(self, now or datetime.utcnow())
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'reminder_type': self.reminder_type.value,
-            'trigger_date': self.trigger_date.isoformat() if self.trigger_date else None,
-            'repeat_pattern': self.repeat_pattern,
-            'is_completed': self.is_completed,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
-            'memory_id': self.memory_id,
-            'user_id': self.user_id,
-            'is_overdue': self.is_overdue()
-        }
+    def to_dict(self, now=None):
+        return serialize_reminder(self, now)
     
     def __repr__(self):
-        return f'<Reminder {self.title}>' 
\ No newline at end of file
+        return f'<Reminder {self.title}>'
+
+# Columns read by list endpoints that serialize rows without building Reminder objects
+SERIALIZED_COLUMNS = (
+    Reminder.id, Reminder.title, Reminder.description, Reminder.reminder_type, Reminder.trigger_date,
+    Reminder.repeat_pattern, Reminder.is_completed, Reminder.created_at, Reminder.updated_at,
+    Reminder.completed_at, Reminder.memory_id, Reminder.user_id
+)
+
+def _is_overdue(row, now):
+    if row.trigger_date and not row.is_completed:
+        return now > row.trigger_date
+    return False
+
+def serialize_reminder(row, now=None):
+    """API representation of a Reminder, or of a row selected with SERIALIZED_COLUMNS
+
+    List endpoints pass one `now` for the whole page instead of reading the clock per row.
+    """
+    return {
+        'id': row.id,
+        'title': row.title,
+        'description': row.description,
+        'reminder_type': row.reminder_type.value,
+        'trigger_date': row.trigger_date.isoformat() if row.trigger_date else None,
+        'repeat_pattern': row.repeat_pattern,
+        'is_completed': row.is_completed,
+        'created_at': row.created_at.isoformat(),
+        'updated_at': row.updated_at.isoformat(),
+        'completed_at': row.completed_at.isoformat() if row.completed_at else None,
+        'memory_id': row.memory_id,
+        'user_id': row.user_id,
+        'is_overdue': _is_overdue(row, now or datetime.utcnow())
+    }
+
+# Partial index matching the is_completed == False filters of the upcoming, overdue and pending listings
+db.Index('ix_reminders_user_id_trigger_date_id_pending', Reminder.user_id, Reminder.trigger_date, Reminder.id,
+         postgresql_where=db.text('is_completed = false'),
+         sqlite_where=db.text('is_completed = 0'))
+
+# The listing's (key, id) orders with NULL keys last, see services/pagination.py;
+# the leading IS NULL expression reads the same way on SQLite and Postgres
+db.Index('ix_reminders_user_id_trigger_date_id', Reminder.user_id, Reminder.trigger_date.is_(None),
+         Reminder.trigger_date, Reminder.id)
+db.Index('ix_reminders_user_id_completed_at_id', Reminder.user_id, Reminder.completed_at.is_(None),
+         Reminder.completed_at.desc(), Reminder.id.desc())
+db.Index('ix_reminders_memory_id', Reminder.memory_id)
+
+# Due spaced repetition cards for the review queue
+db.Index('ix_reminders_user_id_type_trigger_date_pending', Reminder.user_id, Reminder.reminder_type, Reminder.trigger_date,
+         postgresql_where=db.text('is_completed = false'),
+         sqlite_where=db.text('is_completed = 0'))
+
+# Global scans used by the reminder scheduler
+db.Index('ix_reminders_trigger_date_pending', Reminder.trigger_date, Reminder.id,
+         postgresql_where=db.text('is_completed = false'),
+         sqlite_where=db.text('is_completed = 0'))
+db.Index('ix_reminders_updated_at', Reminder.updated_at)
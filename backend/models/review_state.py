@@ -0,0 +1,41 @@
+from database import db
+
+class ReviewState(db.Model):
+    """Spaced repetition state of a spaced_repetition reminder, its due date is the reminder's trigger_date"""
+    __tablename__ = 'review_states'
+    
+    reminder_id = db.Column(db.Integer, db.ForeignKey('reminders.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    ease = db.Column(db.Float, nullable=False, default=2.5)
+    interval_days = db.Column(db.Float, nullable=False, default=0.0)  # before the interval modifier and cap
+    repetitions = db.Column(db.Integer, nullable=False, default=0)  # successful reviews in a row
+    lapses = db.Column(db.Integer, nullable=False, default=0)
+    last_grade = db.Column(db.Integer)
+    last_reviewed_at = db.Column(db.DateTime)
+    
+    def __init__(self, reminder_id, user_id, ease=2.5):
+        self.reminder_id = reminder_id
+        self.user_id = user_id
+        self.ease = ease
+        self.interval_days = 0.0
+        self.repetitions = 0
+        self.lapses = 0
+    
+    def to_dict(self):
+        return serialize_review_state(self)
+    
+    def __repr__(self):
+        return f'<ReviewState {self.reminder_id} ease={self.ease} interval={self.interval_days}>'
+
+def serialize_review_state(row):
+    """API representation of a ReviewState, None for cards never reviewed"""
+    if row is None:
+        return None
+    return {
+        'ease': round(row.ease, 3),
+        'interval_days': round(row.interval_days, 3),
+        'repetitions': row.repetitions,
+        'lapses': row.lapses,
+        'last_grade': row.last_grade,
+        'last_reviewed_at': row.last_reviewed_at.isoformat() if row.last_reviewed_at else None
+    }
@@ -1,6 +1,6 @@
 from database import db
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from services.passwords import password_hasher
 import enum
 
 class SubscriptionType(enum.Enum):
@@ -22,27 +22,41 @@ class User(db.Model):
     # Relationships
     memories = db.relationship('Memory', backref='user', lazy=True, cascade='all, delete-orphan')
     reminders = db.relationship('Reminder', backref='user', lazy=True, cascade='all, delete-orphan')
+    counters = db.relationship('UserCounter', backref='user', lazy=True, cascade='all, delete-orphan')
     
     def __init__(self, email, password, name=None):
         self.email = email
-        self.password = generate_password_hash(password)
+        self.password = password_hasher.hash(password)
         self.name = name
     
     def check_password(self, password):
-        return check_password_hash(self.password, password)
+        return password_hasher.verify(self.password, password)
     
     def set_password(self, password):
-        self.password = generate_password_hash(password)
+        self.password = password_hasher.hash(password)
+    
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self.password)
     
     def to_dict(self):
-        return {
-            'id': self.id,
-            'email': self.email,
-            'name': self.name,
-            'subscription_type': self.subscription_type.value,
-            'created_at': self.created_at.isoformat(),
-            'is_active': self.is_active
-        }
+        return serialize_user(self)
     
     def __repr__(self):
-        return f'<User {self.email}>' 
\ No newline at end of file
+        return f'<User {self.email}>'
+
+# Columns of the cached authenticated-user snapshot, see services/user_cache.py
+SNAPSHOT_COLUMNS = (
+    User.id, User.email, User.name, User.subscription_type,
+    User.created_at, User.updated_at, User.is_active
+)
+
+def serialize_user(row):
+    """API representation of a User, or of a row selected with SNAPSHOT_COLUMNS"""
+    return {
+        'id': row.id,
+        'email': row.email,
+        'name': row.name,
+        'subscription_type': row.subscription_type.value,
+        'created_at': row.created_at.isoformat(),
+        'is_active': row.is_active
+    } 
\ No newline at end of file
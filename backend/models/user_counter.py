@@ -0,0 +1,16 @@
+from database import db
+
+class UserCounter(db.Model):
+    __tablename__ = 'user_counters'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    name = db.Column(db.String(50), primary_key=True)  # memories, reminders, memories.<type>
+    value = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __init__(self, user_id, name, value=0):
+        self.user_id = user_id
+        self.name = name
+        self.value = value
+    
+    def __repr__(self):
+        return f'<UserCounter {self.user_id} {self.name}={self.value}>'
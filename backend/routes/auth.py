@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify, make_response
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, set_access_cookies, unset_jwt_cookies
-from models.user import User
+from flask_jwt_extended import create_access_token, jwt_required, current_user, set_access_cookies, unset_jwt_cookies
+from models.user import User, serialize_user
+from services.passwords import HasherBusy
 from database import db
 import re
 
@@ -66,6 +67,8 @@ def register():
         
         return response, 201
         
+    except HasherBusy:
+        return jsonify({'message': 'Server is busy, please retry shortly'}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Registration failed', 'error': str(e)}), 500
@@ -93,6 +96,11 @@ def login():
         if not user.is_active:
             return jsonify({'message': 'Account is deactivated'}), 401
         
+        # Upgrade hashes made with an older method or cost while we have the password
+        if user.password_needs_rehash():
+            user.set_password(password)
+            db.session.commit()
+        
         # Create access token
         access_token = create_access_token(identity=user.id)
         
@@ -106,7 +114,10 @@ def login():
         
         return response, 200
         
+    except HasherBusy:
+        return jsonify({'message': 'Server is busy, please retry shortly'}), 503, {'Retry-After': '1'}
     except Exception as e:
+        db.session.rollback()
         return jsonify({'message': 'Login failed', 'error': str(e)}), 500
 
 @auth_bp.route('/logout', methods=['POST'])
@@ -120,13 +131,8 @@ def logout():
 @jwt_required()
 def get_current_user():
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user:
-            return jsonify({'message': 'User not found'}), 404
-        
-        return jsonify({'user': user.to_dict()}), 200
+        # Missing users are answered with 404 by the user lookup error loader
+        return jsonify({'user': serialize_user(current_user)}), 200
         
     except Exception as e:
         return jsonify({'message': 'Failed to get user info', 'error': str(e)}), 500
@@ -135,18 +141,12 @@ def get_current_user():
 @jwt_required()
 def refresh():
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user:
-            return jsonify({'message': 'User not found'}), 404
-        
         # Create new access token
-        access_token = create_access_token(identity=user.id)
+        access_token = create_access_token(identity=current_user.id)
         
         response = make_response(jsonify({
             'message': 'Token refreshed successfully',
-            'user': user.to_dict()
+            'user': serialize_user(current_user)
         }))
         
         set_access_cookies(response, access_token)
@@ -1,14 +1,29 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models.memory import Memory, MemoryType
-from models.user import User, SubscriptionType
+from flask_jwt_extended import jwt_required, get_jwt_identity, current_user
+from models.memory import Memory, MemoryType, serialized_columns, serialize_memory, parse_fields, field_columns, serialize_memory_fields
+from models.user import SubscriptionType
 from database import db
-from sqlalchemy import or_, desc
+from services.cache import response_cache
+from services.etag import conditional, conditional_response, resource_etag
+from services.search import search_memories
+from services.counters import get_counters, MEMORIES
+from services.pagination import seek_page, InvalidCursor
+from services.access_tracker import access_tracker
+from services.batch import batch_items, batch_response, item_result, error_result, string_fields_error, invalid_item, ITEM_ERRORS
+from services.similarity import similarity_index, IndexBuilding
+from services.tag_index import filter_by_tags, parse_tag_list, normalize_tag, tag_counts
+from sqlalchemy import desc, func
+from sqlalchemy.orm import undefer
 
 memories_bp = Blueprint('memories', __name__)
 
+LIMIT_REACHED_MESSAGE = 'Memory limit reached. Upgrade to Premium for unlimited memories.'
+AI_FEATURES_MESSAGE = 'Similar memories are a Premium feature. Upgrade to Premium to use it.'
+
 @memories_bp.route('/', methods=['GET'])
 @jwt_required()
+@conditional()
+@response_cache.cached
 def get_memories():
     try:
         current_user_id = get_jwt_identity()
@@ -17,19 +32,26 @@ def get_memories():
         search = request.args.get('search', '')
         memory_type = request.args.get('type', '')
         importance = request.args.get('importance', type=int)
+        cursor = request.args.get('cursor')  # opt-in keyset pagination
+        fields = request.args.get('fields')  # e.g. id,title,content_preview
+        tag = request.args.get('tag', '')
+        tags_all = parse_tag_list(request.args.get('tags_all', ''))
+        tags_any = parse_tag_list(request.args.get('tags_any', ''))
+        
+        if fields is not None:
+            fields, error = parse_fields(fields)
+            if error:
+                return jsonify({'message': error}), 400
         
         # Build query
         query = Memory.query.filter_by(user_id=current_user_id)
         
-        # Search filter
+        # Search filter (ranked by relevance, cursor pages stay newest first)
         if search:
-            query = query.filter(
-                or_(
-                    Memory.title.contains(search),
-                    Memory.content.contains(search),
-                    Memory.tags.contains(search)
-                )
-            )
+            query = search_memories(query, current_user_id, search, ranked=cursor is None)
+        else:
+            # Order by creation date (newest first), the id keeps pages stable on ties
+            query = query.order_by(desc(Memory.created_at), desc(Memory.id))
         
         # Type filter
         if memory_type and memory_type in [e.value for e in MemoryType]:
@@ -39,8 +61,31 @@ def get_memories():
         if importance:
             query = query.filter_by(importance_level=importance)
         
-        # Order by creation date (newest first)
-        query = query.order_by(desc(Memory.created_at))
+        # Tag filters, resolved on the memory_tags index
+        if tag:
+            tags_all = sorted(set(tags_all) | {normalize_tag(tag)})
+        query = filter_by_tags(query, current_user_id, tags_all, tags_any)
+        
+        # Select plain columns, rows are serialized without building Memory objects
+        if fields:
+            query = query.with_entities(*field_columns(fields))
+            serialize = lambda row: serialize_memory_fields(row, fields)
+        else:
+            query = query.with_entities(*serialized_columns())
+            serialize = serialize_memory
+        
+        # Seek on (created_at, id) instead of OFFSET + COUNT
+        if cursor is not None:
+            items, pagination = seek_page(
+                query, Memory.created_at, Memory.id, cursor, per_page,
+                descending=True,
+                include_total=request.args.get('include_total', 'false') == 'true'
+            )
+            
+            return jsonify({
+                'memories': [serialize(row) for row in items],
+                'pagination': pagination
+            }), 200
         
         # Paginate
         memories = query.paginate(
@@ -50,7 +95,7 @@ def get_memories():
         )
         
         return jsonify({
-            'memories': [memory.to_dict() for memory in memories.items],
+            'memories': [serialize(row) for row in memories.items],
             'pagination': {
                 'page': page,
                 'pages': memories.pages,
@@ -61,71 +106,186 @@ def get_memories():
             }
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': 'Failed to retrieve memories', 'error': str(e)}), 500
 
+@memories_bp.route('/tags', methods=['GET'])
+@jwt_required()
+@conditional()
+@response_cache.cached
+def get_tags():
+    try:
+        current_user_id = get_jwt_identity()
+        prefix = request.args.get('prefix', '')
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        
+        tags = [{'tag': tag, 'count': count} for tag, count in tag_counts(current_user_id, prefix, limit)]
+        
+        return jsonify({'tags': tags}), 200
+        
+    except Exception as e:
+        return jsonify({'message': 'Failed to retrieve tags', 'error': str(e)}), 500
+
+@memories_bp.route('/similar', methods=['GET'])
+@jwt_required()
+def get_similar_memories():
+    try:
+        current_user_id = get_jwt_identity()
+        memory_id = request.args.get('id', type=int)
+        text = request.args.get('q', '').strip()
+        k = min(max(request.args.get('k', 10, type=int), 1), 50)
+        
+        # Part of the ai_features advertised by the subscription endpoint
+        if current_user.subscription_type != SubscriptionType.premium:
+            return jsonify({'message': AI_FEATURES_MESSAGE}), 403
+        
+        if memory_id:
+            matches = similarity_index.similar_to_memory(current_user_id, memory_id, k)
+            if matches is None:
+                return jsonify({'message': 'Memory not found'}), 404
+        elif text:
+            matches = similarity_index.similar_to_text(current_user_id, text, k)
+        else:
+            return jsonify({'message': 'Provide a memory id or a q text to compare with'}), 400
+        
+        rows = db.session.query(*serialized_columns(include_content=False)).filter(
+            Memory.user_id == current_user_id,
+            Memory.id.in_([match_id for match_id, _ in matches])
+        ).all() if matches else []
+        rows = {row.id: row for row in rows}
+        
+        memories = [
+            {**serialize_memory(rows[match_id], include_content=False), 'score': round(score, 4)}
+            for match_id, score in matches if match_id in rows
+        ]
+        
+        return jsonify({'memories': memories, 'count': len(memories)}), 200
+        
+    except IndexBuilding:
+        return jsonify({'message': 'Preparing similar memory search, please retry shortly'}), 202, {'Retry-After': '1'}
+    except Exception as e:
+        return jsonify({'message': 'Failed to find similar memories', 'error': str(e)}), 500
+
 @memories_bp.route('/<int:memory_id>', methods=['GET'])
 @jwt_required()
 def get_memory(memory_id):
     try:
         current_user_id = get_jwt_identity()
-        memory = Memory.query.filter_by(id=memory_id, user_id=current_user_id).first()
+        memory = Memory.query.options(undefer(Memory.content)).filter_by(id=memory_id, user_id=current_user_id).first()
         
         if not memory:
             return jsonify({'message': 'Memory not found'}), 404
         
-        # Update last accessed
-        memory.update_last_accessed()
+        # Buffer the access instead of writing on every read, the body shows the
+        # stored last_accessed so it stays identical for one strong ETag
+        access_tracker.record(memory.id)
         
-        return jsonify({'memory': memory.to_dict()}), 200
+        etag = resource_etag('memory', memory.id, memory.updated_at, memory.last_accessed)
+        last_modified = max(memory.updated_at, memory.last_accessed or memory.updated_at)
+        return conditional_response(etag, last_modified, lambda: (jsonify({'memory': memory.to_dict()}), 200))
         
     except Exception as e:
         return jsonify({'message': 'Failed to retrieve memory', 'error': str(e)}), 500
 
+def _tags_error(data):
+    tags = data.get('tags')
+    if tags is not None and not (isinstance(tags, list) and all(isinstance(tag, str) for tag in tags)):
+        return ('tags must be a list of strings', 400)
+    return None
+
+def _parse_new_memory(data, user_id):
+    """Validate a create payload, returns (memory, (message, status) error)"""
+    error = string_fields_error(data, ('title', 'content'), nullable=('content',)) or _tags_error(data)
+    if error:
+        return None, error
+    
+    title = data.get('title', '').strip()
+    content = (data.get('content') or '').strip()
+    memory_type = data.get('memory_type', 'note')
+    tags = data.get('tags') or []
+    importance_level = data.get('importance_level', 1)
+    
+    if not title:
+        return None, ('Title is required', 400)
+    
+    # Validate memory type
+    if memory_type not in [e.value for e in MemoryType]:
+        memory_type = 'note'
+    
+    # Validate importance level
+    if not isinstance(importance_level, int) or importance_level < 1 or importance_level > 5:
+        importance_level = 1
+    
+    memory = Memory(
+        title=title,
+        content=content,
+        user_id=user_id,
+        memory_type=MemoryType(memory_type),
+        importance_level=importance_level,
+        tags=tags
+    )
+    
+    return memory, None
+
+def _apply_memory_update(memory, data):
+    """Apply an update payload, returns a (message, status) error or None"""
+    # Validate before touching the memory so a rejected update changes nothing
+    error = string_fields_error(data, ('title', 'content'), nullable=('content',)) or _tags_error(data)
+    if error:
+        return error
+    
+    if 'title' in data and not data['title'].strip():
+        return ('Title cannot be empty', 400)
+    
+    # Update fields if provided
+    if 'title' in data:
+        memory.title = data['title'].strip()
+    
+    if 'content' in data:
+        memory.content = (data['content'] or '').strip()
+    
+    if 'memory_type' in data:
+        memory_type = data['memory_type']
+        if memory_type in [e.value for e in MemoryType]:
+            memory.memory_type = MemoryType(memory_type)
+    
+    if 'tags' in data:
+        memory.tags = data['tags'] or []
+    
+    if 'importance_level' in data:
+        importance_level = data['importance_level']
+        if isinstance(importance_level, int) and 1 <= importance_level <= 5:
+            memory.importance_level = importance_level
+    
+    return None
+
+def _remaining_quota(user_id):
+    """How many memories the user may still create, None when unlimited"""
+    if current_user.subscription_type != SubscriptionType.free:
+        return None
+    return max(100 - get_counters(user_id)[MEMORIES], 0)
+
 @memories_bp.route('/', methods=['POST'])
 @jwt_required()
 def create_memory():
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
         
         # Check memory limit for free users
-        if user.subscription_type == SubscriptionType.free:
-            memory_count = Memory.query.filter_by(user_id=current_user_id).count()
-            if memory_count >= 100:
-                return jsonify({'message': 'Memory limit reached. Upgrade to Premium for unlimited memories.'}), 403
+        if _remaining_quota(current_user_id) == 0:
+            return jsonify({'message': LIMIT_REACHED_MESSAGE}), 403
         
         data = request.get_json()
         
         if not data:
             return jsonify({'message': 'No data provided'}), 400
         
-        title = data.get('title', '').strip()
-        content = data.get('content', '').strip()
-        memory_type = data.get('memory_type', 'note')
-        tags = data.get('tags', [])
-        importance_level = data.get('importance_level', 1)
-        
-        if not title:
-            return jsonify({'message': 'Title is required'}), 400
-        
-        # Validate memory type
-        if memory_type not in [e.value for e in MemoryType]:
-            memory_type = 'note'
-        
-        # Validate importance level
-        if not isinstance(importance_level, int) or importance_level < 1 or importance_level > 5:
-            importance_level = 1
-        
-        # Create memory
-        memory = Memory(
-            title=title,
-            content=content,
-            user_id=current_user_id,
-            memory_type=MemoryType(memory_type),
-            importance_level=importance_level,
-            tags=tags
-        )
+        memory, error = _parse_new_memory(data, current_user_id)
+        if error:
+            message, status = error
+            return jsonify({'message': message}), status
         
         db.session.add(memory)
         db.session.commit()
@@ -144,7 +304,7 @@ def create_memory():
 def update_memory(memory_id):
     try:
         current_user_id = get_jwt_identity()
-        memory = Memory.query.filter_by(id=memory_id, user_id=current_user_id).first()
+        memory = Memory.query.options(undefer(Memory.content)).filter_by(id=memory_id, user_id=current_user_id).first()
         
         if not memory:
             return jsonify({'message': 'Memory not found'}), 404
@@ -154,28 +314,10 @@ def update_memory(memory_id):
         if not data:
             return jsonify({'message': 'No data provided'}), 400
         
-        # Update fields if provided
-        if 'title' in data:
-            title = data['title'].strip()
-            if not title:
-                return jsonify({'message': 'Title cannot be empty'}), 400
-            memory.title = title
-        
-        if 'content' in data:
-            memory.content = data['content'].strip()
-        
-        if 'memory_type' in data:
-            memory_type = data['memory_type']
-            if memory_type in [e.value for e in MemoryType]:
-                memory.memory_type = MemoryType(memory_type)
-        
-        if 'tags' in data:
-            memory.tags = data['tags']
-        
-        if 'importance_level' in data:
-            importance_level = data['importance_level']
-            if isinstance(importance_level, int) and 1 <= importance_level <= 5:
-                memory.importance_level = importance_level
+        error = _apply_memory_update(memory, data)
+        if error:
+            message, status = error
+            return jsonify({'message': message}), status
         
         db.session.commit()
         
@@ -207,37 +349,175 @@ def delete_memory(memory_id):
         db.session.rollback()
         return jsonify({'message': 'Failed to delete memory', 'error': str(e)}), 500
 
+def _owned_memories(user_id, ids, with_content=False):
+    """Load the user's memories among ids with one query, keyed by id"""
+    valid_ids = [memory_id for memory_id in ids if isinstance(memory_id, int)]
+    if not valid_ids:
+        return {}
+    query = Memory.query.options(undefer(Memory.content)) if with_content else Memory.query
+    memories = query.filter(Memory.user_id == user_id, Memory.id.in_(valid_ids)).all()
+    return {memory.id: memory for memory in memories}
+
+@memories_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def create_memories_batch():
+    try:
+        current_user_id = get_jwt_identity()
+        items, error = batch_items(request.get_json(), 'memories')
+        
+        if error:
+            return jsonify({'message': error}), 400
+        
+        # Validate every item up front
+        results = [None] * len(items)
+        accepted = []
+        for index, data in enumerate(items):
+            try:
+                memory, error = _parse_new_memory(data, current_user_id) if isinstance(data, dict) \
+                    else (None, ('Invalid item', 400))
+            except ITEM_ERRORS as e:
+                memory, error = None, invalid_item(e)
+            if error:
+                results[index] = error_result(index, error)
+            else:
+                accepted.append((index, memory))
+        
+        # Enforce the free-tier limit once for the whole batch
+        remaining = _remaining_quota(current_user_id)
+        if remaining is not None:
+            for index, _ in accepted[remaining:]:
+                results[index] = error_result(index, (LIMIT_REACHED_MESSAGE, 403))
+            accepted = accepted[:remaining]
+        
+        # One flush inserts the batch, serialize before commit expires the rows
+        db.session.add_all(memory for _, memory in accepted)
+        db.session.flush()
+        for index, memory in accepted:
+            results[index] = item_result(index, 201, memory=memory.to_dict())
+        db.session.commit()
+        
+        return batch_response(results, 201)
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Failed to create memories', 'error': str(e)}), 500
+
+@memories_bp.route('/batch', methods=['PUT'])
+@jwt_required()
+def update_memories_batch():
+    try:
+        current_user_id = get_jwt_identity()
+        items, error = batch_items(request.get_json(), 'memories')
+        
+        if error:
+            return jsonify({'message': error}), 400
+        
+        memories = _owned_memories(current_user_id, [
+            data.get('id') for data in items if isinstance(data, dict)
+        ], with_content=True)
+        
+        results = []
+        updated = []
+        for index, data in enumerate(items):
+            memory_id = data.get('id') if isinstance(data, dict) else None
+            memory = memories.get(memory_id) if isinstance(memory_id, int) else None
+            if not memory:
+                results.append(error_result(index, ('Memory not found', 404)))
+                continue
+            
+            try:
+                error = _apply_memory_update(memory, data)
+            except ITEM_ERRORS as e:
+                db.session.expire(memory)  # drop whatever was applied before the error
+                error = invalid_item(e)
+            if error:
+                results.append(error_result(index, error))
+            else:
+                results.append(None)
+                updated.append((index, memory))
+        
+        db.session.flush()
+        for index, memory in updated:
+            results[index] = item_result(index, 200, memory=memory.to_dict())
+        db.session.commit()
+        
+        return batch_response(results, 200)
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Failed to update memories', 'error': str(e)}), 500
+
+@memories_bp.route('/batch', methods=['DELETE'])
+@jwt_required()
+def delete_memories_batch():
+    try:
+        current_user_id = get_jwt_identity()
+        ids, error = batch_items(request.get_json(), 'ids')
+        
+        if error:
+            return jsonify({'message': error}), 400
+        
+        memories = _owned_memories(current_user_id, ids)
+        
+        results = []
+        for index, memory_id in enumerate(ids):
+            memory = memories.pop(memory_id, None) if isinstance(memory_id, int) else None
+            if not memory:
+                results.append(error_result(index, ('Memory not found', 404)))
+                continue
+            
+            db.session.delete(memory)
+            results.append(item_result(index, 200, id=memory_id))
+        
+        db.session.commit()
+        
+        return batch_response(results, 200)
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Failed to delete memories', 'error': str(e)}), 500
+
+# Stats dimensions: payload key -> (column, label for a value, labels always reported)
+STATS_DIMENSIONS = {
+    'type_counts': (Memory.memory_type, lambda value: value.value, [e.value for e in MemoryType]),
+    'importance_counts': (Memory.importance_level, str, [str(level) for level in range(1, 6)])
+}
+
+def memory_stats(user_id, dimensions=STATS_DIMENSIONS):
+    """Count a user's memories along every dimension with one grouped query"""
+    columns = [column for column, _, _ in dimensions.values()]
+    rows = db.session.query(*columns, func.count(Memory.id))\
+        .filter(Memory.user_id == user_id)\
+        .group_by(*columns)\
+        .all()
+    
+    stats = {'total_memories': 0}
+    for key, (_, _, labels) in dimensions.items():
+        stats[key] = {label: 0 for label in labels}
+    
+    # Fold the combined groups back into one histogram per dimension
+    for row in rows:
+        count = row[-1]
+        stats['total_memories'] += count
+        for (key, (_, label, labels)), value in zip(dimensions.items(), row):
+            if value is None:
+                continue
+            name = label(value)
+            if labels and name not in labels:
+                continue
+            stats[key][name] = stats[key].get(name, 0) + count
+    
+    return stats
+
 @memories_bp.route('/stats', methods=['GET'])
 @jwt_required()
+@conditional()
+@response_cache.cached
 def get_memory_stats():
     try:
         current_user_id = get_jwt_identity()
         
-        total_memories = Memory.query.filter_by(user_id=current_user_id).count()
-        
-        # Count by type
-        type_counts = {}
-        for memory_type in MemoryType:
-            count = Memory.query.filter_by(
-                user_id=current_user_id, 
-                memory_type=memory_type
-            ).count()
-            type_counts[memory_type.value] = count
-        
-        # Count by importance level
-        importance_counts = {}
-        for level in range(1, 6):
-            count = Memory.query.filter_by(
-                user_id=current_user_id, 
-                importance_level=level
-            ).count()
-            importance_counts[str(level)] = count
-        
-        return jsonify({
-            'total_memories': total_memories,
-            'type_counts': type_counts,
-            'importance_counts': importance_counts
-        }), 200
+        return jsonify(memory_stats(current_user_id)), 200
         
     except Exception as e:
         return jsonify({'message': 'Failed to retrieve stats', 'error': str(e)}), 500 
\ No newline at end of file
@@ -1,15 +1,26 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models.reminder import Reminder, ReminderType
+from models.reminder import Reminder, ReminderType, SERIALIZED_COLUMNS, serialize_reminder
 from models.memory import Memory
+from models.review_state import ReviewState, serialize_review_state
 from database import db
-from datetime import datetime, timedelta
-from sqlalchemy import desc, asc
+from services.cache import response_cache
+from services.etag import conditional, conditional_response, resource_etag
+from services.pagination import seek_page, keyset_ordering, InvalidCursor
+from services.batch import batch_items, batch_response, item_result, error_result, string_fields_error, invalid_item, ITEM_ERRORS
+from services.spaced_repetition import spaced_repetition, GRADES, DEFAULT_GRADE
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import asc, or_
 
 reminders_bp = Blueprint('reminders', __name__)
 
+# Due cards ranked per review queue request, due_count stops counting here
+REVIEW_QUEUE_SCAN = 1000
+
 @reminders_bp.route('/', methods=['GET'])
 @jwt_required()
+@conditional(time_bucket=60)
+@response_cache.cached
 def get_reminders():
     try:
         current_user_id = get_jwt_identity()
@@ -17,6 +28,7 @@ def get_reminders():
         per_page = request.args.get('per_page', 10, type=int)
         reminder_type = request.args.get('type', '')
         status = request.args.get('status', '')  # completed, pending, overdue
+        cursor = request.args.get('cursor')  # opt-in keyset pagination
         
         # Build query
         query = Reminder.query.filter_by(user_id=current_user_id)
@@ -36,11 +48,34 @@ def get_reminders():
                 Reminder.trigger_date < datetime.utcnow()
             )
         
-        # Order by trigger date (soonest first for pending, latest first for completed)
+        # Select plain columns, rows are serialized without building Reminder objects
+        query = query.with_entities(*SERIALIZED_COLUMNS)
+        now = datetime.utcnow()
+        
+        # (trigger_date, id) soonest first, or (completed_at, id) latest first for
+        # completed reminders, in both modes so each reads one index in order.
+        # Overdue reminders all have a trigger date and read the pending index
         if status == 'completed':
-            query = query.order_by(desc(Reminder.completed_at))
+            key, descending = Reminder.completed_at, True
         else:
-            query = query.order_by(asc(Reminder.trigger_date.nullslast()))
+            key, descending = Reminder.trigger_date, False
+        nullable = status != 'overdue'
+        
+        # Seek on (key, id) instead of OFFSET + COUNT
+        if cursor is not None:
+            items, pagination = seek_page(
+                query, key, Reminder.id, cursor, per_page,
+                descending=descending,
+                nullable=nullable,
+                include_total=request.args.get('include_total', 'false') == 'true'
+            )
+            
+            return jsonify({
+                'reminders': [serialize_reminder(row, now) for row in items],
+                'pagination': pagination
+            }), 200
+        
+        query = query.order_by(*keyset_ordering(key, Reminder.id, descending, nullable))
         
         # Paginate
         reminders = query.paginate(
@@ -50,7 +85,7 @@ def get_reminders():
         )
         
         return jsonify({
-            'reminders': [reminder.to_dict() for reminder in reminders.items],
+            'reminders': [serialize_reminder(row, now) for row in reminders.items],
             'pagination': {
                 'page': page,
                 'pages': reminders.pages,
@@ -61,6 +96,8 @@ def get_reminders():
             }
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': 'Failed to retrieve reminders', 'error': str(e)}), 500
 
@@ -74,11 +111,126 @@ def get_reminder(reminder_id):
         if not reminder:
             return jsonify({'message': 'Reminder not found'}), 404
         
-        return jsonify({'reminder': reminder.to_dict()}), 200
+        etag = resource_etag('reminder', reminder.id, reminder.updated_at, reminder.is_overdue())
+        return conditional_response(etag, reminder.updated_at, lambda: (jsonify({'reminder': reminder.to_dict()}), 200))
         
     except Exception as e:
         return jsonify({'message': 'Failed to retrieve reminder', 'error': str(e)}), 500
 
+def _parse_trigger_date(value):
+    """Parse an ISO trigger date to naive UTC, returns (datetime, (message, status) error)"""
+    try:
+        trigger_date = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None, ('Invalid trigger date format', 400)
+    
+    # Stored and compared as naive UTC, like utcnow()
+    if trigger_date.tzinfo:
+        trigger_date = trigger_date.astimezone(timezone.utc).replace(tzinfo=None)
+    return trigger_date, None
+
+def _as_id(value):
+    # Clients may send ids as strings (form values)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _owned_memory_ids(user_id, memory_ids):
+    """The subset of memory_ids owned by the user, with one query"""
+    memory_ids = {_as_id(memory_id) for memory_id in memory_ids if memory_id} - {None}
+    if not memory_ids:
+        return set()
+    rows = db.session.query(Memory.id).filter(Memory.user_id == user_id, Memory.id.in_(memory_ids)).all()
+    return {memory_id for (memory_id,) in rows}
+
+def _parse_new_reminder(data, user_id, owned_memory_ids):
+    """Validate a create payload, returns (reminder, (message, status) error)"""
+    error = string_fields_error(data, ('title', 'description', 'trigger_date', 'repeat_pattern'),
+                                nullable=('description', 'trigger_date', 'repeat_pattern'))
+    if error:
+        return None, error
+    
+    title = data.get('title', '').strip()
+    description = (data.get('description') or '').strip()
+    reminder_type = data.get('reminder_type', 'deadline')
+    trigger_date_str = data.get('trigger_date')
+    repeat_pattern = (data.get('repeat_pattern') or '').strip()
+    memory_id = data.get('memory_id')
+    
+    if not title:
+        return None, ('Title is required', 400)
+    
+    # Validate reminder type
+    if reminder_type not in [e.value for e in ReminderType]:
+        reminder_type = 'deadline'
+    
+    # Parse trigger date
+    trigger_date = None
+    if trigger_date_str:
+        trigger_date, error = _parse_trigger_date(trigger_date_str)
+        if error:
+            return None, error
+    
+    # Validate memory_id if provided
+    if memory_id and _as_id(memory_id) not in owned_memory_ids:
+        return None, ('Associated memory not found', 404)
+    
+    reminder = Reminder(
+        title=title,
+        user_id=user_id,
+        description=description,
+        reminder_type=ReminderType(reminder_type),
+        trigger_date=trigger_date,
+        repeat_pattern=repeat_pattern if repeat_pattern else None,
+        memory_id=_as_id(memory_id) if memory_id else None
+    )
+    
+    return reminder, None
+
+def _apply_reminder_update(reminder, data, owned_memory_ids):
+    """Apply an update payload, returns a (message, status) error or None"""
+    # Validate everything before touching the reminder so a rejected update changes nothing
+    error = string_fields_error(data, ('title', 'description', 'trigger_date', 'repeat_pattern'),
+                                nullable=('description', 'trigger_date', 'repeat_pattern'))
+    if error:
+        return error
+    
+    if 'title' in data and not data['title'].strip():
+        return ('Title cannot be empty', 400)
+    
+    trigger_date = None
+    if data.get('trigger_date'):
+        trigger_date, error = _parse_trigger_date(data['trigger_date'])
+        if error:
+            return error
+    
+    if data.get('memory_id') and _as_id(data['memory_id']) not in owned_memory_ids:
+        return ('Associated memory not found', 404)
+    
+    # Update fields if provided
+    if 'title' in data:
+        reminder.title = data['title'].strip()
+    
+    if 'description' in data:
+        reminder.description = (data['description'] or '').strip()
+    
+    if 'reminder_type' in data:
+        reminder_type = data['reminder_type']
+        if reminder_type in [e.value for e in ReminderType]:
+            reminder.reminder_type = ReminderType(reminder_type)
+    
+    if 'trigger_date' in data:
+        reminder.trigger_date = trigger_date
+    
+    if 'repeat_pattern' in data:
+        reminder.repeat_pattern = (data['repeat_pattern'] or '').strip() or None
+    
+    if 'memory_id' in data:
+        reminder.memory_id = _as_id(data['memory_id']) if data['memory_id'] else None
+    
+    return None
+
 @reminders_bp.route('/', methods=['POST'])
 @jwt_required()
 def create_reminder():
@@ -89,44 +241,11 @@ def create_reminder():
         if not data:
             return jsonify({'message': 'No data provided'}), 400
         
-        title = data.get('title', '').strip()
-        description = data.get('description', '').strip()
-        reminder_type = data.get('reminder_type', 'deadline')
-        trigger_date_str = data.get('trigger_date')
-        repeat_pattern = data.get('repeat_pattern', '').strip()
-        memory_id = data.get('memory_id')
-        
-        if not title:
-            return jsonify({'message': 'Title is required'}), 400
-        
-        # Validate reminder type
-        if reminder_type not in [e.value for e in ReminderType]:
-            reminder_type = 'deadline'
-        
-        # Parse trigger date
-        trigger_date = None
-        if trigger_date_str:
-            try:
-                trigger_date = datetime.fromisoformat(trigger_date_str.replace('Z', '+00:00'))
-            except ValueError:
-                return jsonify({'message': 'Invalid trigger date format'}), 400
-        
-        # Validate memory_id if provided
-        if memory_id:
-            memory = Memory.query.filter_by(id=memory_id, user_id=current_user_id).first()
-            if not memory:
-                return jsonify({'message': 'Associated memory not found'}), 404
-        
-        # Create reminder
-        reminder = Reminder(
-            title=title,
-            user_id=current_user_id,
-            description=description,
-            reminder_type=ReminderType(reminder_type),
-            trigger_date=trigger_date,
-            repeat_pattern=repeat_pattern if repeat_pattern else None,
-            memory_id=memory_id
-        )
+        owned_memory_ids = _owned_memory_ids(current_user_id, [data.get('memory_id')])
+        reminder, error = _parse_new_reminder(data, current_user_id, owned_memory_ids)
+        if error:
+            message, status = error
+            return jsonify({'message': message}), status
         
         db.session.add(reminder)
         db.session.commit()
@@ -155,41 +274,11 @@ def update_reminder(reminder_id):
         if not data:
             return jsonify({'message': 'No data provided'}), 400
         
-        # Update fields if provided
-        if 'title' in data:
-            title = data['title'].strip()
-            if not title:
-                return jsonify({'message': 'Title cannot be empty'}), 400
-            reminder.title = title
-        
-        if 'description' in data:
-            reminder.description = data['description'].strip()
-        
-        if 'reminder_type' in data:
-            reminder_type = data['reminder_type']
-            if reminder_type in [e.value for e in ReminderType]:
-                reminder.reminder_type = ReminderType(reminder_type)
-        
-        if 'trigger_date' in data:
-            trigger_date_str = data['trigger_date']
-            if trigger_date_str:
-                try:
-                    reminder.trigger_date = datetime.fromisoformat(trigger_date_str.replace('Z', '+00:00'))
-                except ValueError:
-                    return jsonify({'message': 'Invalid trigger date format'}), 400
-            else:
-                reminder.trigger_date = None
-        
-        if 'repeat_pattern' in data:
-            reminder.repeat_pattern = data['repeat_pattern'].strip() or None
-        
-        if 'memory_id' in data:
-            memory_id = data['memory_id']
-            if memory_id:
-                memory = Memory.query.filter_by(id=memory_id, user_id=current_user_id).first()
-                if not memory:
-                    return jsonify({'message': 'Associated memory not found'}), 404
-            reminder.memory_id = memory_id
+        owned_memory_ids = _owned_memory_ids(current_user_id, [data.get('memory_id')])
+        error = _apply_reminder_update(reminder, data, owned_memory_ids)
+        if error:
+            message, status = error
+            return jsonify({'message': message}), status
         
         db.session.commit()
         
@@ -231,6 +320,22 @@ def complete_reminder(reminder_id):
         if not reminder:
             return jsonify({'message': 'Reminder not found'}), 404
         
+        # Spaced repetition cards are reviewed and rescheduled instead of completed
+        if reminder.reminder_type == ReminderType.spaced_repetition:
+            data = request.get_json(silent=True) or {}
+            grade = data.get('grade', DEFAULT_GRADE)
+            if isinstance(grade, bool) or not isinstance(grade, int) or grade not in GRADES:
+                return jsonify({'message': 'Grade must be an integer from 0 to 5'}), 400
+            
+            state = spaced_repetition.review(reminder, grade)
+            db.session.commit()
+            
+            return jsonify({
+                'message': 'Review recorded',
+                'reminder': reminder.to_dict(),
+                'review': serialize_review_state(state)
+            }), 200
+        
         reminder.mark_completed()
         
         return jsonify({
@@ -263,24 +368,208 @@ def uncomplete_reminder(reminder_id):
         db.session.rollback()
         return jsonify({'message': 'Failed to uncomplete reminder', 'error': str(e)}), 500
 
+def _owned_reminders(user_id, ids):
+    """Load the user's reminders among ids with one query, keyed by id"""
+    valid_ids = [reminder_id for reminder_id in ids if isinstance(reminder_id, int)]
+    if not valid_ids:
+        return {}
+    reminders = Reminder.query.filter(Reminder.user_id == user_id, Reminder.id.in_(valid_ids)).all()
+    return {reminder.id: reminder for reminder in reminders}
+
+@reminders_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def create_reminders_batch():
+    try:
+        current_user_id = get_jwt_identity()
+        items, error = batch_items(request.get_json(), 'reminders')
+        
+        if error:
+            return jsonify({'message': error}), 400
+        
+        owned_memory_ids = _owned_memory_ids(current_user_id, [
+            data.get('memory_id') for data in items if isinstance(data, dict)
+        ])
+        
+        # Validate every item up front
+        results = [None] * len(items)
+        accepted = []
+        for index, data in enumerate(items):
+            try:
+                reminder, error = _parse_new_reminder(data, current_user_id, owned_memory_ids) if isinstance(data, dict) \
+                    else (None, ('Invalid item', 400))
+            except ITEM_ERRORS as e:
+                reminder, error = None, invalid_item(e)
+            if error:
+                results[index] = error_result(index, error)
+            else:
+                accepted.append((index, reminder))
+        
+        # One flush inserts the batch, serialize before commit expires the rows
+        db.session.add_all(reminder for _, reminder in accepted)
+        db.session.flush()
+        for index, reminder in accepted:
+            results[index] = item_result(index, 201, reminder=reminder.to_dict())
+        db.session.commit()
+        
+        return batch_response(results, 201)
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Failed to create reminders', 'error': str(e)}), 500
+
+@reminders_bp.route('/batch', methods=['PUT'])
+@jwt_required()
+def update_reminders_batch():
+    try:
+        current_user_id = get_jwt_identity()
+        items, error = batch_items(request.get_json(), 'reminders')
+        
+        if error:
+            return jsonify({'message': error}), 400
+        
+        payloads = [data for data in items if isinstance(data, dict)]
+        reminders = _owned_reminders(current_user_id, [data.get('id') for data in payloads])
+        owned_memory_ids = _owned_memory_ids(current_user_id, [data.get('memory_id') for data in payloads])
+        
+        results = []
+        updated = []
+        for index, data in enumerate(items):
+            reminder_id = data.get('id') if isinstance(data, dict) else None
+            reminder = reminders.get(reminder_id) if isinstance(reminder_id, int) else None
+            if not reminder:
+                results.append(error_result(index, ('Reminder not found', 404)))
+                continue
+            
+            try:
+                error = _apply_reminder_update(reminder, data, owned_memory_ids)
+            except ITEM_ERRORS as e:
+                db.session.expire(reminder)  # drop whatever was applied before the error
+                error = invalid_item(e)
+            if error:
+                results.append(error_result(index, error))
+            else:
+                results.append(None)
+                updated.append((index, reminder))
+        
+        db.session.flush()
+        for index, reminder in updated:
+            results[index] = item_result(index, 200, reminder=reminder.to_dict())
+        db.session.commit()
+        
+        return batch_response(results, 200)
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Failed to update reminders', 'error': str(e)}), 500
+
+@reminders_bp.route('/batch', methods=['DELETE'])
+@jwt_required()
+def delete_reminders_batch():
+    try:
+        current_user_id = get_jwt_identity()
+        ids, error = batch_items(request.get_json(), 'ids')
+        
+        if error:
+            return jsonify({'message': error}), 400
+        
+        reminders = _owned_reminders(current_user_id, ids)
+        
+        results = []
+        for index, reminder_id in enumerate(ids):
+            reminder = reminders.pop(reminder_id, None) if isinstance(reminder_id, int) else None
+            if not reminder:
+                results.append(error_result(index, ('Reminder not found', 404)))
+                continue
+            
+            db.session.delete(reminder)
+            results.append(item_result(index, 200, id=reminder_id))
+        
+        db.session.commit()
+        
+        return batch_response(results, 200)
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Failed to delete reminders', 'error': str(e)}), 500
+
+def _set_completed_batch(completed):
+    current_user_id = get_jwt_identity()
+    ids, error = batch_items(request.get_json(), 'ids')
+    
+    if error:
+        return jsonify({'message': error}), 400
+    
+    reminders = _owned_reminders(current_user_id, ids)
+    
+    # Completing reviews spaced repetition cards with the default grade
+    cards = [reminder for reminder in reminders.values() if reminder.reminder_type == ReminderType.spaced_repetition]
+    states = spaced_repetition.states_for(cards) if completed else {}
+    now = datetime.utcnow()
+    
+    results = []
+    changed = []
+    for index, reminder_id in enumerate(ids):
+        reminder = reminders.get(reminder_id) if isinstance(reminder_id, int) else None
+        if not reminder:
+            results.append(error_result(index, ('Reminder not found', 404)))
+            continue
+        
+        if completed and reminder.reminder_type == ReminderType.spaced_repetition:
+            states[reminder.id] = spaced_repetition.review(reminder, DEFAULT_GRADE, now, states.get(reminder.id))
+        elif completed:
+            reminder.mark_completed(commit=False)
+        else:
+            reminder.mark_uncompleted(commit=False)
+        results.append(None)
+        changed.append((index, reminder))
+    
+    db.session.flush()
+    for index, reminder in changed:
+        results[index] = item_result(index, 200, reminder=reminder.to_dict())
+    db.session.commit()
+    
+    return batch_response(results, 200)
+
+@reminders_bp.route('/batch/complete', methods=['POST'])
+@jwt_required()
+def complete_reminders_batch():
+    try:
+        return _set_completed_batch(True)
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Failed to complete reminders', 'error': str(e)}), 500
+
+@reminders_bp.route('/batch/uncomplete', methods=['POST'])
+@jwt_required()
+def uncomplete_reminders_batch():
+    try:
+        return _set_completed_batch(False)
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Failed to uncomplete reminders', 'error': str(e)}), 500
+
 @reminders_bp.route('/upcoming', methods=['GET'])
 @jwt_required()
+@conditional(time_bucket=60)
 def get_upcoming_reminders():
     try:
         current_user_id = get_jwt_identity()
         days_ahead = request.args.get('days', 7, type=int)
         
-        end_date = datetime.utcnow() + timedelta(days=days_ahead)
+        now = datetime.utcnow()
+        end_date = now + timedelta(days=days_ahead)
         
-        reminders = Reminder.query.filter(
+        reminders = db.session.query(*SERIALIZED_COLUMNS).filter(
             Reminder.user_id == current_user_id,
             Reminder.is_completed == False,
             Reminder.trigger_date <= end_date,
-            Reminder.trigger_date >= datetime.utcnow()
+            Reminder.trigger_date >= now
         ).order_by(asc(Reminder.trigger_date)).all()
         
         return jsonify({
-            'reminders': [reminder.to_dict() for reminder in reminders],
+            'reminders': [serialize_reminder(row, now) for row in reminders],
             'count': len(reminders)
         }), 200
         
@@ -289,20 +578,54 @@ def get_upcoming_reminders():
 
 @reminders_bp.route('/overdue', methods=['GET'])
 @jwt_required()
+@conditional(time_bucket=60)
 def get_overdue_reminders():
     try:
         current_user_id = get_jwt_identity()
         
-        reminders = Reminder.query.filter(
+        now = datetime.utcnow()
+        
+        reminders = db.session.query(*SERIALIZED_COLUMNS).filter(
             Reminder.user_id == current_user_id,
             Reminder.is_completed == False,
-            Reminder.trigger_date < datetime.utcnow()
+            Reminder.trigger_date < now
         ).order_by(asc(Reminder.trigger_date)).all()
         
         return jsonify({
-            'reminders': [reminder.to_dict() for reminder in reminders],
+            'reminders': [serialize_reminder(row, now) for row in reminders],
             'count': len(reminders)
         }), 200
         
     except Exception as e:
-        return jsonify({'message': 'Failed to retrieve overdue reminders', 'error': str(e)}), 500 
\ No newline at end of file
+        return jsonify({'message': 'Failed to retrieve overdue reminders', 'error': str(e)}), 500 
+
+@reminders_bp.route('/review-queue', methods=['GET'])
+@jwt_required()
+@conditional(time_bucket=60)
+def get_review_queue():
+    try:
+        current_user_id = get_jwt_identity()
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        
+        now = datetime.utcnow()
+        
+        # Due cards in due order from the pending trigger_date index, new cards have no date
+        rows = db.session.query(*SERIALIZED_COLUMNS, ReviewState.interval_days).outerjoin(
+            ReviewState, ReviewState.reminder_id == Reminder.id
+        ).filter(
+            Reminder.user_id == current_user_id,
+            Reminder.reminder_type == ReminderType.spaced_repetition,
+            Reminder.is_completed == False,
+            or_(Reminder.trigger_date <= now, Reminder.trigger_date.is_(None))
+        ).order_by(asc(Reminder.trigger_date).nullsfirst()).limit(REVIEW_QUEUE_SCAN).all()
+        
+        # Most overdue relative to the card's interval first
+        ranked = sorted(rows, key=lambda row: spaced_repetition.priority(row.trigger_date, row.interval_days, now), reverse=True)
+        
+        return jsonify({
+            'reminders': [serialize_reminder(row, now) for row in ranked[:limit]],
+            'due_count': len(rows)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'message': 'Failed to retrieve review queue', 'error': str(e)}), 500
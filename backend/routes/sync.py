@@ -0,0 +1,161 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models.memory import Memory, serialized_columns, serialize_memory
+from models.reminder import Reminder, SERIALIZED_COLUMNS as REMINDER_COLUMNS, serialize_reminder
+from models.change_log import ChangeLogEntry
+from services.counters import get_version
+from services.pagination import seek_page, InvalidCursor
+from database import db
+from sqlalchemy import func
+from datetime import datetime
+import re
+
+sync_bp = Blueprint('sync', __name__)
+
+# entity type -> (model, payload key, selected columns, row serializer)
+ENTITY_MODELS = {
+    'memory': (Memory, 'memories', serialized_columns(), lambda row, now: serialize_memory(row)),
+    'reminder': (Reminder, 'reminders', REMINDER_COLUMNS, serialize_reminder)
+}
+
+# Snapshot pages follow the listings' orders, so they read the same indexes:
+# entity type -> (key, descending, nullable), see services/pagination.py
+SNAPSHOT_ORDER = {
+    'memory': (Memory.created_at, True, False),
+    'reminder': (Reminder.trigger_date, False, True)
+}
+
+# A snapshot page token: the version read when the snapshot started, then the
+# entity type and the keyset cursor the next page continues after
+SNAPSHOT_TOKEN = re.compile(r'^s(\d+)-(memory|reminder)-([\w-]*)$')
+
+def _serialized_rows(entity_type, user_id, ids=None):
+    """Serialize the user's rows of one entity type straight from selected columns"""
+    model, _, columns, serialize = ENTITY_MODELS[entity_type]
+    query = db.session.query(*columns).filter(model.user_id == user_id)
+    if ids is not None:
+        query = query.filter(model.id.in_(ids))
+
+    now = datetime.utcnow()
+    return [serialize(row, now) for row in query]
+
+def _snapshot(user_id, limit, cursor=None):
+    """One page of every row, memories then reminders
+
+    The version is read before the first page and carried in the page
+    tokens, so the final token makes the client replay every change that
+    raced any page of the snapshot, including rows that moved past a cursor.
+    """
+    if cursor is None:
+        version, entity_type, position = get_version(user_id), 'memory', ''
+    else:
+        version, entity_type, position = cursor
+
+    payload = {
+        'memories': [],
+        'reminders': [],
+        'deleted': {'memories': [], 'reminders': []},
+        'token': str(version),
+        'has_more': False
+    }
+
+    now = datetime.utcnow()
+    remaining = limit
+    entity_types = list(ENTITY_MODELS)
+    for entity_type in entity_types[entity_types.index(entity_type):]:
+        model, key, columns, serialize = ENTITY_MODELS[entity_type]
+        order_key, descending, nullable = SNAPSHOT_ORDER[entity_type]
+        query = db.session.query(*columns).filter(model.user_id == user_id)
+
+        if not remaining:
+            if query.first() is not None:
+                payload['token'] = f's{version}-{entity_type}-'
+                payload['has_more'] = True
+                return payload
+            continue
+
+        rows, pagination = seek_page(query, order_key, model.id, position or None, remaining,
+                                     descending=descending, nullable=nullable)
+        payload[key] = [serialize(row, now) for row in rows]
+        remaining -= len(rows)
+        if pagination['has_next']:
+            payload['token'] = f"s{version}-{entity_type}-{pagination['next_cursor']}"
+            payload['has_more'] = True
+            return payload
+        position = ''
+
+    return payload
+
+def _changes_since(user_id, since, limit):
+    base = ChangeLogEntry.query.filter(
+        ChangeLogEntry.user_id == user_id,
+        ChangeLogEntry.version > since
+    )
+
+    # Stop at a version boundary so a token never splits one transaction
+    last_versions = db.session.query(ChangeLogEntry.version)\
+        .filter(ChangeLogEntry.user_id == user_id, ChangeLogEntry.version > since)\
+        .order_by(ChangeLogEntry.version, ChangeLogEntry.id)\
+        .limit(limit)\
+        .subquery()
+    upto = db.session.query(func.max(last_versions.c.version)).scalar()
+
+    if upto is None:
+        return {
+            'memories': [],
+            'reminders': [],
+            'deleted': {'memories': [], 'reminders': []},
+            'token': str(since),
+            'has_more': False
+        }
+
+    # Later entries win, so each entity is reported once in its latest state
+    latest = {}
+    for entry in base.filter(ChangeLogEntry.version <= upto).order_by(ChangeLogEntry.version, ChangeLogEntry.id):
+        latest[(entry.entity_type, entry.entity_id)] = entry.operation
+
+    payload = {
+        'deleted': {'memories': [], 'reminders': []},
+        'token': str(upto),
+        'has_more': base.filter(ChangeLogEntry.version > upto).first() is not None
+    }
+
+    for entity_type, (_, key, _, _) in ENTITY_MODELS.items():
+        upserted = [entity_id for (kind, entity_id), operation in latest.items()
+                    if kind == entity_type and operation == 'upsert']
+        deleted = [entity_id for (kind, entity_id), operation in latest.items()
+                   if kind == entity_type and operation == 'delete']
+
+        payload[key] = _serialized_rows(entity_type, user_id, upserted) if upserted else []
+
+        # Rows deleted after this window still need a tombstone
+        found = {row['id'] for row in payload[key]}
+        payload['deleted'][key] = deleted + [entity_id for entity_id in upserted if entity_id not in found]
+
+    return payload
+
+@sync_bp.route('', methods=['GET'])
+@jwt_required()
+def sync():
+    try:
+        current_user_id = get_jwt_identity()
+        since = request.args.get('since')
+        limit = min(max(request.args.get('limit', 500, type=int), 1), 5000)
+
+        if not since:
+            return jsonify(_snapshot(current_user_id, limit)), 200
+
+        snapshot_token = SNAPSHOT_TOKEN.match(since)
+        if snapshot_token:
+            version, entity_type, position = snapshot_token.groups()
+            return jsonify(_snapshot(current_user_id, limit, (int(version), entity_type, position))), 200
+
+        if not since.isdigit():
+            return jsonify({'message': 'Invalid sync token'}), 400
+
+        return jsonify(_changes_since(current_user_id, int(since), limit)), 200
+
+    except InvalidCursor:
+        return jsonify({'message': 'Invalid sync token'}), 400
+    except Exception as e:
+        return jsonify({'message': 'Failed to sync', 'error': str(e)}), 500
@@ -1,10 +1,18 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models.user import User, SubscriptionType
-from models.memory import Memory
-from models.reminder import Reminder
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity, current_user
+from models.user import User, SubscriptionType, serialize_user
+from models.memory import serialize_memory
+from models.reminder import serialize_reminder
 from database import db
-from datetime import datetime, timedelta
+from services.cache import response_cache
+from services.etag import conditional, conditional_response, resource_etag
+from services.counters import get_counters, MEMORIES, REMINDERS
+from services.vault import export_ndjson, import_ndjson, ImportInterrupted
+from services.passwords import HasherBusy
+from services.dashboard import dashboard_queries
+from services.user_cache import user_cache
+from datetime import datetime
+import gzip
 
 users_bp = Blueprint('users', __name__)
 
@@ -12,13 +20,10 @@ users_bp = Blueprint('users', __name__)
 @jwt_required()
 def get_profile():
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user:
-            return jsonify({'message': 'User not found'}), 404
+        user = current_user  # cached snapshot, see services/user_cache.py
         
-        return jsonify({'user': user.to_dict()}), 200
+        etag = resource_etag('user', user.id, user.updated_at)
+        return conditional_response(etag, user.updated_at, lambda: (jsonify({'user': serialize_user(user)}), 200))
         
     except Exception as e:
         return jsonify({'message': 'Failed to retrieve profile', 'error': str(e)}), 500
@@ -98,23 +103,27 @@ def change_password():
         
         return jsonify({'message': 'Password changed successfully'}), 200
         
+    except HasherBusy:
+        return jsonify({'message': 'Server is busy, please retry shortly'}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Failed to change password', 'error': str(e)}), 500
 
 @users_bp.route('/subscription', methods=['GET'])
 @jwt_required()
+@conditional()
+@response_cache.cached
 def get_subscription():
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user:
-            return jsonify({'message': 'User not found'}), 404
+        # Not current_user: that snapshot may predate the change version this
+        # response is cached and ETagged under (see services/user_cache.py)
+        user = user_cache.get(current_user_id, fresh=True)
         
         # Get usage stats
-        memory_count = Memory.query.filter_by(user_id=current_user_id).count()
-        reminder_count = Reminder.query.filter_by(user_id=current_user_id).count()
+        counters = get_counters(current_user_id)
+        memory_count = counters[MEMORIES]
+        reminder_count = counters[REMINDERS]
         
         # Calculate limits based on subscription
         memory_limit = None if user.subscription_type == SubscriptionType.premium else 100
@@ -177,7 +186,7 @@ def downgrade_subscription():
             return jsonify({'message': 'User already has free subscription'}), 400
         
         # Check if user has more than 100 memories
-        memory_count = Memory.query.filter_by(user_id=current_user_id).count()
+        memory_count = get_counters(current_user_id)[MEMORIES]
         if memory_count > 100:
             return jsonify({
                 'message': f'Cannot downgrade: You have {memory_count} memories. Please delete some to get under the 100 memory limit for free accounts.'
@@ -197,52 +206,30 @@ def downgrade_subscription():
 
 @users_bp.route('/dashboard', methods=['GET'])
 @jwt_required()
+@conditional(time_bucket=60)
+@response_cache.cached
 def get_dashboard():
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user:
-            return jsonify({'message': 'User not found'}), 404
+        user = user_cache.get(current_user_id, fresh=True)  # as in get_subscription
         
-        # Get stats
-        memory_count = Memory.query.filter_by(user_id=current_user_id).count()
-        reminder_count = Reminder.query.filter_by(user_id=current_user_id).count()
-        
-        # Get recent memories
-        recent_memories = Memory.query.filter_by(user_id=current_user_id)\
-            .order_by(Memory.created_at.desc())\
-            .limit(5)\
-            .all()
-        
-        # Get upcoming reminders
-        upcoming_reminders = Reminder.query.filter(
-            Reminder.user_id == current_user_id,
-            Reminder.is_completed == False,
-            Reminder.trigger_date >= datetime.utcnow(),
-            Reminder.trigger_date <= datetime.utcnow() + timedelta(days=7)
-        ).order_by(Reminder.trigger_date.asc())\
-         .limit(5)\
-         .all()
-        
-        # Get overdue reminders
-        overdue_reminders = Reminder.query.filter(
-            Reminder.user_id == current_user_id,
-            Reminder.is_completed == False,
-            Reminder.trigger_date < datetime.utcnow()
-        ).count()
+        # Counters, recent memories and reminders in one round trip, see services/dashboard.py
+        now = datetime.utcnow()
+        data = dashboard_queries.load(current_user_id, now)
         
-        return jsonify({
-            'user': user.to_dict(),
+        response = jsonify({
+            'user': serialize_user(user),
             'stats': {
-                'memory_count': memory_count,
-                'reminder_count': reminder_count,
-                'overdue_reminders': overdue_reminders,
+                'memory_count': data.counters[MEMORIES],
+                'reminder_count': data.counters[REMINDERS],
+                'overdue_reminders': data.overdue_reminders,
                 'memory_limit': None if user.subscription_type == SubscriptionType.premium else 100
             },
-            'recent_memories': [memory.to_dict(include_content=False) for memory in recent_memories],
-            'upcoming_reminders': [reminder.to_dict() for reminder in upcoming_reminders]
-        }), 200
+            'recent_memories': [serialize_memory(row, include_content=False) for row in data.recent_memories],
+            'upcoming_reminders': [serialize_reminder(row, now) for row in data.upcoming_reminders]
+        })
+        response.headers.add('Server-Timing', dashboard_queries.server_timing(data.timings))
+        return response, 200
         
     except Exception as e:
         return jsonify({'message': 'Failed to retrieve dashboard', 'error': str(e)}), 500
@@ -264,4 +251,59 @@ def deactivate_account():
         
     except Exception as e:
         db.session.rollback()
-        return jsonify({'message': 'Failed to deactivate account', 'error': str(e)}), 500 
\ No newline at end of file
+        return jsonify({'message': 'Failed to deactivate account', 'error': str(e)}), 500
+
+@users_bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_vault():
+    try:
+        current_user_id = get_jwt_identity()
+        compress = request.args.get('gzip', 'false') == 'true'
+        filename = 'memoryos-export.ndjson.gz' if compress else 'memoryos-export.ndjson'
+        
+        # Rows are read and encoded while the response is sent, never all at once
+        chunks = export_ndjson(current_user_id, current_app.config['EXPORT_BATCH_SIZE'], compress=compress)
+        
+        return Response(
+            stream_with_context(chunks),
+            status=200,
+            mimetype='application/gzip' if compress else 'application/x-ndjson',
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+        
+    except Exception as e:
+        return jsonify({'message': 'Failed to export data', 'error': str(e)}), 500
+
+@users_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_vault():
+    try:
+        current_user_id = get_jwt_identity()
+        user = current_user
+        
+        # Free users can import up to their remaining memory allowance
+        memory_quota = None
+        if user.subscription_type == SubscriptionType.free:
+            memory_quota = max(100 - get_counters(current_user_id)[MEMORIES], 0)
+        
+        # Read the body as it arrives instead of buffering the whole upload
+        stream = request.stream
+        if request.content_encoding == 'gzip' or request.mimetype == 'application/gzip':
+            stream = gzip.GzipFile(fileobj=stream)
+        
+        summary = import_ndjson(
+            stream, current_user_id,
+            batch_size=current_app.config['IMPORT_BATCH_SIZE'],
+            memory_quota=memory_quota
+        )
+        
+        return jsonify({'message': 'Import completed', **summary}), 200
+        
+    except ImportInterrupted as e:
+        # Batches before the failure stay imported, the summary says which
+        if isinstance(e.__cause__, (OSError, EOFError)):
+            return jsonify({'message': 'Invalid gzip data', 'error': str(e), **e.summary}), 400
+        return jsonify({'message': 'Import stopped, lines up to committed_through_line were imported', 'error': str(e), **e.summary}), 500
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Failed to import data', 'error': str(e)}), 500
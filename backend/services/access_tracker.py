@@ -0,0 +1,88 @@
+from database import db
+from models.memory import Memory
+from sqlalchemy import bindparam
+from datetime import datetime
+import atexit
+import threading
+import time
+
+class AccessTracker:
+    """Buffers memory reads in process and writes last_accessed in bulk"""
+
+    def __init__(self):
+        self.app = None
+        self.flush_interval = 60
+        self.max_pending = 1000
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._flusher = None
+
+    def init_app(self, app):
+        self.app = app
+        self.flush_interval = app.config['ACCESS_TRACKING_FLUSH_INTERVAL']
+        self.max_pending = app.config['ACCESS_TRACKING_MAX_PENDING']
+
+        # Don't lose buffered reads when the worker shuts down
+        atexit.register(self.flush)
+
+    def record(self, memory_id, accessed_at=None):
+        """Buffer a read of memory_id, returns the recorded timestamp"""
+        accessed_at = accessed_at or datetime.utcnow()
+
+        with self._lock:
+            self._pending[memory_id] = accessed_at
+            full = len(self._pending) >= self.max_pending
+            self._start_flusher()
+
+        if full:
+            self.flush()
+
+        return accessed_at
+
+    def flush(self):
+        """Write every buffered timestamp with one bulk UPDATE, returns the row count"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+
+        if not pending:
+            return 0
+
+        # Setting updated_at to itself keeps the onupdate default from firing,
+        # a read is not a modification
+        table = Memory.__table__
+        statement = table.update()\
+            .where(table.c.id == bindparam('_id'))\
+            .values(last_accessed=bindparam('_accessed_at'), updated_at=table.c.updated_at)
+
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as connection:
+                    connection.execute(statement, [
+                        {'_id': memory_id, '_accessed_at': accessed_at}
+                        for memory_id, accessed_at in pending.items()
+                    ])
+        except Exception:
+            # Put the reads back (keeping newer ones) so the next flush retries them
+            with self._lock:
+                for memory_id, accessed_at in pending.items():
+                    self._pending.setdefault(memory_id, accessed_at)
+            self.app.logger.exception('Failed to flush %d memory access timestamps', len(pending))
+            return 0
+
+        return len(pending)
+
+    def _start_flusher(self):
+        # Started on first use so CLI commands and imports don't spawn threads
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._run_flusher, name='access-tracker', daemon=True)
+            self._flusher.start()
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(max(self.flush_interval - (time.monotonic() - self._last_flush), 1))
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+access_tracker = AccessTracker()
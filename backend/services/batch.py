@@ -0,0 +1,49 @@
+from flask import current_app, jsonify
+
+def batch_items(data, key):
+    """Pull the item list out of a batch payload, returns (items, error message)"""
+    if not data:
+        return None, 'No data provided'
+
+    items = data.get(key)
+    if not isinstance(items, list) or not items:
+        return None, f'{key} must be a non-empty list'
+
+    max_items = current_app.config['BATCH_MAX_ITEMS']
+    if len(items) > max_items:
+        return None, f'Batch size exceeds the limit of {max_items} items'
+
+    return items, None
+
+def string_fields_error(data, fields, nullable=()):
+    """A (message, 400) error for the first field present in data that isn't a string, or None"""
+    for name in fields:
+        value = data.get(name)
+        if name in data and not isinstance(value, str) and not (value is None and name in nullable):
+            return (f'{name} must be a string', 400)
+    return None
+
+# Errors a malformed item can raise while it is parsed or applied, reported for
+# that item instead of failing the batch
+ITEM_ERRORS = (ValueError, TypeError, AttributeError, OverflowError)
+
+def invalid_item(error):
+    return (f'Invalid item: {error}', 400)
+
+def item_result(index, status, **fields):
+    return {'index': index, 'status': status, **fields}
+
+def error_result(index, error):
+    message, status = error
+    return item_result(index, status, message=message)
+
+def batch_response(results, success_status):
+    """Per-item results, 207 Multi-Status as soon as any item failed"""
+    succeeded = sum(1 for result in results if result['status'] < 400)
+    failed = len(results) - succeeded
+
+    return jsonify({
+        'results': results,
+        'succeeded': succeeded,
+        'failed': failed
+    }), success_status if failed == 0 else 207
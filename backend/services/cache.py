@@ -0,0 +1,127 @@
+from flask import request, make_response, Response, g
+from flask_jwt_extended import get_jwt_identity
+from services.counters import get_version
+from collections import OrderedDict, Counter
+from functools import wraps
+import threading
+import time
+
+class LRUCache:
+    """In-process LRU store with a TTL per entry"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+class RedisCache:
+    """Store backed by any Redis-compatible client (redis-py, fakeredis, ...)"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl):
+        self.client.set(key, value, ex=ttl)
+
+class ResponseCache:
+    """Per-user cache of JSON responses keyed on the user's change version
+
+    The change version lives in the database and every committed write
+    bumps it, so a write made by any worker moves readers to a new key.
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.ttl = 30
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def init_app(self, app):
+        self.ttl = app.config['CACHE_TTL']
+        backend = app.config['CACHE_BACKEND']
+
+        if backend == 'memory':
+            self.backend = LRUCache(app.config['CACHE_MAX_ENTRIES'])
+        elif backend == 'redis':
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError('CACHE_BACKEND=redis requires the redis package')
+            self.backend = RedisCache(redis.Redis.from_url(app.config['CACHE_REDIS_URL']))
+        elif backend == 'none':
+            self.backend = None
+        else:
+            raise ValueError(f'Unknown CACHE_BACKEND: {backend}')
+
+    def cached(self, view):
+        """Cache a view's 200 responses per user, endpoint and query args (use under jwt_required)
+
+        Under conditional() the key is the ETag it computed, so the cached
+        body always matches the ETag the client is given.
+        """
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self.backend:
+                return view(*args, **kwargs)
+
+            user_id = get_jwt_identity()
+            if 'etag' in g:
+                key = f'cache:{user_id}:{g.etag}'
+            else:
+                query = '&'.join(f'{name}={value}' for name, value in sorted(request.args.items(multi=True)))
+                version = get_version(user_id)
+                key = f'cache:{user_id}:{version}:{request.endpoint}:{request.view_args}:{query}'
+
+            body = self.backend.get(key)
+            if body is not None:
+                self.hits[request.endpoint] += 1
+                return Response(body, status=200, mimetype='application/json')
+
+            self.misses[request.endpoint] += 1
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                self.backend.set(key, response.get_data(), self.ttl)
+            return response
+
+        return wrapper
+
+    def stats(self):
+        hits, misses = sum(self.hits.values()), sum(self.misses.values())
+        return {
+            'backend': type(self.backend).__name__ if self.backend else None,
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / (hits + misses) if hits + misses else None,
+            'endpoints': {
+                endpoint: {'hits': self.hits[endpoint], 'misses': self.misses[endpoint]}
+                for endpoint in sorted(set(self.hits) | set(self.misses))
+            }
+        }
+
+response_cache = ResponseCache()
@@ -0,0 +1,57 @@
+from models.memory import Memory
+from models.reminder import Reminder
+from models.user import User
+from models.change_log import ChangeLogEntry
+from services.counters import bump_version
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from datetime import datetime
+
+ENTITY_TYPES = {
+    Memory: 'memory',
+    Reminder: 'reminder'
+}
+
+# Every flush bumps the touched users' versions and logs its memory and
+# reminder changes on the flush connection, in the same transaction
+@event.listens_for(Session, 'after_flush')
+def _log_changes(session, flush_context):
+    users = set()
+    changes = []
+
+    for objects, operation in ((session.new, 'upsert'), (session.dirty, 'upsert'), (session.deleted, 'delete')):
+        for obj in objects:
+            if isinstance(obj, User):
+                users.add(obj.id)
+            elif type(obj) in ENTITY_TYPES:
+                if operation == 'upsert' and obj in session.dirty and not session.is_modified(obj):
+                    continue
+                users.add(obj.user_id)
+                changes.append((obj.user_id, ENTITY_TYPES[type(obj)], obj.id, operation))
+
+    if not users:
+        return
+
+    log_changes(session.connection(), users, changes)
+
+def log_changes(connection, users, changes):
+    """Bump the users' versions and log (user_id, entity_type, entity_id, operation) changes
+
+    For writes that bypass the session, like bulk Core updates.
+    """
+    # Sorted so concurrent flushes lock version rows in the same order
+    versions = {user_id: bump_version(connection, user_id) for user_id in sorted(users)}
+
+    if changes:
+        now = datetime.utcnow()
+        connection.execute(ChangeLogEntry.__table__.insert(), [
+            {
+                'user_id': user_id,
+                'version': versions[user_id],
+                'entity_type': entity_type,
+                'entity_id': entity_id,
+                'operation': operation,
+                'created_at': now
+            }
+            for user_id, entity_type, entity_id, operation in changes
+        ])
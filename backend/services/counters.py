@@ -0,0 +1,224 @@
+from database import db
+from models.memory import Memory, MemoryType
+from models.reminder import Reminder
+from models.user_counter import UserCounter
+from models.change_log import ChangeLogEntry
+from sqlalchemy import event, inspect, func, bindparam, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from collections import Counter
+
+MEMORIES = 'memories'
+REMINDERS = 'reminders'
+CHANGES = 'changes'  # per-user data version, see bump_version
+
+def memory_type_counter(memory_type):
+    return f'{MEMORIES}.{memory_type.value}'
+
+def _count_from_source(user_id):
+    counts = initial_counters()
+
+    type_rows = db.session.query(Memory.memory_type, func.count(Memory.id))\
+        .filter(Memory.user_id == user_id)\
+        .group_by(Memory.memory_type)\
+        .all()
+    for memory_type, count in type_rows:
+        counts[MEMORIES] += count
+        if memory_type is not None:
+            counts[memory_type_counter(memory_type)] = count
+
+    counts[REMINDERS] = db.session.query(func.count(Reminder.id))\
+        .filter(Reminder.user_id == user_id)\
+        .scalar()
+
+    return counts
+
+def initial_counters():
+    """Counters of a user without memories or reminders"""
+    counts = {MEMORIES: 0, REMINDERS: 0}
+    for memory_type in MemoryType:
+        counts[memory_type_counter(memory_type)] = 0
+    return counts
+
+def _upsert_counters(connection, user_id, counts):
+    """Set the user's counters to counts, creating missing rows"""
+    table = UserCounter.__table__
+    rows = [{'user_id': user_id, 'name': name, 'value': value} for name, value in counts.items()]
+
+    if connection.dialect.name in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if connection.dialect.name == 'postgresql' else sqlite.insert
+        statement = insert(table)
+        connection.execute(
+            statement.on_conflict_do_update(
+                index_elements=[table.c.user_id, table.c.name],
+                set_={'value': statement.excluded.value}
+            ),
+            rows
+        )
+        return
+
+    existing = {name for (name,) in connection.execute(select(table.c.name).where(table.c.user_id == user_id))}
+    for row in rows:
+        if row['name'] in existing:
+            connection.execute(
+                table.update().where(table.c.user_id == user_id, table.c.name == row['name']).values(value=row['value'])
+            )
+        else:
+            connection.execute(table.insert().values(**row))
+
+def _create_version(connection, user_id, value=0):
+    """Give a user without a change version one at value, an existing version is kept"""
+    table = UserCounter.__table__
+    row = {'user_id': user_id, 'name': CHANGES, 'value': value}
+
+    if connection.dialect.name in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if connection.dialect.name == 'postgresql' else sqlite.insert
+        connection.execute(insert(table).values(**row).on_conflict_do_nothing(index_elements=[table.c.user_id, table.c.name]))
+        return
+
+    where = (table.c.user_id == user_id, table.c.name == CHANGES)
+    if not connection.execute(select(table.c.value).where(*where)).first():
+        connection.execute(table.insert().values(**row))
+
+def reconcile_counters(user_id):
+    """Recompute a user's counters from the source tables, returns the fixed values
+
+    The user's counter rows are locked before counting, so a concurrent
+    write either commits first and is counted, or waits and applies its
+    delta on top. Rows are upserted, never deleted, so two first reads
+    racing to build the counters both succeed.
+    """
+    db.session.query(UserCounter.name).filter_by(user_id=user_id).with_for_update().all()
+
+    counts = _count_from_source(user_id)
+    connection = db.session.connection()
+    _upsert_counters(connection, user_id, counts)
+    # A lost version restarts after the last logged change, so ETags and sync
+    # tokens handed out before never match newer data
+    last_logged = db.session.query(func.max(ChangeLogEntry.version)).filter_by(user_id=user_id).scalar()
+    _create_version(connection, user_id, last_logged or 0)
+
+    # The change version can't be derived from the data, and must never go back
+    counts[CHANGES] = db.session.query(UserCounter.value)\
+        .filter_by(user_id=user_id, name=CHANGES)\
+        .scalar()
+    db.session.commit()
+
+    return counts
+
+def reconcile_all_counters():
+    """Reconcile every user, returns the number of users whose counters drifted"""
+    from models.user import User
+
+    drifted = 0
+    for (user_id,) in db.session.query(User.id).all():
+        stored = get_counters(user_id, reconcile_missing=False)
+        if stored != reconcile_counters(user_id):
+            drifted += 1
+
+    return drifted
+
+def get_counters(user_id, reconcile_missing=True):
+    """Return a user's counters, building them on first use"""
+    rows = db.session.query(UserCounter.name, UserCounter.value)\
+        .filter(UserCounter.user_id == user_id)\
+        .all()
+
+    counters = dict(rows)
+    if (MEMORIES not in counters or CHANGES not in counters) and reconcile_missing:
+        return reconcile_counters(user_id)
+
+    return counters
+
+def get_version(user_id):
+    """The user's change version, for ETags and cache keys (created at 0 when missing)"""
+    return get_counters(user_id)[CHANGES]
+
+def bump_version(connection, user_id):
+    """Increment the user's change version on this connection, returns the new value
+
+    The row stays locked until the transaction ends, so a user's versions
+    commit in increasing order.
+    """
+    table = UserCounter.__table__
+
+    if connection.dialect.name in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if connection.dialect.name == 'postgresql' else sqlite.insert
+        statement = insert(table).values(user_id=user_id, name=CHANGES, value=1)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.name],
+            set_={'value': table.c.value + 1}
+        ).returning(table.c.value)
+        return connection.execute(statement).scalar_one()
+
+    where = (table.c.user_id == user_id, table.c.name == CHANGES)
+    if not connection.execute(table.update().where(*where).values(value=table.c.value + 1)).rowcount:
+        connection.execute(table.insert().values(user_id=user_id, name=CHANGES, value=1))
+    return connection.execute(select(table.c.value).where(*where)).scalar_one()
+
+def _memory_counters(memory, memory_type):
+    names = [MEMORIES]
+    if memory_type is not None:
+        names.append(memory_type_counter(memory_type))
+    return names
+
+# Deltas are summed per flush and written on the flush connection, so counters
+# commit together with the writes and a batch costs one UPDATE per counter
+@event.listens_for(Session, 'after_flush')
+def _apply_counter_deltas(session, flush_context):
+    from models.user import User
+
+    # New users start with zeroed rows in the same transaction, so counters
+    # are never built by a (racing) first read
+    new_users = [obj.id for obj in session.new if isinstance(obj, User)]
+    if new_users:
+        session.connection().execute(UserCounter.__table__.insert(), [
+            {'user_id': user_id, 'name': name, 'value': value}
+            for user_id in new_users for name, value in initial_counters().items()
+        ])
+        # The changelog hook may have bumped the version of this flush already
+        for user_id in new_users:
+            _create_version(session.connection(), user_id)
+
+    deltas = Counter()
+
+    for obj in session.new:
+        if isinstance(obj, Memory):
+            for name in _memory_counters(obj, obj.memory_type):
+                deltas[(obj.user_id, name)] += 1
+        elif isinstance(obj, Reminder):
+            deltas[(obj.user_id, REMINDERS)] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, Memory):
+            for name in _memory_counters(obj, obj.memory_type):
+                deltas[(obj.user_id, name)] -= 1
+        elif isinstance(obj, Reminder):
+            deltas[(obj.user_id, REMINDERS)] -= 1
+
+    for obj in session.dirty:
+        if not isinstance(obj, Memory):
+            continue
+        history = inspect(obj).attrs.memory_type.history
+        for memory_type in history.deleted:
+            if memory_type is not None:
+                deltas[(obj.user_id, memory_type_counter(memory_type))] -= 1
+        for memory_type in history.added:
+            if memory_type is not None:
+                deltas[(obj.user_id, memory_type_counter(memory_type))] += 1
+
+    params = [
+        {'_user_id': user_id, '_name': name, '_delta': delta}
+        for (user_id, name), delta in deltas.items() if delta
+    ]
+    if not params:
+        return
+
+    # Only existing rows are bumped, users without counters are built on first read
+    table = UserCounter.__table__
+    session.connection().execute(
+        table.update()
+        .where(table.c.user_id == bindparam('_user_id'), table.c.name == bindparam('_name'))
+        .values(value=table.c.value + bindparam('_delta')),
+        params
+    )
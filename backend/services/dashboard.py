@@ -0,0 +1,177 @@
+from database import db
+from models.memory import Memory, serialized_columns
+from models.reminder import Reminder, SERIALIZED_COLUMNS as REMINDER_COLUMNS
+from models.user_counter import UserCounter
+from services.counters import reconcile_counters, MEMORIES
+from sqlalchemy import select, func, literal_column, null, cast, union_all, bindparam
+from sqlalchemy.exc import CompileError, ProgrammingError, NotSupportedError
+from concurrent.futures import ThreadPoolExecutor
+from collections import namedtuple
+from datetime import timedelta
+import time
+
+RECENT_MEMORIES = 5
+UPCOMING_REMINDERS = 5
+UPCOMING_DAYS = 7
+
+MODES = ('combined', 'concurrent', 'sequential')
+
+def _statements():
+    """The dashboard queries, for the user_id, now and upcoming_until parameters"""
+    user_id, now = bindparam('user_id'), bindparam('now')
+    return {
+        'counters': select(UserCounter.name, UserCounter.value)
+            .where(UserCounter.user_id == user_id),
+        'recent_memories': select(*serialized_columns(include_content=False))
+            .where(Memory.user_id == user_id)
+            .order_by(Memory.created_at.desc())
+            .limit(RECENT_MEMORIES),
+        'upcoming_reminders': select(*REMINDER_COLUMNS)
+            .where(
+                Reminder.user_id == user_id,
+                Reminder.is_completed == False,
+                Reminder.trigger_date >= now,
+                Reminder.trigger_date <= bindparam('upcoming_until')
+            )
+            .order_by(Reminder.trigger_date.asc())
+            .limit(UPCOMING_REMINDERS),
+        'overdue_reminders': select(func.count(Reminder.id).label('count'))
+            .where(
+                Reminder.user_id == user_id,
+                Reminder.is_completed == False,
+                Reminder.trigger_date < now
+            )
+    }
+
+def _combined_statement(statements):
+    """One UNION ALL over every query, each row tagged with the query it came from
+
+    Every member selects the same columns: its own, and NULLs cast to the
+    other members' column types (Postgres types UNION columns pair by pair),
+    so dates and enums are processed as in the separate queries. Returns the
+    statement and, per query, a row type with the positions of its columns.
+    """
+    subqueries = {name: statement.subquery(name) for name, statement in statements.items()}
+    layout = [column for subquery in subqueries.values() for column in subquery.c]
+
+    members = [
+        select(literal_column(f"'{name}'").label('part'), *[
+            column.label(None) if column.table is subquery else cast(null(), column.type)
+            for column in layout
+        ]).select_from(subquery)
+        for name, subquery in subqueries.items()
+    ]
+
+    row_types = {}
+    position = 1  # after the part column
+    for name, subquery in subqueries.items():
+        Row = namedtuple(f'{name}_row', [column.key for column in subquery.c])
+        row_types[name] = (Row, range(position, position + len(subquery.c)))
+        position += len(subquery.c)
+
+    return union_all(*members), row_types
+
+DashboardData = namedtuple('DashboardData', 'counters recent_memories upcoming_reminders overdue_reminders timings')
+
+class DashboardQueries:
+    """Reads everything the dashboard shows except the (cached) user
+
+    "combined" sends the four independent queries as one UNION ALL
+    statement, one round trip; "concurrent" runs each on its own pooled
+    connection at the same time, which needs DASHBOARD_QUERY_WORKERS spare
+    connections per request; "sequential" runs them one after the other on
+    the request's session. A database that rejects the combined statement
+    switches the process to concurrent. Timings are reported per query, or
+    as one "combined" entry.
+    """
+
+    def __init__(self):
+        self.mode = 'combined'
+        self.executor = None
+        self.logger = None
+        # Built once with bind parameters, so SQLAlchemy's cache key and compiled
+        # SQL for these large statements are reused by every request
+        self.statements = _statements()
+        self.combined, self.row_types = _combined_statement(self.statements)
+
+    def init_app(self, app):
+        self.mode = app.config['DASHBOARD_QUERY_MODE']
+        if self.mode not in MODES:
+            raise ValueError(f'Unknown DASHBOARD_QUERY_MODE: {self.mode}')
+        # Threads start on first use, so combined mode never creates any
+        self.executor = ThreadPoolExecutor(max_workers=app.config['DASHBOARD_QUERY_WORKERS'], thread_name_prefix='dashboard')
+        self.logger = app.logger
+
+    def load(self, user_id, now):
+        params = {'user_id': user_id, 'now': now, 'upcoming_until': now + timedelta(days=UPCOMING_DAYS)}
+
+        if self.mode == 'combined':
+            try:
+                results, timings = self._combined(params)
+            except (CompileError, ProgrammingError, NotSupportedError) as e:
+                db.session.rollback()
+                self.logger.warning('Combined dashboard query failed, running its queries concurrently from now on: %s', e)
+                self.mode = 'concurrent'
+
+        if self.mode == 'concurrent':
+            results, timings = self._concurrent(params)
+        elif self.mode == 'sequential':
+            results, timings = self._sequential(params)
+
+        counters = dict(results['counters'])
+        if MEMORIES not in counters:
+            counters = reconcile_counters(user_id)
+
+        return DashboardData(
+            counters=counters,
+            recent_memories=results['recent_memories'],
+            upcoming_reminders=results['upcoming_reminders'],
+            overdue_reminders=results['overdue_reminders'][0].count,
+            timings=timings
+        )
+
+    def _sequential(self, params):
+        results, timings = {}, {}
+        for name, statement in self.statements.items():
+            started_at = time.perf_counter()
+            results[name] = db.session.execute(statement, params).all()
+            timings[name] = time.perf_counter() - started_at
+        return results, timings
+
+    def _run(self, engine, statement, params):
+        started_at = time.perf_counter()
+        with engine.connect() as connection:
+            rows = connection.execute(statement, params).all()
+        return rows, time.perf_counter() - started_at
+
+    def _concurrent(self, params):
+        engine = db.engine  # the workers have no app context
+        futures = {
+            name: self.executor.submit(self._run, engine, statement, params)
+            for name, statement in self.statements.items()
+        }
+        results, timings = {}, {}
+        for name, future in futures.items():
+            results[name], timings[name] = future.result()
+        return results, timings
+
+    def _combined(self, params):
+        started_at = time.perf_counter()
+        rows = db.session.execute(self.combined, params).all()
+        timings = {'combined': time.perf_counter() - started_at}
+
+        # Give each query's rows back their own column names and order
+        results = {name: [] for name in self.row_types}
+        for row in rows:
+            Row, indexes = self.row_types[row.part]
+            results[row.part].append(Row(*(row[index] for index in indexes)))
+        results['recent_memories'].sort(key=lambda row: (row.created_at, row.id), reverse=True)
+        results['upcoming_reminders'].sort(key=lambda row: (row.trigger_date, row.id))
+
+        return results, timings
+
+    def server_timing(self, timings):
+        """Server-Timing header value for the timings of load()"""
+        return ', '.join(f'dashboard-{name.replace("_", "-")};dur={seconds * 1000:.2f}' for name, seconds in timings.items())
+
+dashboard_queries = DashboardQueries()
@@ -0,0 +1,77 @@
+from functools import lru_cache
+import numpy as np
+import math
+import re
+import zlib
+
+WORD = re.compile(r'\w+')
+
+class Encoder:
+    """Turns texts into fixed-size float32 vectors
+
+    Vectors are returned raw, the index applies any corpus weighting (IDF)
+    and normalization, so encoders only need to be deterministic across
+    processes.
+    """
+
+    dim = None
+
+    def encode(self, texts):
+        raise NotImplementedError
+
+class HashedNgramEncoder(Encoder):
+    """Local bag-of-n-grams encoder using the hashing trick, no model or network needed
+
+    Word unigrams and bigrams plus character trigrams (for typos and word
+    forms) are hashed into `dim` buckets with a sign bit to spread
+    collisions, and weighted by sublinear term frequency.
+    """
+
+    def __init__(self, dim=512):
+        self.dim = dim
+        # Vocabularies repeat, so each word's buckets are only hashed once
+        self._word_buckets = lru_cache(maxsize=2 ** 16)(self._hash_word)
+
+    def _bucket(self, feature):
+        # crc32 is stable across processes, unlike hash()
+        hashed = zlib.crc32(feature.encode())
+        return hashed % self.dim if hashed & 0x80000000 else -(hashed % self.dim) - 1
+
+    def _hash_word(self, word):
+        padded = f'<{word}>'
+        return (self._bucket(word),) + tuple(self._bucket('#' + padded[i:i + 3]) for i in range(len(padded) - 2))
+
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+
+        for row, text in enumerate(texts):
+            words = WORD.findall((text or '').lower())
+            counts = {}
+            for word in words:
+                for bucket in self._word_buckets(word):
+                    counts[bucket] = counts.get(bucket, 0) + 1
+            for first, second in zip(words, words[1:]):
+                bucket = self._bucket(f'{first} {second}')
+                counts[bucket] = counts.get(bucket, 0) + 1
+
+            # Negative buckets carry the sign bit that spreads collisions
+            for bucket, count in counts.items():
+                weight = 1.0 + math.log(count)
+                if bucket >= 0:
+                    vectors[row, bucket] += weight
+                else:
+                    vectors[row, -bucket - 1] -= weight
+
+        return vectors
+
+ENCODERS = {
+    'hashed-ngrams': HashedNgramEncoder
+}
+
+def register_encoder(name, encoder_class):
+    ENCODERS[name] = encoder_class
+
+def get_encoder(name, **options):
+    if name not in ENCODERS:
+        raise ValueError(f'Unknown similarity encoder: {name}')
+    return ENCODERS[name](**options)
@@ -0,0 +1,77 @@
+from flask import request, make_response, jsonify, Response, g
+from flask_jwt_extended import get_jwt_identity
+from services.counters import get_version
+from database import db
+from datetime import timezone
+from functools import wraps
+import hashlib
+import time
+
+def _hash(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+def _with_validators(response, etag, last_modified=None):
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # Let browsers store the payload but always revalidate it
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def not_modified(etag, last_modified=None):
+    """Whether the request's validators still match this representation"""
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if last_modified and request.if_modified_since:
+        return last_modified.replace(microsecond=0, tzinfo=timezone.utc) <= request.if_modified_since
+    return False
+
+def resource_etag(*parts):
+    """Strong ETag for a single resource, from its id and updated_at"""
+    return _hash(*parts)
+
+def conditional_response(etag, last_modified, build):
+    """304 when the client is current, otherwise the response built by build()"""
+    if not_modified(etag, last_modified):
+        return _with_validators(Response(status=304), etag, last_modified)
+
+    response = make_response(build())
+    if response.status_code == 200:
+        _with_validators(response, etag, last_modified)
+    return response
+
+def conditional(time_bucket=None):
+    """ETag a per-user view from the user's change version (use under jwt_required)
+
+    Views whose payload also depends on the clock (overdue flags, upcoming
+    windows) pass time_bucket so their ETag rolls over every that many seconds.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            user_id = get_jwt_identity()
+            try:
+                version = get_version(user_id)
+            except Exception as e:
+                # Runs before the view's own error handling, answer in the same shape
+                db.session.rollback()
+                return jsonify({'message': 'Failed to read the data version', 'error': str(e)}), 500
+
+            parts = [
+                user_id,
+                version,
+                request.endpoint,
+                request.view_args,
+                sorted(request.args.items(multi=True))
+            ]
+            if time_bucket:
+                parts.append(int(time.time() // time_bucket))
+            etag = _hash(*parts)
+            g.etag = etag  # the response cache keys on it, see services/cache.py
+
+            # Matching clients skip the view, the cache and serialization
+            return conditional_response(etag, None, lambda: view(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
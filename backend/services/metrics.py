@@ -0,0 +1,92 @@
+from flask import request, g, Response
+import os
+import time
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:
+    prometheus_client = None
+
+# Seconds, from a fast cached read to a slow export page
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Metrics:
+    """Prometheus request metrics per blueprint and endpoint
+
+    Under gunicorn, PROMETHEUS_MULTIPROC_DIR (set by gunicorn.conf.py) makes
+    every worker write its samples to mmap files in that directory, and
+    /metrics sums them across workers, so no external aggregator is needed.
+    """
+
+    def __init__(self):
+        self.enabled = False
+
+    def init_app(self, app):
+        if not app.config['METRICS_ENABLED']:
+            return
+        if not prometheus_client:
+            raise RuntimeError('METRICS_ENABLED requires the prometheus_client package')
+
+        self.enabled = True
+        self.token = app.config['METRICS_TOKEN']
+
+        self.requests = prometheus_client.Counter(
+            'memoryos_http_requests_total', 'HTTP requests served',
+            ['blueprint', 'endpoint', 'method', 'status']
+        )
+        self.errors = prometheus_client.Counter(
+            'memoryos_http_request_errors_total', 'HTTP requests answered with a 5xx status',
+            ['blueprint', 'endpoint', 'method']
+        )
+        self.latency = prometheus_client.Histogram(
+            'memoryos_http_request_duration_seconds', 'Time spent handling HTTP requests',
+            ['blueprint', 'endpoint', 'method'], buckets=LATENCY_BUCKETS
+        )
+        self.in_flight = prometheus_client.Gauge(
+            'memoryos_http_requests_in_flight', 'HTTP requests being handled',
+            ['blueprint'], multiprocess_mode='livesum'
+        )
+
+        app.before_request(self._start)
+        app.after_request(self._record)
+        app.teardown_request(self._finish)
+
+    def _labels(self):
+        # Unmatched URLs share one label so scanners can't blow up cardinality
+        return request.blueprint or 'app', request.endpoint or 'unmatched', request.method
+
+    def _start(self):
+        g.metrics_started_at = time.perf_counter()
+        g.metrics_blueprint = self._labels()[0]
+        self.in_flight.labels(g.metrics_blueprint).inc()
+
+    def _record(self, response):
+        if 'metrics_started_at' not in g:
+            return response
+
+        blueprint, endpoint, method = self._labels()
+        # Streamed responses are timed until the handler returns, not until the last byte
+        self.latency.labels(blueprint, endpoint, method).observe(time.perf_counter() - g.metrics_started_at)
+        self.requests.labels(blueprint, endpoint, method, str(response.status_code)).inc()
+        if response.status_code >= 500:
+            self.errors.labels(blueprint, endpoint, method).inc()
+        return response
+
+    def _finish(self, exc):
+        blueprint = g.pop('metrics_blueprint', None)
+        if blueprint is not None:
+            self.in_flight.labels(blueprint).dec()
+
+    def authorized(self):
+        return not self.token or request.headers.get('Authorization') == f'Bearer {self.token}'
+
+    def render(self):
+        if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+            registry = prometheus_client.CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = prometheus_client.REGISTRY
+        return Response(prometheus_client.generate_latest(registry), mimetype=prometheus_client.CONTENT_TYPE_LATEST)
+
+metrics = Metrics()
@@ -0,0 +1,38 @@
+from flask import current_app
+
+class Notifier:
+    """Delivers a due reminder to its user"""
+
+    def notify(self, reminder, occurrence):
+        raise NotImplementedError
+
+class LogNotifier(Notifier):
+    """Writes due reminders to the application log"""
+
+    def notify(self, reminder, occurrence):
+        current_app.logger.info(
+            'Reminder %s for user %s is due (%s): %s',
+            reminder.id, reminder.user_id, occurrence.isoformat(), reminder.title
+        )
+
+class MemoryNotifier(Notifier):
+    """Keeps dispatched reminders in a list, a local stand-in for tests and development"""
+
+    def __init__(self):
+        self.sent = []
+
+    def notify(self, reminder, occurrence):
+        self.sent.append((reminder.id, occurrence))
+
+NOTIFIERS = {
+    'log': LogNotifier,
+    'memory': MemoryNotifier
+}
+
+def register_notifier(name, notifier_class):
+    NOTIFIERS[name] = notifier_class
+
+def get_notifier(name):
+    if name not in NOTIFIERS:
+        raise ValueError(f'Unknown reminder notifier: {name}')
+    return NOTIFIERS[name]()
@@ -0,0 +1,70 @@
+from sqlalchemy import tuple_, or_, and_
+from datetime import datetime
+import base64
+import json
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(key_value, row_id):
+    """Opaque token for the position after (key_value, row_id)"""
+    payload = json.dumps([key_value.isoformat() if key_value else None, row_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        key_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(key_value) if key_value else None), int(row_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+
+def _after(key, id_column, key_value, row_id, descending, nullable):
+    # Rows strictly after the cursor position in (key, id) order, NULL keys last
+    if key_value is None:
+        return and_(key.is_(None), id_column < row_id if descending else id_column > row_id)
+
+    if descending:
+        after = tuple_(key, id_column) < tuple_(key_value, row_id)
+    else:
+        after = tuple_(key, id_column) > tuple_(key_value, row_id)
+
+    return or_(after, key.is_(None)) if nullable else after
+
+def keyset_ordering(key, id_column, descending=False, nullable=False):
+    """ORDER BY terms for (key, id) with NULL keys last
+
+    NULLS LAST is spelled as a leading `key IS NULL` term: both SQLite and
+    Postgres read it from an index on (..., key IS NULL, key, id), while
+    their NULLS LAST defaults differ and SQLite indexes can't declare one.
+    """
+    if descending:
+        ordering = [key.desc(), id_column.desc()]
+    else:
+        ordering = [key.asc(), id_column.asc()]
+    return [key.is_(None)] + ordering if nullable else ordering
+
+def seek_page(query, key, id_column, cursor, per_page, descending=False, nullable=False, include_total=False):
+    """Keyset pagination over (key, id), returns (items, pagination)"""
+    total = query.order_by(None).count() if include_total else None
+
+    if cursor:
+        key_value, row_id = decode_cursor(cursor)
+        query = query.filter(_after(key, id_column, key_value, row_id, descending, nullable))
+
+    ordering = keyset_ordering(key, id_column, descending, nullable)
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(None).order_by(*ordering).limit(per_page + 1).all()
+    items = rows[:per_page]
+    has_next = len(rows) > per_page
+
+    pagination = {
+        'per_page': per_page,
+        'has_next': has_next,
+        'next_cursor': encode_cursor(getattr(items[-1], key.key), items[-1].id) if has_next else None
+    }
+    if total is not None:
+        pagination['total'] = total
+
+    return items, pagination
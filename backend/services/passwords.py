@@ -0,0 +1,115 @@
+from werkzeug.security import generate_password_hash, check_password_hash
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+def _thread_pool(workers):
+    """An executor running on OS threads, also under gevent workers
+
+    gevent monkey patches threading, which would turn the pool's threads
+    into greenlets and run every hash on the event loop; gevent's own
+    executor keeps real threads and lets the waiting greenlet yield.
+    """
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched('threading'):
+            from gevent.threadpool import ThreadPoolExecutor as GeventThreadPoolExecutor
+            return GeventThreadPoolExecutor(max_workers=workers)
+    except ImportError:
+        pass
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+
+class HasherBusy(RuntimeError):
+    """Raised when too many hashes are already queued, callers should answer 503"""
+
+class PasswordHasher:
+    """Runs password hashing on a small bounded thread pool
+
+    scrypt and pbkdf2 release the GIL, so at most `workers` hashes use CPU at
+    once per process whatever the number of request threads, and at most
+    `max_queued` more wait for a slot before requests are turned away. The
+    method (a werkzeug method string such as "scrypt:32768:8:1" or
+    "pbkdf2:sha256:600000") is configurable, and hashes made with other
+    parameters are reported by needs_rehash().
+    """
+
+    def __init__(self):
+        self.method = 'scrypt'
+        self.prefix = None
+        self.executor = None
+        self.workers = 0
+        self.max_queued = 0
+        self._slots = None
+        self._lock = threading.Lock()
+        self.stats_counters = {'completed': 0, 'rejected': 0, 'queued': 0, 'running': 0}
+        self.wait_seconds = 0.0
+        self.hash_seconds = 0.0
+
+    def init_app(self, app):
+        self.method = app.config['PASSWORD_HASH_METHOD']
+        # The stored prefix includes werkzeug's defaults ("scrypt" -> "scrypt:32768:8:1")
+        self.prefix = generate_password_hash('', method=self.method).split('$', 1)[0]
+
+        workers = app.config['PASSWORD_HASH_WORKERS']
+        if workers:
+            self.workers = workers
+            self.max_queued = app.config['PASSWORD_HASH_MAX_QUEUED']
+            self.executor = _thread_pool(workers)
+            self._slots = threading.BoundedSemaphore(workers + self.max_queued)
+
+    def _count(self, name, delta):
+        with self._lock:
+            self.stats_counters[name] += delta
+
+    def _timed(self, function, args, submitted_at):
+        started_at = time.perf_counter()
+        self._count('queued', -1)
+        self._count('running', 1)
+        try:
+            return function(*args)
+        finally:
+            finished_at = time.perf_counter()
+            with self._lock:
+                self.stats_counters['running'] -= 1
+                self.stats_counters['completed'] += 1
+                self.wait_seconds += started_at - submitted_at
+                self.hash_seconds += finished_at - started_at
+
+    def _run(self, function, *args):
+        if not self.executor:
+            return function(*args)
+
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected', 1)
+            raise HasherBusy('Too many password operations in progress')
+
+        try:
+            self._count('queued', 1)
+            return self.executor.submit(self._timed, function, args, time.perf_counter()).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Whether the hash was made with another method or cost than the configured one"""
+        return self.prefix is not None and password_hash.split('$', 1)[0] != self.prefix
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.stats_counters)
+            completed = counters['completed']
+            return {
+                'method': self.prefix or self.method,
+                'workers': self.workers,
+                'max_queued': self.max_queued,
+                **counters,
+                'avg_wait_ms': round(self.wait_seconds / completed * 1000, 2) if completed else None,
+                'avg_hash_ms': round(self.hash_seconds / completed * 1000, 2) if completed else None
+            }
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,76 @@
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+import threading
+import time
+
+class PoolMonitor:
+    """Counts connection pool activity from pool events and the checkout wait"""
+
+    def __init__(self):
+        self.engine = None
+        self.counters = {'connects': 0, 'checkouts': 0, 'checkins': 0, 'invalidations': 0, 'timeouts': 0}
+        self.waits = 0  # only InstrumentedQueuePool checkouts are timed
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app, db):
+        with app.app_context():
+            self.engine = db.engine
+
+        pool = self.engine.pool
+        for name, counter in (('connect', 'connects'), ('checkout', 'checkouts'),
+                              ('checkin', 'checkins'), ('invalidate', 'invalidations')):
+            event.listen(pool, name, self._counting(counter))
+
+    def _counting(self, counter):
+        def listener(*args):
+            self._count(counter)
+        return listener
+
+    def _count(self, counter):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def stats(self):
+        pool = self.engine.pool if self.engine else None
+        with self._lock:
+            data = {
+                'pool': type(pool).__name__ if pool else None,
+                **self.counters,
+                'avg_wait_ms': round(self.wait_seconds / self.waits * 1000, 2) if self.waits else None,
+                'max_wait_ms': round(self.max_wait_seconds * 1000, 2) if self.waits else None
+            }
+
+        # Live numbers are only available on queue pools
+        if isinstance(pool, QueuePool):
+            data.update({
+                'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                'overflow': max(pool.overflow(), 0),
+                'max_overflow': pool._max_overflow,
+                'timeout': pool.timeout()
+            })
+        return data
+
+pool_monitor = PoolMonitor()
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited, and checkouts that timed out"""
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_monitor._count('timeouts')
+            raise
+        finally:
+            pool_monitor.record_wait(time.perf_counter() - started_at)
@@ -0,0 +1,222 @@
+from flask import request, jsonify, g, current_app
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+import math
+import re
+import threading
+import time
+
+LIMIT_PATTERN = re.compile(r'^\s*(\d+)\s*/\s*(\d*)\s*(s|sec|second|m|min|minute|h|hour|d|day)s?\s*$')
+
+PERIODS = {
+    's': 1, 'sec': 1, 'second': 1,
+    'm': 60, 'min': 60, 'minute': 60,
+    'h': 3600, 'hour': 3600,
+    'd': 86400, 'day': 86400
+}
+
+def parse_limit(value):
+    """Parse "100/minute" or "10/30s" into (capacity, tokens per second)"""
+    match = LIMIT_PATTERN.match(value or '')
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f'Invalid rate limit: {value}')
+
+    capacity = int(match.group(1))
+    period = int(match.group(2) or 1) * PERIODS[match.group(3)]
+    return capacity, capacity / period
+
+def parse_limits(value):
+    """Parse "auth.login=10/minute,memories=120/minute" into {target: limit}"""
+    limits = {}
+    for item in (value or '').split(','):
+        if item.strip():
+            target, _, limit = item.partition('=')
+            limits[target.strip()] = limit.strip()
+    return limits
+
+class MemoryBucketStore:
+    """Token buckets held in this process"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = {}  # key -> (tokens, updated_at, full_at)
+        self._lock = threading.Lock()
+
+    def _prune(self, now):
+        # A bucket that has refilled is the same as a missing one
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if bucket[2] > now}
+
+    def consume(self, key, capacity, rate, cost=1):
+        """Take cost tokens, returns (allowed, remaining tokens, seconds until allowed)"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at, _ = self._buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+
+            if key not in self._buckets and len(self._buckets) >= self.max_keys:
+                self._prune(now)
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+
+        return allowed, tokens, 0 if allowed else (cost - tokens) / rate
+
+# Refill and take in one step on the server, using the server clock so every
+# worker sees the same time
+CONSUME_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    allowed = 1
+    tokens = tokens - cost
+else
+    retry_after = (cost - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return {allowed, tostring(tokens), tostring(retry_after)}
+"""
+
+class RedisBucketStore:
+    """Token buckets shared by every worker, on any Redis-compatible client with
+    scripting (redis-py, or fakeredis with Lua support as a local fake)"""
+
+    def __init__(self, client, prefix='ratelimit:'):
+        self.prefix = prefix
+        self._consume = client.register_script(CONSUME_SCRIPT)
+
+    def consume(self, key, capacity, rate, cost=1):
+        allowed, tokens, retry_after = self._consume(keys=[self.prefix + key], args=[capacity, rate, cost])
+        return bool(allowed), float(tokens), float(retry_after)
+
+class RateLimiter:
+    """Per-user (or per-IP for anonymous requests) token buckets plus an in-flight cap
+
+    Limits are looked up by endpoint, then blueprint, then RATE_LIMIT_DEFAULT.
+    Requests over their limit get 429 with Retry-After. When more than
+    MAX_IN_FLIGHT_REQUESTS are already being served by this process, new
+    requests get 503 instead of queueing for the database.
+    """
+
+    def __init__(self):
+        self.store = None
+        self.limits = {}
+        self.default_limit = None
+        self.max_in_flight = 0
+        self.in_flight = 0
+        self.rejected = {'rate_limited': 0, 'shed': 0}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        backend = app.config['RATE_LIMIT_BACKEND']
+
+        if backend == 'memory':
+            self.store = MemoryBucketStore()
+        elif backend == 'redis':
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError('RATE_LIMIT_BACKEND=redis requires the redis package')
+            self.store = RedisBucketStore(redis.Redis.from_url(app.config['RATE_LIMIT_REDIS_URL']))
+        elif backend == 'none':
+            self.store = None
+        else:
+            raise ValueError(f'Unknown RATE_LIMIT_BACKEND: {backend}')
+
+        self.default_limit = parse_limit(app.config['RATE_LIMIT_DEFAULT'])
+        self.limits = {target: parse_limit(limit) for target, limit in app.config['RATE_LIMITS'].items()}
+        self.max_in_flight = app.config['MAX_IN_FLIGHT_REQUESTS']
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def exempt(self, view):
+        """Never rate limit or shed this view (health checks, metrics)"""
+        view.rate_limit_exempt = True
+        return view
+
+    def _is_exempt(self):
+        view = current_app.view_functions.get(request.endpoint)
+        return view is None or request.method == 'OPTIONS' or getattr(view, 'rate_limit_exempt', False) \
+            or not request.path.startswith('/api/')
+
+    def _limit_for(self, endpoint):
+        if endpoint in self.limits:
+            return endpoint, self.limits[endpoint]
+        blueprint = endpoint.rpartition('.')[0]
+        if blueprint in self.limits:
+            return blueprint, self.limits[blueprint]
+        return 'default', self.default_limit
+
+    def _client_key(self):
+        try:
+            verify_jwt_in_request(optional=True)
+            user_id = get_jwt_identity()
+        except Exception:
+            user_id = None
+        return f'user:{user_id}' if user_id is not None else f'ip:{request.remote_addr}'
+
+    def _before_request(self):
+        if self._is_exempt():
+            return None
+
+        if self.store:
+            scope, (capacity, rate) = self._limit_for(request.endpoint)
+            allowed, remaining, retry_after = self.store.consume(f'{scope}:{self._client_key()}', capacity, rate)
+            g.rate_limit = (capacity, int(remaining))
+
+            if not allowed:
+                self.rejected['rate_limited'] += 1
+                response = jsonify({'message': 'Too many requests, please slow down'})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(max(math.ceil(retry_after), 1))
+                return response
+
+        if self.max_in_flight:
+            with self._lock:
+                if self.in_flight >= self.max_in_flight:
+                    self.rejected['shed'] += 1
+                    response = jsonify({'message': 'Server is busy, please retry shortly'})
+                    response.status_code = 503
+                    response.headers['Retry-After'] = '1'
+                    return response
+                self.in_flight += 1
+                g.admitted = True
+
+        return None
+
+    def _after_request(self, response):
+        if 'rate_limit' in g:
+            capacity, remaining = g.rate_limit
+            response.headers['X-RateLimit-Limit'] = str(capacity)
+            response.headers['X-RateLimit-Remaining'] = str(remaining)
+        return response
+
+    def _teardown_request(self, exc):
+        if g.pop('admitted', False):
+            with self._lock:
+                self.in_flight -= 1
+
+    def stats(self):
+        return {
+            'backend': type(self.store).__name__ if self.store else None,
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight or None,
+            'rejected': dict(self.rejected)
+        }
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,231 @@
+from flask import current_app
+from database import db
+from models.reminder import Reminder
+from sqlalchemy import tuple_
+from datetime import datetime, timedelta
+import calendar
+import heapq
+import re
+import time
+
+FIXED_STEPS = {
+    'daily': timedelta(days=1),
+    'weekly': timedelta(weeks=1)
+}
+
+CALENDAR_STEPS = {
+    'monthly': 1,
+    'yearly': 12
+}
+
+# Custom patterns: "every 3 days", "2 weeks", "12h", "30m"
+CUSTOM_PATTERN = re.compile(r'^(?:every\s+)?(\d+)\s*(m|min|minute|h|hour|d|day|w|week|month|year)s?$')
+
+CUSTOM_UNITS = {
+    'm': timedelta(minutes=1), 'min': timedelta(minutes=1), 'minute': timedelta(minutes=1),
+    'h': timedelta(hours=1), 'hour': timedelta(hours=1),
+    'd': timedelta(days=1), 'day': timedelta(days=1),
+    'w': timedelta(weeks=1), 'week': timedelta(weeks=1)
+}
+
+def _add_months(value, months):
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    day = min(value.day, calendar.monthrange(year, month)[1])
+    return value.replace(year=year, month=month, day=day)
+
+def _parse_step(repeat_pattern):
+    """Returns a timedelta or a number of months, None for one-time reminders"""
+    pattern = (repeat_pattern or '').strip().lower()
+
+    if pattern in FIXED_STEPS:
+        return FIXED_STEPS[pattern]
+    if pattern in CALENDAR_STEPS:
+        return CALENDAR_STEPS[pattern]
+
+    match = CUSTOM_PATTERN.match(pattern)
+    if not match or int(match.group(1)) == 0:
+        return None
+
+    count, unit = int(match.group(1)), match.group(2)
+    if unit == 'month':
+        return count
+    if unit == 'year':
+        return count * 12
+    return CUSTOM_UNITS[unit] * count
+
+def next_occurrence(trigger_date, repeat_pattern, after):
+    """First occurrence of the pattern strictly after `after`, None if it doesn't repeat"""
+    step = _parse_step(repeat_pattern)
+    if step is None:
+        return None
+
+    if isinstance(step, timedelta):
+        # Skip missed occurrences arithmetically rather than one by one
+        missed = max((after - trigger_date) // step, 0)
+        occurrence = trigger_date + step * missed
+        while occurrence <= after:
+            occurrence += step
+        return occurrence
+
+    occurrences = 1
+    occurrence = _add_months(trigger_date, step)
+    while occurrence <= after:
+        occurrences += 1
+        occurrence = _add_months(trigger_date, step * occurrences)
+    return occurrence
+
+class ReminderScheduler:
+    """Fires pending reminders from a heap of trigger dates loaded a window at a time
+
+    Only reminders due within `horizon` are held in memory. The window is
+    extended with keyset queries on the pending trigger_date index, and edits
+    are picked up by scanning recently updated reminders, so a tick never
+    reads the whole table.
+    """
+
+    def __init__(self, notifier, horizon=timedelta(minutes=15), catch_up=timedelta(minutes=5),
+                 scan_interval=timedelta(seconds=30), batch_size=1000):
+        self.notifier = notifier
+        self.horizon = horizon
+        self.catch_up = catch_up
+        self.scan_interval = scan_interval
+        self.batch_size = batch_size
+
+        self._heap = []          # (trigger_date, reminder_id)
+        self._queued = {}        # reminder_id -> trigger_date of its live heap entry
+        self._fired = {}         # reminder_id -> trigger_date already dispatched
+        self._position = None    # (trigger_date, id) of the last reminder loaded
+        self._loaded_until = None
+        self._last_scan = None
+
+    def _push(self, reminder_id, trigger_date):
+        if self._queued.get(reminder_id) == trigger_date or self._fired.get(reminder_id) == trigger_date:
+            return
+        # Older entries for the same reminder become stale and are skipped on pop
+        self._queued[reminder_id] = trigger_date
+        heapq.heappush(self._heap, (trigger_date, reminder_id))
+
+    def _pending(self):
+        return db.session.query(Reminder.id, Reminder.trigger_date).filter(
+            Reminder.is_completed == False,
+            Reminder.trigger_date.isnot(None)
+        )
+
+    def _extend_window(self, now):
+        """Load pending reminders up to now + horizon, batch_size rows per query"""
+        if self._loaded_until is None:
+            self._position = (now - self.catch_up, 0)
+        self._loaded_until = now + self.horizon
+
+        while True:
+            rows = self._pending().filter(
+                tuple_(Reminder.trigger_date, Reminder.id) > tuple_(*self._position),
+                Reminder.trigger_date <= self._loaded_until
+            ).order_by(Reminder.trigger_date, Reminder.id).limit(self.batch_size).all()
+
+            for reminder_id, trigger_date in rows:
+                self._push(reminder_id, trigger_date)
+            if rows:
+                self._position = (rows[-1].trigger_date, rows[-1].id)
+            if len(rows) < self.batch_size:
+                break
+
+    def _scan_changes(self, now):
+        """Queue reminders created or moved into the loaded window since the last scan"""
+        since = (self._last_scan or now) - self.scan_interval  # overlap absorbs clock skew
+        self._last_scan = now
+
+        rows = self._pending().filter(
+            Reminder.updated_at >= since,
+            Reminder.trigger_date >= now - self.catch_up,
+            Reminder.trigger_date <= self._loaded_until
+        ).all()
+        for reminder_id, trigger_date in rows:
+            self._push(reminder_id, trigger_date)
+
+    def _pop_due(self, now):
+        due = {}
+        while self._heap and self._heap[0][0] <= now:
+            trigger_date, reminder_id = heapq.heappop(self._heap)
+            if self._queued.get(reminder_id) == trigger_date:
+                del self._queued[reminder_id]
+                due[reminder_id] = trigger_date
+        return due
+
+    def tick(self, now=None):
+        """Dispatch every reminder due at `now`, returns how many were sent"""
+        now = now or datetime.utcnow()
+
+        if self._loaded_until is None or now + self.horizon / 2 >= self._loaded_until:
+            self._extend_window(now)
+        if self._last_scan is None or now - self._last_scan >= self.scan_interval:
+            self._scan_changes(now)
+
+        # Rescans never reach back further than catch_up, older dispatches can be forgotten
+        self._fired = {
+            reminder_id: trigger_date for reminder_id, trigger_date in self._fired.items()
+            if trigger_date >= now - self.catch_up
+        }
+
+        due = self._pop_due(now)
+        if not due:
+            return 0
+
+        sent = 0
+        reminders = Reminder.query.filter(Reminder.id.in_(due.keys())).all()
+        for reminder in reminders:
+            # Skip reminders completed or rescheduled since they were queued
+            if reminder.is_completed or reminder.trigger_date != due[reminder.id]:
+                continue
+
+            try:
+                self.notifier.notify(reminder, reminder.trigger_date)
+            except Exception:
+                current_app.logger.exception('Failed to dispatch reminder %s', reminder.id)
+                continue
+            self._fired[reminder.id] = reminder.trigger_date
+            sent += 1
+
+            occurrence = next_occurrence(reminder.trigger_date, reminder.repeat_pattern, now)
+            if occurrence:
+                reminder.trigger_date = occurrence
+                if occurrence <= self._loaded_until:
+                    self._push(reminder.id, occurrence)
+
+        db.session.commit()
+        return sent
+
+    def seconds_until_next(self, now=None, max_wait=1.0):
+        now = now or datetime.utcnow()
+        if not self._heap:
+            return max_wait
+        return min(max((self._heap[0][0] - now).total_seconds(), 0), max_wait)
+
+    def _reset_window(self):
+        """Forget the loaded window so the next tick reloads it from the database"""
+        self._heap = []
+        self._queued = {}
+        self._position = None
+        self._loaded_until = None
+        self._last_scan = None
+
+    def run(self, max_wait=1.0, max_backoff=60.0, should_stop=lambda: False):
+        failures = 0
+        while not should_stop():
+            try:
+                self.tick()
+                failures = 0
+                wait = self.seconds_until_next(max_wait=max_wait)
+            except Exception:
+                # A lost connection or failed commit must not stop the scheduler.
+                # Reminders popped by the failed tick are reloaded with the window,
+                # _fired keeps the ones already sent from going out twice
+                current_app.logger.exception('Reminder scheduler tick failed')
+                db.session.rollback()
+                self._reset_window()
+                failures += 1
+                wait = min(max_wait * 2 ** failures, max_backoff)
+            finally:
+                db.session.remove()
+            time.sleep(wait)
@@ -0,0 +1,144 @@
+from database import db
+from models.memory import Memory
+from sqlalchemy import event, inspect, text, func, or_, desc, literal_column, Integer, Float
+from sqlalchemy.exc import OperationalError
+import re
+
+FTS_TABLE = 'memories_fts'
+
+# Active search backend: 'fts5' (SQLite), 'postgres' (tsvector + GIN) or 'like'
+_backend = 'like'
+
+def init_search_index():
+    """Create the full-text index for the configured database (needs an app context)"""
+    global _backend
+    dialect = db.engine.dialect.name
+
+    try:
+        with db.engine.begin() as connection:
+            if dialect == 'sqlite':
+                _init_sqlite(connection)
+                _backend = 'fts5'
+            elif dialect == 'postgresql':
+                # Until `flask db upgrade` adds the tsvector column, match substrings
+                _backend = 'postgres' if _has_search_vector(connection) else 'like'
+            else:
+                _backend = 'like'
+    except OperationalError:
+        # SQLite built without FTS5, fall back to substring matching
+        _backend = 'like'
+
+    return _backend
+
+def _init_sqlite(connection):
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {'name': FTS_TABLE}
+    ).first()
+    if exists:
+        return
+
+    connection.execute(text(
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+        "title, content, tags, user_id UNINDEXED, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    ))
+
+    # Backfill memories created before the index existed
+    connection.execute(text(
+        f"INSERT INTO {FTS_TABLE} (rowid, title, content, tags, user_id) "
+        "SELECT id, title, coalesce(content, ''), coalesce(tags, ''), user_id FROM memories"
+    ))
+
+def _has_search_vector(connection):
+    # The generated column and its GIN index come from migration d7a3b5e91f42
+    return any(column['name'] == 'search_vector' for column in inspect(connection).get_columns('memories'))
+
+def _tokenize(term):
+    return re.findall(r'\w+', term.lower())
+
+def search_memories(query, user_id, term, ranked=True):
+    """Restrict a Memory query to matches for term, best matches first when ranked"""
+    tokens = _tokenize(term)
+
+    if _backend == 'fts5' and tokens:
+        # Quote every token so user input never reaches the FTS5 query syntax
+        match = ' '.join('"%s"*' % token.replace('"', '""') for token in tokens)
+        matches = text(
+            f"SELECT rowid AS memory_id, bm25({FTS_TABLE}, 10.0, 5.0, 2.0) AS rank "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match AND user_id = :user_id"
+        ).bindparams(match=match, user_id=user_id)\
+         .columns(memory_id=Integer, rank=Float)\
+         .subquery('fts_matches')
+
+        query = query.join(matches, matches.c.memory_id == Memory.id)
+        return query.order_by(matches.c.rank, desc(Memory.created_at)) if ranked else query
+
+    if _backend == 'postgres' and tokens:
+        ts_query = func.to_tsquery('simple', ' & '.join(f'{token}:*' for token in tokens))
+        search_vector = literal_column('memories.search_vector')
+
+        query = query.filter(search_vector.op('@@')(ts_query))
+        return query.order_by(desc(func.ts_rank(search_vector, ts_query)), desc(Memory.created_at)) if ranked else query
+
+    query = query.filter(
+        or_(
+            Memory.title.contains(term),
+            Memory.content.contains(term),
+            Memory.tags.contains(term)
+        )
+    )
+    return query.order_by(desc(Memory.created_at)) if ranked else query
+
+def _index_row(connection, memory):
+    connection.execute(
+        text(f"INSERT INTO {FTS_TABLE} (rowid, title, content, tags, user_id) "
+             "VALUES (:id, :title, :content, :tags, :user_id)"),
+        {
+            'id': memory.id,
+            'title': memory.title,
+            'content': memory.content or '',
+            'tags': ' '.join(str(tag) for tag in memory.tags or []),
+            'user_id': memory.user_id
+        }
+    )
+
+def _unindex_row(connection, memory_id):
+    connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {'id': memory_id})
+
+# Keep the SQLite index in the same transaction as the memory write
+@event.listens_for(Memory, 'after_insert')
+def _memory_inserted(mapper, connection, target):
+    if _backend == 'fts5':
+        _index_row(connection, target)
+
+@event.listens_for(Memory, 'after_update')
+def _memory_updated(mapper, connection, target):
+    if _backend != 'fts5':
+        return
+
+    # Only rewrite the changed columns, content is deferred and may not be loaded
+    state = inspect(target)
+    values = {
+        name: getattr(target, name)
+        for name in ('title', 'content', 'tags', 'user_id')
+        if state.attrs[name].history.has_changes()
+    }
+    if not values:
+        return
+
+    if 'content' in values:
+        values['content'] = values['content'] or ''
+    if 'tags' in values:
+        values['tags'] = ' '.join(str(tag) for tag in values['tags'] or [])
+
+    assignments = ', '.join(f'{name} = :{name}' for name in values)
+    connection.execute(
+        text(f"UPDATE {FTS_TABLE} SET {assignments} WHERE rowid = :id"),
+        {**values, 'id': target.id}
+    )
+
+@event.listens_for(Memory, 'after_delete')
+def _memory_deleted(mapper, connection, target):
+    if _backend == 'fts5':
+        _unindex_row(connection, target.id)
@@ -0,0 +1,68 @@
+from flask.json.provider import DefaultJSONProvider
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps_compact(obj):
+    """Compact UTF-8 JSON bytes, for payloads written outside of a Flask response"""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+def loads(data):
+    return orjson.loads(data) if orjson else json.loads(data)
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider encoding with orjson
+
+    Output matches DefaultJSONProvider: keys are sorted, dates go through the
+    same default() and debug responses are indented. Non-ASCII text is written
+    as UTF-8 instead of \\u escapes. Calls with options orjson doesn't support
+    are handed to the stdlib provider.
+    """
+
+    base_option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+    def _option(self, sort_keys, indent):
+        option = self.base_option
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        sort_keys = kwargs.pop('sort_keys', self.sort_keys)
+        indent = kwargs.pop('indent', None)
+        kwargs.pop('separators', None)
+        if kwargs or indent not in (None, 2):
+            return super().dumps(obj, sort_keys=sort_keys, indent=indent, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._option(sort_keys, indent)).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+
+        # Encode straight to bytes, skipping the str round trip of dumps()
+        body = orjson.dumps(obj, default=self.default, option=self._option(self.sort_keys, indent))
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+def init_json(app):
+    """Install the JSON provider selected by JSON_PROVIDER (auto, orjson or stdlib)"""
+    provider = app.config['JSON_PROVIDER']
+
+    if provider == 'orjson' and not orjson:
+        raise RuntimeError('JSON_PROVIDER=orjson requires the orjson package')
+    if provider not in ('auto', 'orjson', 'stdlib'):
+        raise ValueError(f'Unknown JSON_PROVIDER: {provider}')
+
+    if provider != 'stdlib' and orjson:
+        app.json = OrjsonProvider(app)
@@ -0,0 +1,291 @@
+from database import db
+from models.memory import Memory
+from models.change_log import ChangeLogEntry
+from services.counters import get_version
+from services.embeddings import get_encoder
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+import numpy as np
+import threading
+
+def memory_text(title, content, tags):
+    return ' '.join([title or '', ' '.join(str(tag) for tag in tags or []), content or ''])
+
+class VectorIndex:
+    """Raw term vectors of one user's memories with incremental add and remove
+
+    Rows live in a growable float32 matrix, document frequencies are kept
+    alongside, and the IDF-weighted, normalized matrix used for cosine
+    search is rebuilt in one vectorized pass the first time it's needed
+    after a change.
+    """
+
+    def __init__(self, dim, capacity=64):
+        self.dim = dim
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.df = np.zeros(dim, dtype=np.float32)
+        self.size = 0
+        self.rows = {}  # memory id -> row
+        self.version = 0
+        self._weighted = None
+        self._idf = None
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def nbytes(self):
+        """Memory held by the index's arrays, including the search matrix once prepared"""
+        weighted = self._weighted.nbytes if self._weighted is not None else 0
+        return self.ids.nbytes + self.vectors.nbytes + self.df.nbytes + weighted
+
+    def _grow(self):
+        capacity = max(len(self.ids) * 2, 64)
+        self.ids = np.resize(self.ids, capacity)
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        vectors[:self.size] = self.vectors[:self.size]
+        self.vectors = vectors
+
+    def add(self, memory_id, vector):
+        if memory_id in self.rows:
+            self.remove(memory_id)
+        if self.size == len(self.ids):
+            self._grow()
+
+        row = self.size
+        self.ids[row] = memory_id
+        self.vectors[row] = vector
+        self.df += vector != 0
+        self.rows[memory_id] = row
+        self.size += 1
+        self._weighted = None
+
+    def remove(self, memory_id):
+        row = self.rows.pop(memory_id, None)
+        if row is None:
+            return
+
+        self.df -= self.vectors[row] != 0
+        # Move the last row into the hole so rows stay contiguous
+        last = self.size - 1
+        if row != last:
+            self.ids[row] = self.ids[last]
+            self.vectors[row] = self.vectors[last]
+            self.rows[int(self.ids[row])] = row
+        self.vectors[last] = 0
+        self.size -= 1
+        self._weighted = None
+
+    def vector(self, memory_id):
+        row = self.rows.get(memory_id)
+        return None if row is None else self.vectors[row]
+
+    def _prepare(self):
+        if self._weighted is None:
+            self._idf = np.log((1.0 + self.size) / (1.0 + self.df)).astype(np.float32) + 1.0
+            weighted = self.vectors[:self.size] * self._idf
+            norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self._weighted = weighted / norms
+        return self._weighted
+
+    def search(self, vector, k, exclude=None):
+        """Top k (memory id, cosine score) pairs, best first"""
+        if self.size == 0:
+            return []
+
+        weighted = self._prepare()
+        query = vector * self._idf
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+
+        scores = weighted @ (query / norm)
+        if exclude is not None and exclude in self.rows:
+            scores[self.rows[exclude]] = -np.inf
+
+        k = min(k, self.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self.ids[row]), float(scores[row])) for row in top if scores[row] > 0]
+
+class IndexBuilding(RuntimeError):
+    """Raised while a user's index is still being built, callers should answer 202 and retry"""
+
+class SimilarityIndex:
+    """Per-user vector indexes kept in this process, least recently used dropped first
+
+    An index is built from the memories table on a user's first search and
+    then kept current from the change log: each search applies the memory
+    changes committed (by any worker) since the version the index reflects.
+
+    Builds run on a small thread pool, one per user at a time. A search
+    waits up to build_wait seconds for it and otherwise raises
+    IndexBuilding. The cache is bounded by the bytes its arrays hold
+    (SIMILARITY_CACHE_MB); an index larger than the whole budget is only
+    kept while nothing else is.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.encoder = None
+        self.max_bytes = 256 * 2 ** 20
+        self.build_wait = 0.5
+        self.rebuild_ratio = 0.5
+        self.executor = None
+        self._indexes = OrderedDict()
+        self._builds = {}  # user id -> future of the index being built
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.encoder = get_encoder(app.config['SIMILARITY_ENCODER'], dim=app.config['SIMILARITY_DIM'])
+        self.max_bytes = app.config['SIMILARITY_CACHE_MB'] * 2 ** 20
+        self.build_wait = app.config['SIMILARITY_BUILD_WAIT']
+        self.executor = ThreadPoolExecutor(max_workers=app.config['SIMILARITY_BUILD_WORKERS'], thread_name_prefix='similarity')
+
+    def _user_lock(self, user_id):
+        with self._lock:
+            return self._locks.setdefault(user_id, threading.Lock())
+
+    def _load(self, user_id, ids=None, batch_size=1000):
+        """Yield (id, text) for the user's memories, optionally only ids"""
+        query = db.session.query(Memory.id, Memory.title, Memory.content, Memory.tags)\
+            .filter(Memory.user_id == user_id)
+        if ids is not None:
+            query = query.filter(Memory.id.in_(ids))
+        for row in query.yield_per(batch_size):
+            yield row.id, memory_text(row.title, row.content, row.tags)
+
+    def _add_rows(self, index, rows, batch_size=1000):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                self._add_batch(index, batch)
+                batch = []
+        if batch:
+            self._add_batch(index, batch)
+
+    def _add_batch(self, index, batch):
+        vectors = self.encoder.encode([text for _, text in batch])
+        for (memory_id, _), vector in zip(batch, vectors):
+            index.add(memory_id, vector)
+
+    def _build(self, user_id, version):
+        index = VectorIndex(self.encoder.dim)
+        index.version = version  # read before the rows, later changes are replayed
+        self._add_rows(index, self._load(user_id))
+        index._prepare()
+        return index
+
+    def _run_build(self, user_id, version):
+        # Pool threads have no app context or session of their own
+        try:
+            with self.app.app_context():
+                index = self._build(user_id, version)
+            self._store(user_id, index)
+            return index
+        finally:
+            with self._lock:
+                self._builds.pop(user_id, None)
+
+    def _start_build(self, user_id, version):
+        with self._lock:
+            future = self._builds.get(user_id)
+            if future is None:
+                future = self._builds[user_id] = self.executor.submit(self._run_build, user_id, version)
+        return future
+
+    def _store(self, user_id, index):
+        with self._lock:
+            self._indexes[user_id] = index
+            self._indexes.move_to_end(user_id)
+            total = sum(cached.nbytes for cached in self._indexes.values())
+            while total > self.max_bytes and len(self._indexes) > 1:
+                evicted, dropped = self._indexes.popitem(last=False)
+                self._locks.pop(evicted, None)
+                total -= dropped.nbytes
+
+    def _catch_up(self, user_id, index, version):
+        """Apply the change log to the index, None when a rebuild would be cheaper"""
+        changes = db.session.query(ChangeLogEntry.entity_id, ChangeLogEntry.operation)\
+            .filter(
+                ChangeLogEntry.user_id == user_id,
+                ChangeLogEntry.version > index.version,
+                ChangeLogEntry.entity_type == 'memory'
+            )\
+            .order_by(ChangeLogEntry.version, ChangeLogEntry.id)\
+            .all()
+
+        latest = dict(changes)
+        if len(latest) > max(len(index), 100) * self.rebuild_ratio:
+            return None
+
+        for memory_id, operation in latest.items():
+            if operation == 'delete':
+                index.remove(memory_id)
+
+        upserted = [memory_id for memory_id, operation in latest.items() if operation == 'upsert']
+        found = set()
+        for start in range(0, len(upserted), 1000):
+            rows = list(self._load(user_id, upserted[start:start + 1000]))
+            found.update(memory_id for memory_id, _ in rows)
+            self._add_rows(index, rows)
+        # Upserted, then deleted after the version we read
+        for memory_id in set(upserted) - found:
+            index.remove(memory_id)
+
+        index.version = version
+        index._prepare()
+        return index
+
+    def index_for(self, user_id):
+        """The user's index, brought up to date with the change log
+
+        Raises IndexBuilding when it has to be (re)built and the build takes
+        longer than build_wait.
+        """
+        version = get_version(user_id)
+
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None:
+                self._indexes.move_to_end(user_id)
+
+        if index is not None and index.version != version:
+            index = self._catch_up(user_id, index, version)
+            if index is None:
+                with self._lock:
+                    self._indexes.pop(user_id, None)
+            else:
+                self._store(user_id, index)
+
+        if index is None:
+            future = self._start_build(user_id, version)
+            try:
+                index = future.result(timeout=self.build_wait)
+            except TimeoutError:
+                raise IndexBuilding('The similarity index is being built')
+            if index.version != version:
+                # Built from an older version by a search still running
+                index = self._catch_up(user_id, index, version) or index
+        return index
+
+    def similar_to_memory(self, user_id, memory_id, k=10):
+        """Memories most similar to memory_id, None if the memory isn't the user's"""
+        with self._user_lock(user_id):
+            index = self.index_for(user_id)
+            vector = index.vector(memory_id)
+            if vector is None:
+                return None
+            return index.search(vector, k, exclude=memory_id)
+
+    def similar_to_text(self, user_id, text, k=10):
+        vector = self.encoder.encode([text])[0]
+        with self._user_lock(user_id):
+            return self.index_for(user_id).search(vector, k)
+
+similarity_index = SimilarityIndex()
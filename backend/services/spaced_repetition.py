@@ -0,0 +1,146 @@
+from database import db
+from models.reminder import Reminder, ReminderType
+from models.review_state import ReviewState
+from services.changelog import log_changes
+from sqlalchemy import event, select, bindparam
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+import numpy as np
+
+# SM-2 grades: 0-2 failed recall, 3 hard, 4 good, 5 easy
+GRADES = range(0, 6)
+DEFAULT_GRADE = 4
+PASSING_GRADE = 3
+
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+
+def next_ease(ease, grade):
+    return max(MIN_EASE, ease + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
+
+def next_interval(state, grade):
+    """SM-2 interval in days after a review of grade, before the modifier and cap"""
+    if grade < PASSING_GRADE:
+        return 1.0
+    if state.repetitions == 0:
+        return 1.0
+    if state.repetitions == 1:
+        return 6.0
+    return state.interval_days * state.ease
+
+class SpacedRepetition:
+    """SM-2 scheduling for spaced_repetition reminders
+
+    A card's ease, interval and streak live in review_states, its due date
+    is the reminder's trigger_date, so the review queue, the upcoming and
+    overdue listings and the reminder scheduler all read one pending
+    trigger_date index. A review is a primary key read and one update.
+
+    REVIEW_INTERVAL_MODIFIER and REVIEW_MAX_INTERVAL_DAYS apply on top of
+    the stored intervals; after changing them, `flask reschedule-reviews`
+    moves every card's due date to match.
+    """
+
+    def __init__(self):
+        self.interval_modifier = 1.0
+        self.max_interval_days = 365.0
+
+    def init_app(self, app):
+        self.interval_modifier = app.config['REVIEW_INTERVAL_MODIFIER']
+        self.max_interval_days = app.config['REVIEW_MAX_INTERVAL_DAYS']
+
+    def scheduled_days(self, interval_days):
+        return min(max(interval_days * self.interval_modifier, 1.0), self.max_interval_days)
+
+    def states_for(self, reminders):
+        """Review states of the reminders keyed by reminder id, with one query"""
+        ids = [reminder.id for reminder in reminders]
+        if not ids:
+            return {}
+        return {state.reminder_id: state for state in ReviewState.query.filter(ReviewState.reminder_id.in_(ids))}
+
+    def review(self, reminder, grade, now=None, state=None):
+        """Record a review and move the reminder to its next due date, returns the state
+
+        Pass the reminder's state when it was already loaded (see states_for).
+        """
+        now = now or datetime.utcnow()
+        if state is None:
+            state = db.session.get(ReviewState, reminder.id)
+        if state is None:
+            state = ReviewState(reminder.id, reminder.user_id, ease=INITIAL_EASE)
+            db.session.add(state)
+
+        interval = next_interval(state, grade)
+        state.repetitions = state.repetitions + 1 if grade >= PASSING_GRADE else 0
+        state.lapses += grade < PASSING_GRADE
+        state.ease = next_ease(state.ease, grade)
+        state.interval_days = interval
+        state.last_grade = grade
+        state.last_reviewed_at = now
+
+        reminder.trigger_date = now + timedelta(days=self.scheduled_days(interval))
+        return state
+
+    def priority(self, trigger_date, interval_days, now):
+        """How late a due card is relative to its interval, new cards count as one day"""
+        if trigger_date is None:
+            return 0.0
+        return (now - trigger_date).total_seconds() / 86400 / self.scheduled_days(interval_days or 1.0)
+
+    def reschedule_all(self, batch_size=10000):
+        """Recompute every pending card's due date from its last review and the current parameters
+
+        Cards are read in keyset batches and their due dates computed with
+        NumPy in one pass per batch; only cards whose due date moved are
+        written, each batch in its own transaction with its change log
+        entries. Returns the number of rescheduled cards.
+        """
+        table = Reminder.__table__
+        update = table.update().where(table.c.id == bindparam('_id')).values(trigger_date=bindparam('_due'))
+        position = 0
+        rescheduled = 0
+
+        while True:
+            rows = db.session.execute(
+                select(ReviewState.reminder_id, ReviewState.user_id, ReviewState.interval_days,
+                       ReviewState.last_reviewed_at, Reminder.trigger_date)
+                .join(Reminder, Reminder.id == ReviewState.reminder_id)
+                .where(
+                    ReviewState.reminder_id > position,
+                    ReviewState.last_reviewed_at.isnot(None),
+                    Reminder.reminder_type == ReminderType.spaced_repetition,
+                    Reminder.is_completed == False
+                )
+                .order_by(ReviewState.reminder_id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            position = rows[-1].reminder_id
+
+            ids, user_ids, intervals, reviewed_at, due_at = zip(*rows)
+            days = np.clip(np.array(intervals, dtype=np.float64) * self.interval_modifier, 1.0, self.max_interval_days)
+            due = np.array(reviewed_at, dtype='datetime64[us]') + (days * 86400e6).astype('timedelta64[us]')
+            moved = np.flatnonzero(due != np.array(due_at, dtype='datetime64[us]'))
+
+            if len(moved):
+                due = due.astype(datetime)
+                connection = db.session.connection()
+                connection.execute(update, [{'_id': ids[i], '_due': due[i]} for i in moved])
+                users = {user_ids[i] for i in moved}
+                log_changes(connection, users, [(user_ids[i], 'reminder', ids[i], 'upsert') for i in moved])
+                db.session.commit()
+                rescheduled += len(moved)
+
+        return rescheduled
+
+spaced_repetition = SpacedRepetition()
+
+# A deleted reminder's state goes before the flush so the foreign key holds
+@event.listens_for(Session, 'before_flush')
+def _delete_review_states(session, flush_context, instances):
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, Reminder) and obj.id is not None]
+    if deleted:
+        table = ReviewState.__table__
+        session.connection().execute(table.delete().where(table.c.reminder_id.in_(deleted)))
@@ -0,0 +1,105 @@
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from collections import Counter
+import json
+import re
+import time
+
+# Collapse literals so "IN (1, 2)" and "IN (3, 4, 5)" count as one statement shape
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+PLACEHOLDER_LISTS = re.compile(r'\((?:\s*(?:\?|%\(\w+\)s|%s|:\w+|__\[POSTCOMPILE_\w+\])\s*,?)+\)')
+
+def statement_shape(statement):
+    shape = LITERALS.sub('?', statement)
+    shape = PLACEHOLDER_LISTS.sub('(?)', shape)
+    return ' '.join(shape.split())
+
+class RequestProfile:
+    def __init__(self):
+        self.statements = []  # (statement, seconds)
+
+    def summary(self, slowest, repeat_threshold):
+        shapes = Counter(statement_shape(statement) for statement, _ in self.statements)
+        ranked = sorted(self.statements, key=lambda item: item[1], reverse=True)[:slowest]
+        return {
+            'queries': len(self.statements),
+            'db_ms': round(sum(seconds for _, seconds in self.statements) * 1000, 2),
+            'slowest': [{'ms': round(seconds * 1000, 2), 'sql': ' '.join(statement.split())[:300]}
+                        for statement, seconds in ranked],
+            # The same statement shape run again and again is usually a lazy load in a loop
+            'repeated': [{'count': count, 'sql': shape[:300]}
+                         for shape, count in shapes.most_common() if count >= repeat_threshold]
+        }
+
+class SQLProfiler:
+    """Opt-in per-request query counts and timings (SQL_PROFILING)
+
+    "headers" adds a Server-Timing header to every response, "log" writes one
+    JSON line per request to the app log, at WARNING when a statement shape
+    repeats SQL_PROFILING_REPEAT_THRESHOLD times or more (likely N+1).
+    """
+
+    def __init__(self):
+        self.sinks = set()
+        self.slowest = 3
+        self.repeat_threshold = 5
+        self.logger = None
+
+    def init_app(self, app, db):
+        self.sinks = {sink.strip() for sink in app.config['SQL_PROFILING'].split(',') if sink.strip()} - {'off'}
+        unknown = self.sinks - {'headers', 'log'}
+        if unknown:
+            raise ValueError(f'Unknown SQL_PROFILING sink: {", ".join(sorted(unknown))}')
+        if not self.sinks:
+            return
+
+        self.slowest = app.config['SQL_PROFILING_SLOWEST']
+        self.repeat_threshold = app.config['SQL_PROFILING_REPEAT_THRESHOLD']
+        self.logger = app.logger
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('profiler_started_at', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started_at = conn.info['profiler_started_at'].pop()
+        # Background threads (access tracker, scheduler) have no request to report to
+        if has_request_context() and 'sql_profile' in g:
+            g.sql_profile.statements.append((statement, time.perf_counter() - started_at))
+
+    def _start(self):
+        g.sql_profile = RequestProfile()
+
+    def _finish(self, response):
+        profile = g.pop('sql_profile', None)
+        if profile is None:
+            return response
+
+        summary = profile.summary(self.slowest, self.repeat_threshold)
+
+        if 'headers' in self.sinks:
+            response.headers.add('Server-Timing', f'db;dur={summary["db_ms"]};desc="{summary["queries"]} queries"')
+
+        if 'log' in self.sinks:
+            line = json.dumps({
+                'event': 'sql_profile',
+                'method': request.method,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                **summary
+            })
+            if summary['repeated']:
+                self.logger.warning(line)
+            else:
+                self.logger.info(line)
+
+        return response
+
+sql_profiler = SQLProfiler()
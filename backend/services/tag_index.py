@@ -0,0 +1,90 @@
+from database import db
+from models.memory import Memory
+from models.memory_tag import MemoryTag
+from sqlalchemy import event, inspect, select, intersect, func, desc
+from sqlalchemy.orm import Session
+
+MAX_TAG_LENGTH = 100
+
+def normalize_tag(tag):
+    """Tags match case-insensitively and ignoring surrounding whitespace"""
+    return str(tag).strip().lower()[:MAX_TAG_LENGTH]
+
+def normalize_tags(tags):
+    if not isinstance(tags, list):
+        return set()
+    return {normalize_tag(tag) for tag in tags if tag is not None} - {''}
+
+def parse_tag_list(value):
+    """Normalized tags of a comma separated query value"""
+    return sorted(normalize_tags(value.split(',')))
+
+def _tag_rows(memories):
+    return [
+        {'user_id': memory.user_id, 'tag': tag, 'memory_id': memory.id}
+        for memory in memories for tag in normalize_tags(memory.tags)
+    ]
+
+def _delete_rows(connection, memory_ids):
+    table = MemoryTag.__table__
+    connection.execute(table.delete().where(table.c.memory_id.in_(memory_ids)))
+
+# Rows are written on the flush connection, so the index commits or rolls back
+# together with the memories it describes. Deleted memories lose their rows
+# before the flush so the foreign key is never left dangling.
+@event.listens_for(Session, 'before_flush')
+def _unindex_deleted(session, flush_context, instances):
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, Memory) and obj.id is not None]
+    if deleted:
+        _delete_rows(session.connection(), deleted)
+
+@event.listens_for(Session, 'after_flush')
+def _index_written(session, flush_context):
+    stale = []
+    fresh = [obj for obj in session.new if isinstance(obj, Memory)]
+
+    for obj in session.dirty:
+        if isinstance(obj, Memory) and inspect(obj).attrs.tags.history.has_changes():
+            stale.append(obj.id)
+            fresh.append(obj)
+
+    connection = session.connection()
+    if stale:
+        _delete_rows(connection, stale)
+    rows = _tag_rows(fresh)
+    if rows:
+        connection.execute(MemoryTag.__table__.insert(), rows)
+
+def _tagged(user_id, tag):
+    return select(MemoryTag.memory_id).where(MemoryTag.user_id == user_id, MemoryTag.tag == tag)
+
+def filter_by_tags(query, user_id, all_tags=(), any_tags=()):
+    """Restrict a Memory query to memories carrying every tag in all_tags and at least one of any_tags
+
+    Each tag is one lookup on the (user_id, tag) primary key, and the
+    database intersects the resulting id sets.
+    """
+    sets = [_tagged(user_id, tag) for tag in all_tags]
+    if any_tags:
+        sets.append(select(MemoryTag.memory_id).where(MemoryTag.user_id == user_id, MemoryTag.tag.in_(any_tags)))
+    if not sets:
+        return query
+
+    matches = sets[0] if len(sets) == 1 else intersect(*sets)
+    return query.filter(Memory.id.in_(matches))
+
+def tag_counts(user_id, prefix='', limit=20):
+    """(tag, memory count) pairs for the user's tags starting with prefix, most used first"""
+    count = func.count(MemoryTag.memory_id)
+    query = db.session.query(MemoryTag.tag, count).filter(MemoryTag.user_id == user_id)
+
+    prefix = normalize_tag(prefix)
+    if prefix:
+        # A range on the key is a plain index scan, startswith escapes LIKE wildcards
+        query = query.filter(
+            MemoryTag.tag >= prefix,
+            MemoryTag.tag < prefix + '\U0010ffff',
+            MemoryTag.tag.startswith(prefix, autoescape=True)
+        )
+
+    return query.group_by(MemoryTag.tag).order_by(desc(count), MemoryTag.tag).limit(limit).all()
@@ -0,0 +1,70 @@
+from flask import jsonify
+from database import db
+from models.user import User, SNAPSHOT_COLUMNS
+from services.cache import LRUCache
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+class UserCache:
+    """Resolves the JWT identity to a read-only user snapshot
+
+    Flask-JWT-Extended keeps the loaded user for the rest of the request, and
+    this cache keeps it per process for USER_CACHE_TTL seconds, so auth context
+    costs no query on most requests. Commits that change a user drop its entry
+    in this process, other workers see the change within the TTL.
+    """
+
+    def __init__(self):
+        self.store = None
+        self.ttl = 0
+
+    def init_app(self, app, jwt):
+        self.ttl = app.config['USER_CACHE_TTL']
+        self.store = LRUCache(app.config['USER_CACHE_MAX_ENTRIES']) if self.ttl else None
+
+        @jwt.user_lookup_loader
+        def _load_user(jwt_header, jwt_data):
+            return self.get(jwt_data[app.config['JWT_IDENTITY_CLAIM']])
+
+        @jwt.user_lookup_error_loader
+        def _user_not_found(jwt_header, jwt_data):
+            return jsonify({'message': 'User not found'}), 404
+
+    def get(self, user_id, fresh=False):
+        """Snapshot row for user_id (see SNAPSHOT_COLUMNS), None if the user doesn't exist
+
+        fresh reads the row even when it is cached, for responses that are
+        themselves cached under the user's change version.
+        """
+        if self.store and not fresh:
+            snapshot = self.store.get(user_id)
+            if snapshot is not None:
+                return snapshot
+
+        snapshot = db.session.query(*SNAPSHOT_COLUMNS).filter(User.id == user_id).first()
+        if snapshot is not None and self.store:
+            self.store.set(user_id, snapshot, self.ttl)
+        return snapshot
+
+    def invalidate(self, user_id):
+        if self.store:
+            self.store.delete(user_id)
+
+user_cache = UserCache()
+
+# Profile, subscription and deactivation changes are dropped once committed
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_users(session, flush_context):
+    changed = session.info.setdefault('user_cache_changed', set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            changed.add(obj.id)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop('user_cache_changed', ()):
+        user_cache.invalidate(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changed_users(session):
+    session.info.pop('user_cache_changed', None)
@@ -0,0 +1,237 @@
+from database import db
+from models.memory import Memory, MemoryType, serialized_columns, serialize_memory
+from models.reminder import Reminder, ReminderType, SERIALIZED_COLUMNS as REMINDER_COLUMNS, serialize_reminder
+from sqlalchemy.exc import SQLAlchemyError, DBAPIError
+from datetime import datetime, timezone
+from services.serialization import dumps_compact, loads
+from services.pagination import keyset_ordering
+import zlib
+
+EXPORT_FORMAT_VERSION = 1
+CHUNK_SIZE = 64 * 1024
+RECORD_KEYS = {'memory': 'memories', 'reminder': 'reminders'}
+
+def _records(user_id, batch_size):
+    """Yield one dict per exported row, memories first so reminders can be relinked on import"""
+    yield {'type': 'header', 'version': EXPORT_FORMAT_VERSION, 'exported_at': datetime.utcnow().isoformat()}
+
+    # yield_per streams from a server-side cursor where the driver supports one,
+    # plain column rows never enter the identity map, so nothing accumulates.
+    # Rows come in the listings' orders, read from their indexes without a sort
+    memories = db.session.query(*serialized_columns())\
+        .filter(Memory.user_id == user_id)\
+        .order_by(*keyset_ordering(Memory.created_at, Memory.id, descending=True))\
+        .yield_per(batch_size)
+    for row in memories:
+        yield {'type': 'memory', 'data': serialize_memory(row)}
+
+    now = datetime.utcnow()
+    reminders = db.session.query(*REMINDER_COLUMNS)\
+        .filter(Reminder.user_id == user_id)\
+        .order_by(*keyset_ordering(Reminder.trigger_date, Reminder.id, nullable=True))\
+        .yield_per(batch_size)
+    for row in reminders:
+        yield {'type': 'reminder', 'data': serialize_reminder(row, now)}
+
+def export_ndjson(user_id, batch_size=1000, compress=False):
+    """Stream a user's vault as NDJSON (optionally gzip) in chunks of about CHUNK_SIZE bytes"""
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer = []
+    size = 0
+
+    for record in _records(user_id, batch_size):
+        line = dumps_compact(record) + b'\n'
+        buffer.append(line)
+        size += len(line)
+
+        if size >= CHUNK_SIZE:
+            chunk = b''.join(buffer)
+            buffer, size = [], 0
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+
+    chunk = b''.join(buffer)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+def _parse_datetime(value):
+    """ISO 8601 to the naive UTC datetimes the columns hold"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def _text(data, name):
+    value = data.get(name)
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f'{name} must be a string')
+    return value
+
+def _memory_from_record(data, user_id):
+    title = (_text(data, 'title') or '').strip()
+    if not title:
+        raise ValueError('Memory title is required')
+
+    memory_type = data.get('memory_type')
+    importance_level = data.get('importance_level')
+    tags = data.get('tags')
+
+    memory = Memory(
+        title=title[:200],
+        content=_text(data, 'content') or '',
+        user_id=user_id,
+        memory_type=MemoryType(memory_type) if memory_type in MemoryType._value2member_map_ else MemoryType.note,
+        importance_level=importance_level if isinstance(importance_level, int) and 1 <= importance_level <= 5 else 1,
+        tags=[tag for tag in tags if isinstance(tag, str)] if isinstance(tags, list) else []
+    )
+    memory.is_encrypted = bool(data.get('is_encrypted'))
+    memory.media_url = _text(data, 'media_url')
+    memory.created_at = _parse_datetime(data.get('created_at')) or datetime.utcnow()
+    memory.updated_at = _parse_datetime(data.get('updated_at')) or memory.created_at
+    memory.last_accessed = _parse_datetime(data.get('last_accessed'))
+    return memory
+
+def _reminder_from_record(data, user_id, memory_ids):
+    title = (_text(data, 'title') or '').strip()
+    if not title:
+        raise ValueError('Reminder title is required')
+
+    reminder_type = data.get('reminder_type')
+
+    reminder = Reminder(
+        title=title[:200],
+        user_id=user_id,
+        description=_text(data, 'description'),
+        reminder_type=ReminderType(reminder_type) if reminder_type in ReminderType._value2member_map_ else ReminderType.deadline,
+        trigger_date=_parse_datetime(data.get('trigger_date')),
+        repeat_pattern=_text(data, 'repeat_pattern'),
+        # Links to memories that weren't part of this import are dropped
+        memory_id=memory_ids.get(data.get('memory_id'))
+    )
+    reminder.is_completed = bool(data.get('is_completed'))
+    reminder.completed_at = _parse_datetime(data.get('completed_at'))
+    reminder.created_at = _parse_datetime(data.get('created_at')) or datetime.utcnow()
+    reminder.updated_at = _parse_datetime(data.get('updated_at')) or reminder.created_at
+    return reminder
+
+class ImportInterrupted(Exception):
+    """An import stopped by a database error, summary holds what was committed"""
+
+    def __init__(self, summary, error):
+        super().__init__(str(error))
+        self.summary = summary
+
+def _is_disconnect(error):
+    return isinstance(error, DBAPIError) and error.connection_invalidated
+
+def import_ndjson(lines, user_id, batch_size=500, memory_quota=None, max_errors=50):
+    """Import an NDJSON export line by line, committing every batch_size rows
+
+    Each batch is its own transaction. Invalid records are skipped and
+    reported by line, including ones only the database rejects: a batch
+    that fails to flush is retried a row at a time, each in a savepoint.
+    Memories past memory_quota are skipped. Returns a summary of imported
+    and skipped rows, the first max_errors line errors and the last line
+    committed; anything else, like unreadable gzip input or a lost
+    connection, raises ImportInterrupted with that summary.
+    """
+    summary = {
+        'imported': {'memories': 0, 'reminders': 0},
+        'skipped': {'memories': 0, 'reminders': 0},
+        'errors': [],
+        'committed_through_line': 0
+    }
+    memory_ids = {}      # exported id -> new id, the only state kept across batches
+    pending = []         # (line number, kind, record data, row) waiting for the next flush
+    pending_ids = set()  # exported ids of the memories in pending
+    accepted = 0         # memories imported or pending, checked against the quota
+
+    def skip(line_number, kind, error):
+        if kind in RECORD_KEYS:
+            summary['skipped'][RECORD_KEYS[kind]] += 1
+        if len(summary['errors']) < max_errors:
+            summary['errors'].append({'line': line_number, 'message': str(error)})
+
+    def imported(kind, data, row):
+        if kind == 'memory' and data.get('id') is not None:
+            memory_ids[data['id']] = row.id
+        summary['imported'][RECORD_KEYS[kind]] += 1
+
+    def flush_rows():
+        """Insert the pending rows one savepoint each, skipping the ones that fail"""
+        for line_number, kind, data, _ in pending:
+            # Rebuilt after the rollback, reminders pick up the ids of memories inserted just before
+            row = _memory_from_record(data, user_id) if kind == 'memory' else _reminder_from_record(data, user_id, memory_ids)
+            try:
+                with db.session.begin_nested():
+                    db.session.add(row)
+                    db.session.flush()
+            except (SQLAlchemyError, ValueError, TypeError, AttributeError) as e:
+                if _is_disconnect(e):
+                    raise
+                skip(line_number, kind, e)
+                continue
+            imported(kind, data, row)
+
+    def flush_batch():
+        try:
+            db.session.add_all(row for _, _, _, row in pending)
+            db.session.flush()
+        except (SQLAlchemyError, ValueError, TypeError, AttributeError) as e:
+            if _is_disconnect(e):
+                raise
+            db.session.rollback()
+            flush_rows()
+        else:
+            for _, kind, data, row in pending:
+                imported(kind, data, row)
+        db.session.commit()
+        db.session.expunge_all()
+        summary['committed_through_line'] = pending[-1][0]
+        pending.clear()
+        pending_ids.clear()
+
+    try:
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+
+            kind = None
+            try:
+                record = loads(line)
+                kind, data = record.get('type'), record.get('data') or {}
+
+                if kind == 'memory':
+                    if memory_quota is not None and accepted >= memory_quota:
+                        summary['skipped']['memories'] += 1
+                        continue
+                    pending.append((line_number, kind, data, _memory_from_record(data, user_id)))
+                    pending_ids.add(data.get('id'))
+                    accepted += 1
+                elif kind == 'reminder':
+                    # A reminder linked to a memory of the current batch needs its new id first
+                    if data.get('memory_id') is not None and data['memory_id'] in pending_ids:
+                        flush_batch()
+                    pending.append((line_number, kind, data, _reminder_from_record(data, user_id, memory_ids)))
+                else:
+                    continue
+            except (ValueError, TypeError, AttributeError) as e:
+                skip(line_number, kind, e)
+                continue
+
+            if len(pending) >= batch_size:
+                flush_batch()
+
+        if pending:
+            flush_batch()
+    except Exception as e:
+        db.session.rollback()
+        raise ImportInterrupted(summary, e) from e
+
+    return summary
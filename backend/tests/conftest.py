@@ -0,0 +1,88 @@
+import os
+import tempfile
+
+# app.py reads its configuration at import time
+_database_dir = tempfile.mkdtemp(prefix='memoryos-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_database_dir, 'test.db')}"
+os.environ['CACHE_BACKEND'] = 'none'
+os.environ['RATE_LIMIT_BACKEND'] = 'none'
+os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+os.environ['PASSWORD_HASH_WORKERS'] = '0'
+
+import itertools
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app import app as flask_app
+from database import db
+
+_emails = (f'user{n}@example.com' for n in itertools.count())
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        yield flask_app
+        db.session.remove()
+
+@pytest.fixture
+def make_client(app):
+    """Returns clients signed in as new users"""
+    def make_client():
+        client = app.test_client()
+        response = client.post('/api/auth/register', json={
+            'email': next(_emails), 'password': 'Passw0rd!test', 'name': 'Test'
+        })
+        assert response.status_code == 201, response.get_json()
+        client.user_id = response.get_json()['user']['id']
+        return client
+
+    return make_client
+
+@pytest.fixture
+def client(make_client):
+    """A client signed in as a new user"""
+    return make_client()
+
+@pytest.fixture
+def seeded(client):
+    """The client's user with memories of every type and importance, and pending,
+    overdue and completed reminders"""
+    memories = [
+        {'title': f'Memory {n}', 'content': f'content {n}', 'tags': ['seed', f't{n % 4}'],
+         'memory_type': ['note', 'process', 'learning', 'personal'][n % 4],
+         'importance_level': n % 5 + 1}
+        for n in range(40)
+    ]
+    response = client.post('/api/memories/batch', json={'memories': memories})
+    assert response.status_code == 201, response.get_json()
+
+    now = datetime.utcnow()
+    reminders = [
+        {'title': f'Reminder {n}', 'trigger_date': (now + timedelta(hours=n - 20)).isoformat()}
+        for n in range(40)
+    ]
+    response = client.post('/api/reminders/batch', json={'reminders': reminders})
+    assert response.status_code == 201, response.get_json()
+    completed = [result['reminder']['id'] for result in response.get_json()['results'][:5]]
+    response = client.post('/api/reminders/batch/complete', json={'ids': completed})
+    assert response.status_code == 200, response.get_json()
+
+    return client
+
+@contextmanager
+def recorded_statements(app):
+    """Collect the (statement, parameters) pairs sent to the database"""
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
@@ -0,0 +1,20 @@
+"""The app with a simulated database round trip, served by gunicorn in test_server_modes.py
+
+LOAD_TEST_DB_LATENCY seconds are slept before every statement, standing in
+for the network wait of a remote Postgres that SQLite doesn't have.
+"""
+import os
+import time
+
+from sqlalchemy import event
+
+from app import app
+from database import db
+
+LATENCY = float(os.getenv('LOAD_TEST_DB_LATENCY', 0.005))
+
+with app.app_context():
+    @event.listens_for(db.engine, 'before_cursor_execute')
+    def _round_trip(connection, cursor, statement, parameters, context, executemany):
+        # time.sleep yields to other requests under gevent, as a socket wait would
+        time.sleep(LATENCY)
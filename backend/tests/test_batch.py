@@ -0,0 +1,55 @@
+import pytest
+
+def _statuses(response):
+    return [result['status'] for result in response.get_json()['results']]
+
+def test_reminder_batch_accepts_utc_and_offset_timestamps(client):
+    response = client.post('/api/reminders/batch', json={'reminders': [
+        {'title': 'Zulu', 'trigger_date': '2030-01-01T09:00:00Z'},
+        {'title': 'Offset', 'trigger_date': '2030-01-01T09:00:00+02:00'},
+        {'title': 'Naive', 'trigger_date': '2030-01-01T09:00:00'},
+    ]})
+
+    assert response.status_code == 201, response.get_json()
+    dates = [result['reminder']['trigger_date'] for result in response.get_json()['results']]
+    assert dates == ['2030-01-01T09:00:00', '2030-01-01T07:00:00', '2030-01-01T09:00:00']
+
+def test_single_reminder_with_a_utc_timestamp(client):
+    response = client.post('/api/reminders/', json={'title': 'Zulu', 'trigger_date': '2020-01-01T09:00:00.000Z'})
+
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json()['reminder']['is_overdue'] is True
+
+@pytest.mark.parametrize('path, key, bad_item', [
+    ('/api/memories/batch', 'memories', {'title': 123}),
+    ('/api/memories/batch', 'memories', {'title': 'Bad tags', 'tags': 5}),
+    ('/api/memories/batch', 'memories', {'title': 'Bad tags', 'tags': [{'a': 1}]}),
+    ('/api/reminders/batch', 'reminders', {'title': 123, 'trigger_date': '2030-01-01T00:00:00'}),
+    ('/api/reminders/batch', 'reminders', {'title': 'Bad date', 'trigger_date': '2030-13-01T00:00:00Z'}),
+    ('/api/reminders/batch', 'reminders', {'title': 'Bad date', 'trigger_date': 5}),
+])
+def test_a_bad_item_fails_alone(client, path, key, bad_item):
+    good = {'title': 'Good', 'trigger_date': '2030-01-01T00:00:00Z'} if key == 'reminders' else {'title': 'Good'}
+
+    response = client.post(path, json={key: [good, bad_item, good]})
+
+    assert response.status_code == 207, response.get_json()
+    assert _statuses(response) == [201, 400, 201]
+    assert response.get_json()['succeeded'] == 2
+
+def test_a_bad_update_leaves_its_row_unchanged(client):
+    created = client.post('/api/reminders/batch', json={'reminders': [
+        {'title': 'First', 'trigger_date': '2030-01-01T00:00:00'},
+        {'title': 'Second', 'trigger_date': '2030-01-01T00:00:00'},
+    ]}).get_json()['results']
+    first, second = (result['reminder']['id'] for result in created)
+
+    response = client.put('/api/reminders/batch', json={'reminders': [
+        {'id': first, 'title': 'Renamed', 'trigger_date': '2031-06-01T12:00:00Z'},
+        {'id': second, 'title': 'Renamed too', 'trigger_date': 'tomorrow'},
+    ]})
+
+    assert response.status_code == 207
+    assert _statuses(response) == [200, 400]
+    assert client.get(f'/api/reminders/{first}').get_json()['reminder']['trigger_date'] == '2031-06-01T12:00:00'
+    assert client.get(f'/api/reminders/{second}').get_json()['reminder']['title'] == 'Second'
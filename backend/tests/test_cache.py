@@ -0,0 +1,88 @@
+from collections import Counter
+import pytest
+
+from services import cache as cache_module
+from services.cache import LRUCache, response_cache
+
+@pytest.fixture
+def lru(monkeypatch):
+    """Turn on the in-process response cache with empty stats"""
+    backend = LRUCache(max_entries=64)
+    monkeypatch.setattr(response_cache, 'backend', backend)
+    monkeypatch.setattr(response_cache, 'hits', Counter())
+    monkeypatch.setattr(response_cache, 'misses', Counter())
+    return backend
+
+def test_repeated_reads_hit(client, lru):
+    client.post('/api/memories/', json={'title': 'Cached'})
+
+    first = client.get('/api/memories/')
+    second = client.get('/api/memories/')
+
+    assert first.status_code == second.status_code == 200
+    assert second.get_data() == first.get_data()
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert response_cache.hits['memories.get_memories'] == 1
+    assert response_cache.misses['memories.get_memories'] == 1
+
+def test_a_write_moves_readers_to_a_new_key(client, lru):
+    client.post('/api/memories/', json={'title': 'First'})
+    before = client.get('/api/memories/')
+
+    client.post('/api/memories/', json={'title': 'Second'})
+    after = client.get('/api/memories/')
+
+    assert after.headers['ETag'] != before.headers['ETag']
+    assert [memory['title'] for memory in after.get_json()['memories']] == ['Second', 'First']
+    assert response_cache.misses['memories.get_memories'] == 2
+
+def test_entries_are_per_user_and_query(make_client, lru):
+    alice, bob = make_client(), make_client()
+    alice.post('/api/memories/', json={'title': 'Alice'})
+    alice.get('/api/memories/')
+
+    bob.post('/api/memories/', json={'title': 'Bob'})
+    page = alice.get('/api/memories/')
+    other_query = alice.get('/api/memories/?per_page=5')
+
+    assert [memory['title'] for memory in page.get_json()['memories']] == ['Alice']
+    assert response_cache.hits['memories.get_memories'] == 1
+    assert response_cache.misses['memories.get_memories'] == 2
+    assert other_query.status_code == 200
+
+def test_errors_are_not_cached(client, lru):
+    response = client.get('/api/memories/?cursor=not-a-cursor')
+
+    assert response.status_code == 400
+    assert len(lru._entries) == 0
+
+def test_stats_report_the_hit_ratio(client, lru):
+    client.get('/api/memories/tags')
+    client.get('/api/memories/tags')
+
+    stats = client.get('/api/health/cache').get_json()
+
+    assert stats['backend'] == 'LRUCache'
+    assert stats['hit_ratio'] == 0.5
+    assert stats['endpoints']['memories.get_tags'] == {'hits': 1, 'misses': 1}
+
+def test_lru_evicts_the_least_recently_used():
+    store = LRUCache(max_entries=2)
+    store.set('a', 1, ttl=60)
+    store.set('b', 2, ttl=60)
+    store.get('a')
+
+    store.set('c', 3, ttl=60)
+
+    assert (store.get('a'), store.get('b'), store.get('c')) == (1, None, 3)
+
+def test_lru_entries_expire(monkeypatch):
+    store = LRUCache()
+    clock = [100.0]
+    monkeypatch.setattr(cache_module.time, 'monotonic', lambda: clock[0])
+    store.set('a', 1, ttl=30)
+
+    clock[0] += 29
+    assert store.get('a') == 1
+    clock[0] += 2
+    assert store.get('a') is None
@@ -0,0 +1,57 @@
+import pytest
+from database import db
+from models.user_counter import UserCounter
+from services.counters import get_counters, MEMORIES, CHANGES
+
+def _delete_counters(user_id, name=None):
+    query = UserCounter.query.filter_by(user_id=user_id)
+    if name:
+        query = query.filter_by(name=name)
+    query.delete()
+    db.session.commit()
+
+def test_registration_creates_every_counter(client):
+    counters = get_counters(client.user_id, reconcile_missing=False)
+
+    assert counters[MEMORIES] == 0
+    assert CHANGES in counters
+
+@pytest.mark.parametrize('deleted', [None, CHANGES])
+def test_missing_counter_rows_are_rebuilt(seeded, deleted):
+    version = get_counters(seeded.user_id)[CHANGES]
+    _delete_counters(seeded.user_id, deleted)
+
+    # The first read rebuilds the rows, later reads must find the version row
+    for _ in range(2):
+        response = seeded.get('/api/memories/stats')
+        assert response.status_code == 200
+        assert response.get_json()['total_memories'] == 40
+
+    counters = get_counters(seeded.user_id, reconcile_missing=False)
+    assert counters[MEMORIES] == 40
+    # Restarts from the change log, never below a version clients were given
+    assert counters[CHANGES] == version
+
+def test_writes_after_a_rebuild_move_the_version(seeded):
+    _delete_counters(seeded.user_id)
+    etag = seeded.get('/api/memories/stats').headers['ETag']
+
+    response = seeded.post('/api/memories/', json={'title': 'After the rebuild', 'content': ''})
+    assert response.status_code == 201
+
+    response = seeded.get('/api/memories/stats', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['total_memories'] == 41
+
+@pytest.mark.parametrize('url', [
+    '/api/memories/', '/api/memories/tags', '/api/memories/stats', '/api/memories/similar?q=memory',
+    '/api/reminders/', '/api/reminders/upcoming', '/api/reminders/overdue', '/api/reminders/review-queue',
+    '/api/users/subscription', '/api/users/dashboard', '/api/sync'
+])
+def test_versioned_endpoints_survive_a_lost_version(seeded, url):
+    # Similar memories are a premium feature
+    assert seeded.post('/api/users/subscription/upgrade').status_code == 200
+    _delete_counters(seeded.user_id, CHANGES)
+
+    for _ in range(2):
+        assert seeded.get(url).status_code == 200
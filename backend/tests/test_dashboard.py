@@ -0,0 +1,94 @@
+from datetime import datetime
+import time
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import ProgrammingError
+
+from conftest import recorded_statements
+from database import db
+from services.dashboard import dashboard_queries, MODES
+
+def _dashboard(client):
+    response = client.get('/api/users/dashboard')
+    assert response.status_code == 200, response.get_json()
+    return response
+
+@pytest.fixture
+def mode(monkeypatch):
+    """Set the dashboard query mode for one test"""
+    def set_mode(value):
+        monkeypatch.setattr(dashboard_queries, 'mode', value)
+    return set_mode
+
+def test_every_mode_returns_the_same_dashboard(seeded, mode):
+    bodies = {}
+    for value in MODES:
+        mode(value)
+        bodies[value] = _dashboard(seeded).get_json()
+
+    assert bodies['combined'] == bodies['concurrent'] == bodies['sequential']
+    stats = bodies['combined']['stats']
+    assert stats['memory_count'] == 40
+    assert stats['reminder_count'] == 40
+    assert stats['overdue_reminders'] == 16  # n <= 20 of the seeded reminders, 5 completed
+    assert len(bodies['combined']['recent_memories']) == 5
+    assert [memory['title'] for memory in bodies['combined']['recent_memories']][0] == 'Memory 39'
+
+@pytest.mark.parametrize('value, timings', [
+    ('combined', ['dashboard-combined']),
+    ('sequential', ['dashboard-counters', 'dashboard-recent-memories', 'dashboard-upcoming-reminders', 'dashboard-overdue-reminders']),
+])
+def test_server_timing_names_each_query(client, mode, value, timings):
+    mode(value)
+
+    header = _dashboard(client).headers['Server-Timing']
+
+    assert [entry.split(';')[0] for entry in header.split(', ')] == timings
+    assert all(float(entry.split('dur=')[1]) >= 0 for entry in header.split(', '))
+
+def test_combined_reads_in_one_statement(app, seeded, mode):
+    counts = {}
+    for value in ('combined', 'sequential'):
+        mode(value)
+        with recorded_statements(app) as statements:
+            _dashboard(seeded)
+        counts[value] = len(statements)
+
+    assert counts['sequential'] - counts['combined'] == 3
+
+def test_a_rejected_combined_statement_switches_to_concurrent(seeded, mode, monkeypatch):
+    mode('sequential')
+    expected = _dashboard(seeded).get_json()
+    mode('combined')
+
+    def rejected(params):
+        raise ProgrammingError('SELECT', {}, Exception('UNION ALL not supported'))
+
+    monkeypatch.setattr(dashboard_queries, '_combined', rejected)
+
+    assert _dashboard(seeded).get_json() == expected
+    assert dashboard_queries.mode == 'concurrent'
+
+def test_combined_beats_sequential_with_network_latency(app, seeded, record_property):
+    """load() in each mode with a simulated 2 ms round trip per statement"""
+    def round_trip(connection, cursor, statement, parameters, context, executemany):
+        time.sleep(0.002)
+
+    event.listen(db.engine, 'before_cursor_execute', round_trip)
+    original = dashboard_queries.mode
+    timings = {}
+    try:
+        for value in MODES:
+            dashboard_queries.mode = value
+            started_at = time.perf_counter()
+            for _ in range(20):
+                dashboard_queries.load(seeded.user_id, datetime.utcnow())
+            timings[value] = (time.perf_counter() - started_at) / 20
+    finally:
+        dashboard_queries.mode = original
+        event.remove(db.engine, 'before_cursor_execute', round_trip)
+
+    for value, seconds in timings.items():
+        record_property(f'{value}_ms', round(seconds * 1000, 2))
+    assert timings['combined'] < timings['sequential']
+    assert timings['concurrent'] < timings['sequential']
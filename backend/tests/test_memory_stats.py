@@ -0,0 +1,38 @@
+from conftest import recorded_statements
+
+def test_stats_counts_every_dimension(seeded):
+    response = seeded.get('/api/memories/stats')
+
+    assert response.status_code == 200
+    assert response.get_json() == {
+        'total_memories': 40,
+        'type_counts': {'note': 10, 'process': 10, 'learning': 10, 'personal': 10},
+        'importance_counts': {'1': 8, '2': 8, '3': 8, '4': 8, '5': 8}
+    }
+
+def test_stats_for_a_user_without_memories(client):
+    stats = client.get('/api/memories/stats').get_json()
+
+    assert stats['total_memories'] == 0
+    assert set(stats['type_counts'].values()) == {0}
+    assert set(stats['importance_counts'].values()) == {0}
+
+def test_stats_reads_memories_with_one_statement(app, seeded):
+    with recorded_statements(app) as statements:
+        response = seeded.get('/api/memories/stats')
+
+    assert response.status_code == 200
+    # The change version for the ETag, then the grouped count
+    assert len(statements) == 2
+    memory_statements = [sql for sql, _ in statements if 'FROM memories' in sql]
+    assert len(memory_statements) == 1
+    assert 'GROUP BY' in memory_statements[0]
+
+def test_stats_revalidation_skips_the_count(app, seeded):
+    etag = seeded.get('/api/memories/stats').headers['ETag']
+
+    with recorded_statements(app) as statements:
+        response = seeded.get('/api/memories/stats', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert not [sql for sql, _ in statements if 'FROM memories' in sql]
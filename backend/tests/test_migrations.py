@@ -0,0 +1,71 @@
+import importlib.util
+import os
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, select, text
+
+from database import db
+from models.memory_tag import MemoryTag
+
+VERSIONS = os.path.join(os.path.dirname(__file__), '..', 'migrations', 'versions')
+
+def _migration(name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(VERSIONS, f'{name}.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def _upgrade(engine, migration):
+    with engine.begin() as connection:
+        with Operations.context(MigrationContext.configure(connection)):
+            migration.upgrade()
+
+@pytest.fixture
+def engine(app, tmp_path):
+    """A database with the app's tables and no migrations applied"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    db.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+def _insert_memories(engine, tags_by_id):
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (id, email, password, name) VALUES (1, 'a@example.com', 'x', 'A')"))
+        for memory_id, tags in tags_by_id.items():
+            connection.execute(
+                text("INSERT INTO memories (id, user_id, title, tags, memory_type, importance_level) "
+                     "VALUES (:id, 1, 'Memory', :tags, 'note', 1)"),
+                {'id': memory_id, 'tags': tags}
+            )
+
+def _tag_rows(engine):
+    with engine.connect() as connection:
+        return sorted(connection.execute(select(MemoryTag.memory_id, MemoryTag.tag)).all())
+
+def test_backfill_indexes_memories_without_rows(engine, monkeypatch):
+    migration = _migration('f3b8d1c6a427_backfill_memory_tags')
+    monkeypatch.setattr(migration, 'BATCH_SIZE', 2)
+    _insert_memories(engine, {
+        1: '["Work", " work ", "Ideas"]',
+        2: '[]',
+        3: None,
+        4: '[null, "", 7]',
+        5: '["indexed"]',
+    })
+    with engine.begin() as connection:
+        connection.execute(MemoryTag.__table__.insert(), [{'user_id': 1, 'tag': 'indexed', 'memory_id': 5}])
+
+    _upgrade(engine, migration)
+
+    assert _tag_rows(engine) == [(1, 'ideas'), (1, 'work'), (4, '7'), (5, 'indexed')]
+
+def test_backfill_creates_the_table_and_can_run_again(engine):
+    migration = _migration('f3b8d1c6a427_backfill_memory_tags')
+    MemoryTag.__table__.drop(engine)
+    _insert_memories(engine, {1: '["Work"]'})
+
+    _upgrade(engine, migration)
+    _upgrade(engine, migration)
+
+    assert _tag_rows(engine) == [(1, 'work')]
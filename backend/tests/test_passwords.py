@@ -0,0 +1,129 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import threading
+import time
+import pytest
+from werkzeug.security import generate_password_hash
+
+from database import db
+from models.user import User
+from services import passwords
+from services.passwords import PasswordHasher, HasherBusy, password_hasher
+
+def _hasher(method='pbkdf2:sha256:1000', workers=2, max_queued=4):
+    hasher = PasswordHasher()
+    hasher.init_app(SimpleNamespace(config={
+        'PASSWORD_HASH_METHOD': method,
+        'PASSWORD_HASH_WORKERS': workers,
+        'PASSWORD_HASH_MAX_QUEUED': max_queued
+    }))
+    return hasher
+
+def _register(app, email, password='Passw0rd!test'):
+    client = app.test_client()
+    response = client.post('/api/auth/register', json={'email': email, 'password': password, 'name': 'Hash'})
+    assert response.status_code == 201, response.get_json()
+    return client
+
+def test_pooled_hashes_verify(app):
+    hasher = _hasher()
+
+    hashed = hasher.hash('secret')
+
+    assert hashed.startswith('pbkdf2:sha256:1000$')
+    assert hasher.verify(hashed, 'secret')
+    assert not hasher.verify(hashed, 'wrong')
+    stats = hasher.stats()
+    assert stats['completed'] == 3
+    assert stats['queued'] == stats['running'] == 0
+    assert stats['avg_hash_ms'] is not None
+
+def test_a_full_queue_is_rejected(app):
+    hasher = _hasher(workers=1, max_queued=0)
+    started, release = threading.Event(), threading.Event()
+
+    def blocked():
+        started.set()
+        release.wait(5)
+
+    caller = threading.Thread(target=hasher._run, args=(blocked,))
+    caller.start()
+    started.wait(5)
+    try:
+        with pytest.raises(HasherBusy):
+            hasher.hash('secret')
+    finally:
+        release.set()
+        caller.join()
+
+    assert hasher.stats()['rejected'] == 1
+    assert hasher.verify(hasher.hash('secret'), 'secret')
+
+def test_busy_hasher_answers_503(app, monkeypatch):
+    _register(app, email='busy@example.com')
+
+    def busy(*args):
+        raise HasherBusy('Too many password operations in progress')
+
+    monkeypatch.setattr(password_hasher, 'verify', busy)
+    monkeypatch.setattr(password_hasher, 'hash', busy)
+    client = app.test_client()
+
+    login = client.post('/api/auth/login', json={'email': 'busy@example.com', 'password': 'Passw0rd!test'})
+    register = client.post('/api/auth/register', json={'email': 'busy2@example.com', 'password': 'Passw0rd!test'})
+
+    assert login.status_code == register.status_code == 503
+    assert login.headers['Retry-After'] == '1'
+
+def test_login_rehashes_with_the_configured_method(app, monkeypatch):
+    _register(app, email='rehash@example.com')
+    user = User.query.filter_by(email='rehash@example.com').one()
+    assert not user.password_needs_rehash()
+
+    monkeypatch.setattr(password_hasher, 'method', 'pbkdf2:sha256:2000')
+    monkeypatch.setattr(password_hasher, 'prefix', 'pbkdf2:sha256:2000')
+    credentials = {'email': 'rehash@example.com', 'password': 'Passw0rd!test'}
+    assert app.test_client().post('/api/auth/login', json=credentials).status_code == 200
+
+    db.session.expire_all()
+    assert User.query.filter_by(email='rehash@example.com').one().password.startswith('pbkdf2:sha256:2000$')
+    assert app.test_client().post('/api/auth/login', json=credentials).status_code == 200
+
+def test_other_methods_need_a_rehash():
+    hasher = _hasher(method='pbkdf2:sha256:1000', workers=0)
+
+    assert hasher.needs_rehash(generate_password_hash('x', method='pbkdf2:sha256:2000'))
+    assert hasher.needs_rehash(generate_password_hash('x', method='scrypt:16384:8:1'))
+    assert not hasher.needs_rehash(hasher.hash('x'))
+
+def test_login_throughput_under_concurrency(monkeypatch, record_property):
+    """32 concurrent checks at a realistic cost, inline on every thread against a pool of 2"""
+    method = 'pbkdf2:sha256:100000'
+    hashed = generate_password_hash('secret', method=method)
+    running, peak = [0], {}
+    lock = threading.Lock()
+    check = passwords.check_password_hash
+
+    def counted(*args):
+        with lock:
+            running[0] += 1
+            peak[current] = max(peak.get(current, 0), running[0])
+        try:
+            return check(*args)
+        finally:
+            with lock:
+                running[0] -= 1
+
+    monkeypatch.setattr(passwords, 'check_password_hash', counted)
+    for current, workers in (('inline', 0), ('pool', 2)):
+        hasher = _hasher(method=method, workers=workers, max_queued=64)
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=8) as clients:
+            results = list(clients.map(lambda _: hasher.verify(hashed, 'secret'), range(32)))
+        elapsed = time.perf_counter() - started_at
+
+        assert all(results)
+        record_property(f'{current}_logins_per_second', round(32 / elapsed, 1))
+        record_property(f'{current}_peak_hashing', peak[current])
+
+    assert peak['pool'] <= 2
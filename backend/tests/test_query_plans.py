@@ -0,0 +1,108 @@
+import pytest
+from conftest import recorded_statements
+from database import db
+
+# Every list route and the query shapes it serves; {cursor} is replaced by the
+# next_cursor of the same URL's first page, so keyset pages are covered too
+LIST_ROUTES = {
+    'memories.get_memories': [
+        '/api/memories/',
+        '/api/memories/?page=2&per_page=10',
+        '/api/memories/?type=process',
+        '/api/memories/?importance=3',
+        '/api/memories/?tag=seed',
+        '/api/memories/?tags_any=t1,t2',
+        '/api/memories/?fields=id,title',
+        '/api/memories/?per_page=5&cursor=',
+        '/api/memories/?per_page=5&cursor={cursor}',
+        '/api/memories/?per_page=5&type=note&cursor={cursor}',
+    ],
+    'memories.get_tags': ['/api/memories/tags', '/api/memories/tags?prefix=t'],
+    'reminders.get_reminders': [
+        '/api/reminders/',
+        '/api/reminders/?page=2&per_page=10',
+        '/api/reminders/?type=deadline',
+        '/api/reminders/?status=pending',
+        '/api/reminders/?status=completed',
+        '/api/reminders/?status=overdue',
+        '/api/reminders/?per_page=5&cursor=',
+        '/api/reminders/?per_page=5&cursor={cursor}',
+        '/api/reminders/?per_page=5&status=pending&cursor={cursor}',
+        '/api/reminders/?per_page=3&status=completed&cursor={cursor}',
+        '/api/reminders/?per_page=5&status=overdue&cursor={cursor}',
+    ],
+    'reminders.get_upcoming_reminders': ['/api/reminders/upcoming', '/api/reminders/upcoming?days=30'],
+    'reminders.get_overdue_reminders': ['/api/reminders/overdue'],
+    'reminders.get_review_queue': ['/api/reminders/review-queue'],
+    'users.get_dashboard': ['/api/users/dashboard'],
+    'users.export_vault': ['/api/users/export'],
+    'sync.sync': ['/api/sync?limit=15', '/api/sync?limit=15&since={token}', '/api/sync?limit=50&since={token}'],
+}
+
+# Parameterless GET routes that return one resource or an aggregate
+NOT_LISTS = {
+    'memories.get_memory_stats', 'memories.get_similar_memories',
+    'users.get_profile', 'users.get_subscription'
+}
+
+# Ordered by how often a tag is used, known only after counting: the sort is
+# over the (at most limit) counted tags, the memory_tags rows are read in key order
+AGGREGATE_SORTS = {'memories.get_tags': 'USE TEMP B-TREE FOR ORDER BY'}
+
+def _resolve(client, url):
+    """Fill in {cursor} or {token} from the page before"""
+    first_page = url.replace('cursor={cursor}', 'cursor=').replace('&since={token}', '')
+    if '{cursor}' in url:
+        cursor = client.get(first_page).get_json()['pagination']['next_cursor']
+        assert cursor, f'{first_page} has a single page'
+        return url.replace('{cursor}', cursor)
+    if '{token}' in url:
+        page = client.get(first_page).get_json()
+        assert page['has_more'], f'{first_page} has a single page'
+        return url.replace('{token}', page['token'])
+    return url
+
+def _query_plans(app, client, url):
+    """EXPLAIN QUERY PLAN details of every statement the request ran"""
+    with recorded_statements(app) as statements:
+        response = client.get(url)
+        response.get_data()  # streamed responses run their queries here
+    assert response.status_code == 200, response.get_json()
+
+    connection = db.session.connection()
+    return [
+        (sql, [row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}', parameters)])
+        for sql, parameters in statements
+    ]
+
+@pytest.mark.parametrize('endpoint, url', [
+    (endpoint, url) for endpoint, urls in LIST_ROUTES.items() for url in urls
+])
+def test_list_queries_read_indexes_in_order(app, seeded, endpoint, url):
+    for sql, plan in _query_plans(app, seeded, _resolve(seeded, url)):
+        details = f"{sql[:80]}... | {' | '.join(plan)}"
+        for table in ('memories', 'reminders', 'memory_tags'):
+            assert not any(step.startswith(f'SCAN {table} ') or step == f'SCAN {table}' for step in plan), details
+        sorts = [step for step in plan if 'TEMP B-TREE' in step]
+        assert sorts in ([], [AGGREGATE_SORTS.get(endpoint)]), details
+
+@pytest.mark.parametrize('url, index', [
+    ('/api/memories/', 'ix_memories_user_id_created_at_id'),
+    ('/api/reminders/', 'ix_reminders_user_id_trigger_date_id'),
+    ('/api/reminders/?status=completed', 'ix_reminders_user_id_completed_at_id'),
+    ('/api/reminders/upcoming', 'ix_reminders_user_id_trigger_date_id_pending'),
+    ('/api/reminders/overdue', 'ix_reminders_user_id_trigger_date_id_pending'),
+])
+def test_listings_search_their_index(app, seeded, url, index):
+    plans = [plan for sql, plan in _query_plans(app, seeded, url) if 'ORDER BY' in sql]
+    assert plans
+    for plan in plans:
+        assert any(step.startswith('SEARCH') and index in step for step in plan), plan
+
+def test_every_list_route_is_checked(app):
+    endpoints = {
+        rule.endpoint for rule in app.url_map.iter_rules()
+        if 'GET' in rule.methods and not rule.arguments
+        and rule.endpoint.split('.')[0] in ('memories', 'reminders', 'users', 'sync')
+    }
+    assert endpoints - NOT_LISTS == set(LIST_ROUTES)
@@ -0,0 +1,115 @@
+import pytest
+
+from services import rate_limit as rate_limit_module
+from services.rate_limit import MemoryBucketStore, parse_limit, parse_limits, rate_limiter
+
+@pytest.fixture
+def limiter(monkeypatch):
+    """Turn on in-process rate limiting, 3 tag listings a minute and 2 logins a minute"""
+    monkeypatch.setattr(rate_limiter, 'store', MemoryBucketStore())
+    monkeypatch.setattr(rate_limiter, 'limits', {
+        'memories.get_tags': parse_limit('3/minute'),
+        'auth': parse_limit('2/minute')
+    })
+    monkeypatch.setattr(rate_limiter, 'rejected', {'rate_limited': 0, 'shed': 0})
+    return rate_limiter
+
+@pytest.mark.parametrize('value, expected', [
+    ('100/minute', (100, 100 / 60)),
+    ('10/30s', (10, 10 / 30)),
+    ('5 / 2 hours', (5, 5 / 7200)),
+    ('1/day', (1, 1 / 86400)),
+])
+def test_parse_limit(value, expected):
+    assert parse_limit(value) == expected
+
+@pytest.mark.parametrize('value', ['', '0/minute', '10/fortnight', 'lots'])
+def test_parse_limit_rejects(value):
+    with pytest.raises(ValueError):
+        parse_limit(value)
+
+def test_parse_limits():
+    assert parse_limits('auth.login=10/minute, memories=120/minute,') == {
+        'auth.login': '10/minute', 'memories': '120/minute'
+    }
+
+def test_requests_over_the_limit_get_429(client, limiter):
+    statuses = [client.get('/api/memories/tags').status_code for _ in range(4)]
+
+    assert statuses == [200, 200, 200, 429]
+    response = client.get('/api/memories/tags')
+    assert int(response.headers['Retry-After']) >= 1
+    assert limiter.rejected['rate_limited'] == 2
+
+def test_limit_headers_count_down(client, limiter):
+    remaining = [client.get('/api/memories/tags').headers['X-RateLimit-Remaining'] for _ in range(3)]
+
+    assert remaining == ['2', '1', '0']
+    assert client.get('/api/memories/tags').headers['X-RateLimit-Limit'] == '3'
+
+def test_buckets_are_per_user(make_client, limiter):
+    alice, bob = make_client(), make_client()
+    for _ in range(3):
+        alice.get('/api/memories/tags')
+
+    assert alice.get('/api/memories/tags').status_code == 429
+    assert bob.get('/api/memories/tags').status_code == 200
+
+def test_anonymous_requests_are_limited_by_ip(app, limiter):
+    def login(address):
+        return app.test_client().post('/api/auth/login', json={'email': 'nobody@example.com', 'password': 'x'},
+                                      environ_base={'REMOTE_ADDR': address}).status_code
+
+    assert [login('10.0.0.1') for _ in range(3)] == [401, 401, 429]
+    assert login('10.0.0.2') == 401
+
+def test_limits_fall_back_to_blueprint_then_default(limiter):
+    assert limiter._limit_for('memories.get_tags')[0] == 'memories.get_tags'
+    assert limiter._limit_for('auth.register')[0] == 'auth'
+    assert limiter._limit_for('memories.get_memories') == ('default', limiter.default_limit)
+
+def test_exempt_views_are_not_limited(client, limiter, monkeypatch):
+    monkeypatch.setattr(limiter, 'default_limit', parse_limit('1/minute'))
+
+    assert [client.get('/api/health').status_code for _ in range(3)] == [200, 200, 200]
+
+def test_requests_over_the_in_flight_cap_get_503(client, limiter, monkeypatch):
+    monkeypatch.setattr(limiter, 'max_in_flight', 1)
+    monkeypatch.setattr(limiter, 'in_flight', 1)
+
+    response = client.get('/api/memories/')
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert limiter.in_flight == 1
+    monkeypatch.setattr(limiter, 'in_flight', 0)
+    assert client.get('/api/memories/').status_code == 200
+    assert limiter.in_flight == 0
+
+def test_buckets_refill_over_time(monkeypatch):
+    store = MemoryBucketStore()
+    clock = [1000.0]
+    monkeypatch.setattr(rate_limit_module.time, 'monotonic', lambda: clock[0])
+    capacity, rate = parse_limit('2/minute')
+
+    assert store.consume('key', capacity, rate)[0]
+    assert store.consume('key', capacity, rate)[0]
+    allowed, _, retry_after = store.consume('key', capacity, rate)
+    assert not allowed and retry_after == pytest.approx(30)
+
+    clock[0] += 30
+    assert store.consume('key', capacity, rate)[0]
+    assert not store.consume('key', capacity, rate)[0]
+
+def test_full_buckets_are_pruned(monkeypatch):
+    store = MemoryBucketStore(max_keys=2)
+    clock = [1000.0]
+    monkeypatch.setattr(rate_limit_module.time, 'monotonic', lambda: clock[0])
+    capacity, rate = parse_limit('2/minute')
+    store.consume('a', capacity, rate)
+    store.consume('b', capacity, rate)
+
+    clock[0] += 60
+    store.consume('c', capacity, rate)
+
+    assert set(store._buckets) == {'c'}
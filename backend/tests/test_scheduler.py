@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from database import db
+from models.reminder import Reminder
+from services import scheduler as scheduler_module
+from services.notifiers import MemoryNotifier
+from services.scheduler import ReminderScheduler, next_occurrence
+
+def _reminder(client, trigger_date, **fields):
+    response = client.post('/api/reminders/', json={'title': 'Due', 'trigger_date': trigger_date.isoformat(), **fields})
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['reminder']['id']
+
+def _sent(notifier, *ids):
+    return [(reminder_id, occurrence) for reminder_id, occurrence in notifier.sent if reminder_id in ids]
+
+def _fail_once(original, error):
+    """Wraps original so its first call raises error"""
+    calls = []
+
+    def fail(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            raise error
+        return original(*args, **kwargs)
+
+    return fail
+
+def _run(scheduler, monkeypatch, ticks, **kwargs):
+    """Run the scheduler loop for a number of ticks, returns the waits between them"""
+    waits = []
+    monkeypatch.setattr(scheduler_module.time, 'sleep', waits.append)
+    scheduler.run(should_stop=lambda: len(waits) >= ticks, **kwargs)
+    return waits
+
+@pytest.mark.parametrize('pattern, after, expected', [
+    ('daily', datetime(2030, 1, 5, 12), datetime(2030, 1, 6, 9)),
+    ('every 3 days', datetime(2030, 1, 5, 12), datetime(2030, 1, 7, 9)),
+    ('12h', datetime(2030, 1, 1, 9), datetime(2030, 1, 1, 21)),
+    ('monthly', datetime(2030, 2, 1), datetime(2030, 2, 28, 9)),
+    ('yearly', datetime(2030, 1, 31, 9), datetime(2031, 1, 31, 9)),
+    ('sometimes', datetime(2030, 1, 5), None),
+    (None, datetime(2030, 1, 5), None),
+])
+def test_next_occurrence(pattern, after, expected):
+    start = datetime(2030, 1, 31, 9) if pattern in ('monthly', 'yearly') else datetime(2030, 1, 1, 9)
+
+    assert next_occurrence(start, pattern, after) == expected
+
+def test_due_reminders_are_sent_once(client):
+    due = datetime(2090, 1, 1, 9)
+    once = _reminder(client, due)
+    daily = _reminder(client, due, repeat_pattern='daily')
+    later = _reminder(client, due + timedelta(hours=1))
+    notifier = MemoryNotifier()
+    scheduler = ReminderScheduler(notifier)
+
+    scheduler.tick(due + timedelta(seconds=30))
+    scheduler.tick(due + timedelta(seconds=31))
+
+    assert sorted(_sent(notifier, once, daily, later)) == [(once, due), (daily, due)]
+    assert db.session.get(Reminder, daily).trigger_date == due + timedelta(days=1)
+
+def test_completed_and_moved_reminders_are_skipped(client):
+    # Edits are found by updated_at, so this runs on the real clock
+    now = datetime.utcnow()
+    due = now + timedelta(minutes=2)
+    completed, moved = _reminder(client, due), _reminder(client, due)
+    notifier = MemoryNotifier()
+    scheduler = ReminderScheduler(notifier)
+    scheduler.tick(now)
+
+    client.post(f'/api/reminders/{completed}/complete')
+    client.put(f'/api/reminders/{moved}', json={'trigger_date': (due + timedelta(minutes=3)).isoformat()})
+    scheduler.tick(due + timedelta(seconds=30))
+    scheduler.tick(due + timedelta(minutes=3, seconds=30))
+
+    assert _sent(notifier, completed, moved) == [(moved, due + timedelta(minutes=3))]
+
+def test_a_failed_tick_backs_off_and_recovers(client, monkeypatch):
+    reminder_id = _reminder(client, datetime.utcnow() - timedelta(minutes=1))
+    notifier = MemoryNotifier()
+    scheduler = ReminderScheduler(notifier)
+    lost = OperationalError('SELECT', {}, Exception('connection lost'))
+    monkeypatch.setattr(scheduler, '_extend_window', _fail_once(scheduler._extend_window, lost))
+
+    waits = _run(scheduler, monkeypatch, ticks=2)
+
+    assert waits[0] == 2.0
+    assert waits[1] <= 1.0
+    assert len(_sent(notifier, reminder_id)) == 1
+
+def test_backoff_is_capped(client, monkeypatch):
+    scheduler = ReminderScheduler(MemoryNotifier())
+    monkeypatch.setattr(scheduler, 'tick', lambda: 1 / 0)
+
+    waits = _run(scheduler, monkeypatch, ticks=5, max_backoff=10.0)
+
+    assert waits == [2.0, 4.0, 8.0, 10.0, 10.0]
+
+def test_a_failed_commit_does_not_send_twice(client, monkeypatch):
+    reminder_id = _reminder(client, datetime.utcnow() - timedelta(minutes=1))
+    notifier = MemoryNotifier()
+    scheduler = ReminderScheduler(notifier)
+    lost = OperationalError('COMMIT', {}, Exception('connection lost'))
+    monkeypatch.setattr(db.session, 'commit', _fail_once(db.session.commit, lost))
+
+    waits = _run(scheduler, monkeypatch, ticks=3)
+
+    assert waits[0] == 2.0
+    assert len(_sent(notifier, reminder_id)) == 1
@@ -0,0 +1,98 @@
+import time
+import pytest
+
+from database import db
+from models.memory import Memory
+from services import search
+from services.search import search_memories
+
+def _add(client, title, content='', tags=()):
+    response = client.post('/api/memories/', json={'title': title, 'content': content, 'tags': list(tags)})
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['memory']['id']
+
+def _search(client, term):
+    response = client.get('/api/memories/', query_string={'search': term, 'per_page': 50})
+    assert response.status_code == 200, response.get_json()
+    return [memory['title'] for memory in response.get_json()['memories']]
+
+def test_sqlite_uses_fts5():
+    assert search._backend == 'fts5'
+
+def test_results_are_ranked(client):
+    _add(client, 'Groceries', 'remember the sourdough loaf')
+    _add(client, 'Sourdough starter', 'feed the sourdough starter daily')
+    _add(client, 'Unrelated', 'nothing to see')
+
+    assert _search(client, 'sourdough') == ['Sourdough starter', 'Groceries']
+
+def test_prefixes_tags_and_accents_match(client):
+    _add(client, 'Café notes', 'espresso ratios', tags=['coffee'])
+
+    assert _search(client, 'espres') == ['Café notes']
+    assert _search(client, 'cafe') == ['Café notes']
+    assert _search(client, 'coffee') == ['Café notes']
+
+def test_every_token_must_match(client):
+    _add(client, 'Postgres vacuum', 'autovacuum tuning')
+    _add(client, 'Postgres indexes', 'btree and gin')
+
+    assert _search(client, 'postgres gin') == ['Postgres indexes']
+
+def test_edits_and_deletes_are_reindexed(client):
+    memory_id = _add(client, 'Marathon plan', 'long runs on sunday')
+    deleted = _add(client, 'Old marathon', 'bonked at mile twenty')
+
+    client.put(f'/api/memories/{memory_id}', json={'title': 'Half marathon plan', 'content': 'tempo runs'})
+    client.delete(f'/api/memories/{deleted}')
+
+    assert _search(client, 'sunday') == []
+    assert _search(client, 'tempo') == ['Half marathon plan']
+    assert _search(client, 'marathon') == ['Half marathon plan']
+
+def test_other_users_memories_are_not_searched(make_client):
+    alice, bob = make_client(), make_client()
+    _add(alice, 'Secret recipe', 'grandma lasagna')
+
+    assert _search(bob, 'lasagna') == []
+
+@pytest.mark.parametrize('term', ['"', 'title:x', 'a AND OR', 'NEAR(a b)', '*', "o'brien", '-x ^y'])
+def test_query_syntax_in_terms_is_literal(client, term):
+    response = client.get('/api/memories/', query_string={'search': term})
+
+    assert response.status_code == 200, response.get_json()
+
+def test_like_fallback_matches_substrings(client, monkeypatch):
+    _add(client, 'Sourdough starter', 'feed daily')
+    monkeypatch.setattr(search, '_backend', 'like')
+
+    assert _search(client, 'ourdoug') == ['Sourdough starter']
+
+def test_fts_is_faster_than_like(make_client, record_property):
+    """Searching 10,000 memories through FTS5 against the LIKE scan it replaced"""
+    user_id = make_client().user_id
+    words = ['alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf', 'hotel']
+    db.session.add_all([
+        Memory(f'Note {n}', ' '.join(words[(n + k) % len(words)] for k in range(30)) + (' needle' if n % 1000 == 0 else ''),
+               user_id, tags=[words[n % len(words)]])
+        for n in range(10000)
+    ])
+    db.session.commit()
+
+    def timed(backend, repeat=10):
+        search._backend = backend
+        started_at = time.perf_counter()
+        for _ in range(repeat):
+            rows = search_memories(Memory.query.filter_by(user_id=user_id), user_id, 'needle').limit(20).all()
+        return (time.perf_counter() - started_at) / repeat, len(rows)
+
+    try:
+        fts_seconds, fts_found = timed('fts5')
+        like_seconds, like_found = timed('like')
+    finally:
+        search._backend = 'fts5'
+
+    record_property('fts_ms', round(fts_seconds * 1000, 2))
+    record_property('like_ms', round(like_seconds * 1000, 2))
+    assert fts_found == like_found == 10
+    assert fts_seconds < like_seconds
@@ -0,0 +1,109 @@
+from datetime import datetime, date
+import json
+import time
+import pytest
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import desc
+from sqlalchemy.orm import undefer
+
+from database import db
+from models.memory import Memory, serialized_columns, serialize_memory
+from models.reminder import Reminder, SERIALIZED_COLUMNS as REMINDER_COLUMNS, serialize_reminder
+from services.serialization import OrjsonProvider, dumps_compact, loads, init_json
+
+PAYLOAD = {
+    'b': [1, 2.5, None, True],
+    'a': {'nested': 'ünïcode ✓', 'empty': {}},
+    'when': datetime(2030, 1, 2, 3, 4, 5),
+    'day': date(2030, 1, 2),
+}
+
+def test_orjson_is_installed_by_default(app):
+    assert isinstance(app.json, OrjsonProvider)
+
+def test_orjson_output_decodes_like_the_stdlib(app):
+    stdlib, fast = DefaultJSONProvider(app), OrjsonProvider(app)
+
+    assert json.loads(fast.dumps(PAYLOAD)) == json.loads(stdlib.dumps(PAYLOAD))
+    assert list(json.loads(fast.dumps({'b': 1, 'a': 2}))) == ['a', 'b']
+
+def test_unsupported_options_fall_back_to_the_stdlib(app):
+    assert OrjsonProvider(app).dumps({'a': 1}, indent=4) == DefaultJSONProvider(app).dumps({'a': 1}, indent=4)
+
+def test_compact_round_trip():
+    data = {'title': 'ünïcode', 'n': [1, 2]}
+
+    assert loads(dumps_compact(data)) == data
+    assert b' ' not in dumps_compact(data)
+
+def test_unknown_provider_is_rejected(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'JSON_PROVIDER', 'simplejson')
+
+    with pytest.raises(ValueError):
+        init_json(app)
+
+def test_list_responses_match_the_stdlib_provider(seeded, app, monkeypatch):
+    urls = ['/api/memories/?per_page=50', '/api/reminders/?per_page=50', '/api/users/dashboard']
+    fast = [seeded.get(url).get_json() for url in urls]
+
+    monkeypatch.setattr(app, 'json', DefaultJSONProvider(app))
+    stdlib = [seeded.get(url).get_json() for url in urls]
+
+    for fast_body, stdlib_body in zip(fast, stdlib):
+        fast_body.pop('timings', None)
+        stdlib_body.pop('timings', None)
+    assert fast == stdlib
+
+def test_rows_serialize_like_objects(seeded):
+    user_id = seeded.user_id
+    now = datetime.utcnow()
+
+    memories = Memory.query.filter_by(user_id=user_id).order_by(Memory.id).all()
+    rows = db.session.query(*serialized_columns()).filter(Memory.user_id == user_id).order_by(Memory.id).all()
+    assert [serialize_memory(row) for row in rows] == [memory.to_dict() for memory in memories]
+
+    reminders = Reminder.query.filter_by(user_id=user_id).order_by(Reminder.id).all()
+    rows = db.session.query(*REMINDER_COLUMNS).filter(Reminder.user_id == user_id).order_by(Reminder.id).all()
+    assert [serialize_reminder(row, now) for row in rows] == [reminder.to_dict(now) for reminder in reminders]
+
+def test_row_path_is_faster_than_objects(app, make_client, record_property):
+    """Serializing memory pages of 100 and 1000 from rows with orjson against ORM objects with the stdlib"""
+    user_id = make_client().user_id
+    db.session.add_all([
+        Memory(f'Memory {n}', 'content ' * 40, user_id, tags=['bench', f't{n % 10}'], importance_level=n % 5 + 1)
+        for n in range(1000)
+    ])
+    db.session.commit()
+    stdlib, fast = DefaultJSONProvider(app), OrjsonProvider(app)
+    ordering = (desc(Memory.created_at), desc(Memory.id))
+
+    def objects(per_page):
+        memories = Memory.query.options(undefer(Memory.content)).filter_by(user_id=user_id)\
+            .order_by(*ordering).limit(per_page).all()
+        return stdlib.dumps({'memories': [memory.to_dict() for memory in memories]})
+
+    def rows(per_page):
+        rows = db.session.query(*serialized_columns()).filter(Memory.user_id == user_id)\
+            .order_by(*ordering).limit(per_page).all()
+        return fast.dumps({'memories': [serialize_memory(row) for row in rows]})
+
+    def timed(per_page, repeat=15):
+        # Runs alternate and the best of each is kept, so a busy moment on the
+        # machine doesn't decide the comparison
+        best = {objects: float('inf'), rows: float('inf')}
+        for _ in range(repeat):
+            for function in best:
+                started_at = time.perf_counter()
+                bodies[function] = function(per_page)
+                best[function] = min(best[function], time.perf_counter() - started_at)
+                db.session.expunge_all()
+        return best[objects], best[rows]
+
+    bodies = {}
+    for per_page in (100, 1000):
+        object_seconds, row_seconds = timed(per_page)
+
+        record_property(f'objects_ms_{per_page}', round(object_seconds * 1000, 2))
+        record_property(f'rows_ms_{per_page}', round(row_seconds * 1000, 2))
+        assert json.loads(bodies[rows]) == json.loads(bodies[objects])
+        assert row_seconds < object_seconds
@@ -0,0 +1,149 @@
+"""Worker class selection, and a load test of sync against gevent workers under gunicorn
+
+The load test serves tests/load_app.py, which adds a simulated database
+round trip to every statement, from one worker of each class and sends
+LOAD_TEST_CLIENTS (comma separated, default 100) concurrent clients at the
+memory listing. Requests per second and p99 latency are recorded as test
+properties (see --junitxml).
+"""
+from contextlib import contextmanager
+from http.client import HTTPConnection
+from types import SimpleNamespace
+import importlib.util
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import pytest
+
+from services import passwords
+
+BACKEND = os.path.join(os.path.dirname(__file__), '..')
+CLIENTS = [int(clients) for clients in os.getenv('LOAD_TEST_CLIENTS', '100').split(',')]
+
+def _gunicorn_conf(monkeypatch, **env):
+    for name in ('GUNICORN_THREADS', 'GUNICORN_WORKER_CLASS', 'GUNICORN_WORKER_CONNECTIONS'):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    spec = importlib.util.spec_from_file_location('gunicorn_conf', os.path.join(BACKEND, 'gunicorn.conf.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.mark.parametrize('env, worker_class', [
+    ({}, 'sync'),
+    ({'GUNICORN_THREADS': '4'}, 'gthread'),
+    ({'GUNICORN_WORKER_CLASS': 'gevent'}, 'gevent'),
+])
+def test_worker_class_selection(monkeypatch, env, worker_class):
+    assert _gunicorn_conf(monkeypatch, **env).worker_class == worker_class
+
+def test_sync_workers_skip_the_psycopg_patch(monkeypatch):
+    conf = _gunicorn_conf(monkeypatch)
+    warnings = []
+
+    conf.post_fork(SimpleNamespace(log=SimpleNamespace(warning=warnings.append)), None)
+
+    assert warnings == []
+
+def test_hashing_stays_on_os_threads_under_gevent(monkeypatch):
+    from gevent import monkey
+    from gevent.threadpool import ThreadPoolExecutor as GeventThreadPoolExecutor
+
+    monkeypatch.setattr(monkey, 'is_module_patched', lambda name: name == 'threading')
+    executor = passwords._thread_pool(2)
+    try:
+        assert isinstance(executor, GeventThreadPoolExecutor)
+    finally:
+        executor.shutdown()
+
+def _free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+def _request(port, method, path, body=None, headers=None, timeout=60):
+    connection = HTTPConnection('127.0.0.1', port, timeout=timeout)
+    try:
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        response.read()
+        return response
+    finally:
+        connection.close()
+
+@contextmanager
+def _server(tmp_path, worker_class):
+    port = _free_port()
+    env = {
+        **os.environ,
+        'DATABASE_URL': f"sqlite:///{tmp_path / f'{worker_class}.db'}",
+        'GUNICORN_WORKER_CLASS': worker_class,
+        'PROMETHEUS_MULTIPROC_DIR': str(tmp_path / f'{worker_class}-metrics'),
+    }
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', '--workers', '1', 'tests.load_app:app'],
+        cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                _request(port, 'GET', '/api/health', timeout=1)
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    pytest.fail(f'gunicorn ({worker_class}) did not start')
+                time.sleep(0.1)
+        yield port
+    finally:
+        process.terminate()
+        process.wait(10)
+
+def _load(port, clients):
+    """One memory listing per client, all sent at once, returns (requests per second, p99 seconds)"""
+    response = _request(port, 'POST', '/api/auth/register', body='{"email": "load@example.com", "password": "Passw0rd!test"}',
+                        headers={'Content-Type': 'application/json'})
+    assert response.status == 201
+    cookie = response.getheader('Set-Cookie').split(';', 1)[0]
+    for _ in range(5):
+        _request(port, 'GET', '/api/memories/', headers={'Cookie': cookie})
+
+    start = threading.Barrier(clients + 1)
+    latencies, statuses = [], []
+
+    def client():
+        start.wait()
+        started_at = time.perf_counter()
+        status = _request(port, 'GET', '/api/memories/', headers={'Cookie': cookie}).status
+        latencies.append(time.perf_counter() - started_at)
+        statuses.append(status)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    started_at = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started_at
+
+    assert statuses == [200] * clients
+    latencies.sort()
+    return clients / elapsed, latencies[max(int(clients * 0.99) - 1, 0)]
+
+@pytest.mark.parametrize('clients', CLIENTS)
+def test_gevent_workers_serve_more_requests_while_waiting_on_the_database(tmp_path, record_property, clients):
+    results = {}
+    for worker_class in ('sync', 'gevent'):
+        with _server(tmp_path, worker_class) as port:
+            results[worker_class] = _load(port, clients)
+        requests_per_second, p99 = results[worker_class]
+        record_property(f'{worker_class}_requests_per_second', round(requests_per_second, 1))
+        record_property(f'{worker_class}_p99_ms', round(p99 * 1000, 1))
+
+    assert results['gevent'][0] > results['sync'][0] * 2
+    assert results['gevent'][1] < results['sync'][1]
@@ -0,0 +1,112 @@
+from collections import OrderedDict
+import threading
+import time
+import numpy as np
+import pytest
+
+from services.similarity import VectorIndex, similarity_index, memory_text
+
+TOPICS = ['postgres index vacuum', 'sourdough bread starter', 'marathon training plan', 'tax return deadline']
+
+@pytest.fixture
+def premium(client):
+    assert client.post('/api/users/subscription/upgrade').status_code == 200
+    return client
+
+@pytest.fixture
+def fresh_index(monkeypatch):
+    """An empty per-process index cache"""
+    monkeypatch.setattr(similarity_index, '_indexes', OrderedDict())
+    monkeypatch.setattr(similarity_index, '_builds', {})
+    return similarity_index
+
+def _add(client, title, content=''):
+    response = client.post('/api/memories/', json={'title': title, 'content': content})
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['memory']['id']
+
+def _similar(client, **params):
+    response = client.get('/api/memories/similar', query_string=params)
+    assert response.status_code == 200, response.get_json()
+    return [memory['title'] for memory in response.get_json()['memories']]
+
+def test_search_follows_writes(premium, fresh_index):
+    bread = _add(premium, 'Sourdough', 'feeding the bread starter')
+    _add(premium, 'Postgres', 'vacuum and index bloat')
+    assert _similar(premium, q='bread starter')[0] == 'Sourdough'
+
+    _add(premium, 'Rye sourdough', 'rye bread starter hydration')
+    premium.delete(f'/api/memories/{bread}')
+
+    assert _similar(premium, q='bread starter')[0] == 'Rye sourdough'
+    assert 'Sourdough' not in _similar(premium, q='bread starter')
+
+def test_a_slow_build_answers_202(premium, fresh_index, monkeypatch):
+    _add(premium, 'Sourdough', 'bread starter')
+    release = threading.Event()
+    build = similarity_index._build
+
+    def slow_build(user_id, version):
+        release.wait(5)
+        return build(user_id, version)
+
+    monkeypatch.setattr(similarity_index, '_build', slow_build)
+    monkeypatch.setattr(similarity_index, 'build_wait', 0)
+
+    response = premium.get('/api/memories/similar?q=bread')
+    assert response.status_code == 202
+    assert response.headers['Retry-After'] == '1'
+    assert len(similarity_index._builds) == 1
+
+    release.set()
+    similarity_index._builds[premium.user_id].result(timeout=5)
+    assert _similar(premium, q='bread') == ['Sourdough']
+
+def test_the_cache_is_bounded_by_bytes(fresh_index, monkeypatch):
+    def index(rows):
+        built = VectorIndex(8, capacity=rows)
+        for memory_id in range(rows):
+            built.add(memory_id, np.ones(8, dtype=np.float32))
+        built._prepare()
+        return built
+
+    small = index(64).nbytes
+    monkeypatch.setattr(similarity_index, 'max_bytes', small * 3)
+    for user_id in range(5):
+        similarity_index._store(user_id, index(64))
+
+    assert list(similarity_index._indexes) == [2, 3, 4]
+
+    # Too big for the budget on its own, kept only while nothing else is
+    similarity_index._store(9, index(64 * 4))
+    assert list(similarity_index._indexes) == [9]
+
+def test_build_and_query_time(record_property):
+    """Encoding and indexing 5,000 memories and searching them stay interactive"""
+    rng = np.random.default_rng(0)
+    texts = [
+        memory_text(f'Note {n}', ' '.join(rng.choice(TOPICS, 3)) + f' detail {n}', [f't{n % 7}'])
+        for n in range(5000)
+    ]
+
+    started_at = time.perf_counter()
+    index = VectorIndex(similarity_index.encoder.dim)
+    for start in range(0, len(texts), 1000):
+        batch = similarity_index.encoder.encode(texts[start:start + 1000])
+        for offset, vector in enumerate(batch):
+            index.add(start + offset, vector)
+    index._prepare()
+    build_seconds = time.perf_counter() - started_at
+
+    query = similarity_index.encoder.encode(['bread starter'])[0]
+    started_at = time.perf_counter()
+    for _ in range(20):
+        matches = index.search(query, 10)
+    query_seconds = (time.perf_counter() - started_at) / 20
+
+    record_property('build_seconds', round(build_seconds, 3))
+    record_property('query_ms', round(query_seconds * 1000, 2))
+    record_property('index_mb', round(index.nbytes / 2 ** 20, 1))
+    assert len(matches) == 10
+    assert build_seconds < 10
+    assert query_seconds < 0.05
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+import pytest
+
+from services.spaced_repetition import next_ease, INITIAL_EASE, MIN_EASE
+
+def _card(client, title='Card'):
+    response = client.post('/api/reminders/', json={'title': title, 'reminder_type': 'spaced_repetition'})
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['reminder']['id']
+
+def _review(client, card_id, grade):
+    response = client.post(f'/api/reminders/{card_id}/complete', json={'grade': grade})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+@pytest.mark.parametrize('grade, ease', [(5, 2.6), (4, 2.5), (3, 2.36), (0, 1.7)])
+def test_ease_moves_with_the_grade(grade, ease):
+    assert next_ease(INITIAL_EASE, grade) == pytest.approx(ease)
+
+def test_ease_never_drops_below_the_minimum():
+    assert next_ease(MIN_EASE, 0) == MIN_EASE
+
+def test_intervals_follow_sm2(client):
+    card_id = _card(client)
+
+    intervals, eases = [], []
+    for grade in (4, 4, 5, 3):
+        review = _review(client, card_id, grade)['review']
+        intervals.append(review['interval_days'])
+        eases.append(review['ease'])
+
+    # 1 day, 6 days, then the previous interval times the ease before the review
+    assert intervals == [1.0, 6.0, 15.0, pytest.approx(15.0 * 2.6)]
+    assert eases == [2.5, 2.5, 2.6, 2.46]
+
+def test_a_review_moves_the_due_date(client):
+    card_id = _card(client)
+    _review(client, card_id, 4)
+
+    body = _review(client, card_id, 4)
+
+    due = datetime.fromisoformat(body['reminder']['trigger_date'])
+    assert abs(due - (datetime.utcnow() + timedelta(days=6))) < timedelta(minutes=1)
+    assert body['reminder']['is_completed'] is False
+
+def test_a_failed_review_resets_the_streak(client):
+    card_id = _card(client)
+    for grade in (5, 5, 5):
+        _review(client, card_id, grade)
+
+    review = _review(client, card_id, 1)['review']
+
+    assert review['repetitions'] == 0
+    assert review['lapses'] == 1
+    assert review['interval_days'] == 1.0
+    assert review['ease'] == pytest.approx(2.8 - 0.54)
+    assert _review(client, card_id, 4)['review']['interval_days'] == 1.0
+
+@pytest.mark.parametrize('grade', [True, False, 6, -1, 4.0, '4', None])
+def test_invalid_grades_are_rejected(client, grade):
+    card_id = _card(client)
+
+    response = client.post(f'/api/reminders/{card_id}/complete', json={'grade': grade})
+
+    assert response.status_code == 400
+    assert _review(client, card_id, 4)['review']['repetitions'] == 1
+
+def test_reviewed_cards_leave_the_queue(client):
+    due, reviewed = _card(client, 'Due'), _card(client, 'Reviewed')
+    _review(client, reviewed, 4)
+
+    body = client.get('/api/reminders/review-queue').get_json()
+
+    assert [reminder['id'] for reminder in body['reminders']] == [due]
+    assert body['due_count'] == 1
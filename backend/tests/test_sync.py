@@ -0,0 +1,55 @@
+import pytest
+
+def _pages(client, limit, token=None, on_page=None):
+    pages = []
+    while True:
+        url = f'/api/sync?limit={limit}' + (f'&since={token}' if token else '')
+        response = client.get(url)
+        assert response.status_code == 200, response.get_json()
+        page = response.get_json()
+        pages.append(page)
+        if on_page:
+            on_page(len(pages))
+        token = page['token']
+        if not page['has_more']:
+            return pages
+
+def _ids(pages, key):
+    return [row['id'] for page in pages for row in page[key]]
+
+@pytest.mark.parametrize('limit', [1, 7, 40, 41, 80, 500])
+def test_snapshot_pages_cover_every_row_once(seeded, limit):
+    pages = _pages(seeded, limit)
+
+    assert all(len(page['memories']) + len(page['reminders']) <= limit for page in pages)
+    assert all(page['token'].startswith('s') for page in pages[:-1])
+    assert pages[-1]['token'].isdigit()
+    for key in ('memories', 'reminders'):
+        ids = _ids(pages, key)
+        assert len(ids) == len(set(ids)) == 40
+
+def test_writes_during_a_snapshot_come_with_the_next_sync(seeded):
+    created = []
+
+    def write(page_number):
+        if page_number == 2:
+            response = seeded.post('/api/memories/', json={'title': 'Raced the snapshot', 'content': ''})
+            created.append(response.get_json()['memory']['id'])
+
+    pages = _pages(seeded, 10, on_page=write)
+    changes = seeded.get(f"/api/sync?since={pages[-1]['token']}").get_json()
+
+    # Newer than the snapshot's first page, so only the changes carry it
+    assert created[0] not in _ids(pages, 'memories')
+    assert created[0] in [row['id'] for row in changes['memories']]
+
+def test_snapshot_of_an_empty_account(client):
+    page = client.get('/api/sync').get_json()
+
+    assert page['memories'] == page['reminders'] == []
+    assert page['has_more'] is False
+    assert page['token'].isdigit()
+
+@pytest.mark.parametrize('token', ['abc', 's1-note-', 's1-memory-%%%', 's1-memory-bm90IGpzb24'])
+def test_invalid_tokens_are_rejected(client, token):
+    assert client.get(f'/api/sync?since={token}').status_code == 400
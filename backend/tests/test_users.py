@@ -0,0 +1,34 @@
+from services.user_cache import user_cache
+
+def _as_seen_by_another_worker(client, change):
+    """Apply change while keeping this process's user snapshot from before it"""
+    stale = user_cache.get(client.user_id)
+    response = change()
+    assert response.status_code == 200, response.get_json()
+    user_cache.store.set(client.user_id, stale, user_cache.ttl)
+
+def test_subscription_follows_an_upgrade_made_elsewhere(client):
+    before = client.get('/api/users/subscription')
+    assert before.get_json()['subscription_type'] == 'free'
+
+    _as_seen_by_another_worker(client, lambda: client.post('/api/users/subscription/upgrade'))
+
+    response = client.get('/api/users/subscription', headers={'If-None-Match': before.headers['ETag']})
+    assert response.status_code == 200
+    subscription = response.get_json()
+    assert subscription['subscription_type'] == 'premium'
+    assert subscription['memory_limit'] is None
+    assert subscription['features']['ai_features'] is True
+
+def test_dashboard_follows_a_downgrade_made_elsewhere(client):
+    assert client.post('/api/users/subscription/upgrade').status_code == 200
+    before = client.get('/api/users/dashboard')
+    assert before.get_json()['user']['subscription_type'] == 'premium'
+
+    _as_seen_by_another_worker(client, lambda: client.post('/api/users/subscription/downgrade'))
+
+    response = client.get('/api/users/dashboard', headers={'If-None-Match': before.headers['ETag']})
+    assert response.status_code == 200
+    dashboard = response.get_json()
+    assert dashboard['user']['subscription_type'] == 'free'
+    assert dashboard['stats']['memory_limit'] == 100
@@ -0,0 +1,121 @@
+import json
+from conftest import recorded_statements
+
+def _ndjson(*records):
+    return ''.join(json.dumps(record) + '\n' for record in records)
+
+def _memory(n, **fields):
+    return {'type': 'memory', 'data': {'id': n, 'title': f'Imported {n}', 'content': 'x', **fields}}
+
+def _import(client, body):
+    return client.post('/api/users/import', data=body, content_type='application/x-ndjson')
+
+def test_export_then_import_round_trips(seeded, make_client):
+    exported = seeded.get('/api/users/export').get_data(as_text=True)
+    client = make_client()
+
+    response = _import(client, exported)
+
+    assert response.status_code == 200
+    summary = response.get_json()
+    assert summary['imported'] == {'memories': 40, 'reminders': 40}
+    assert summary['errors'] == []
+    assert client.get('/api/memories/stats').get_json()['total_memories'] == 40
+
+def test_invalid_records_are_skipped_in_any_batch(app, client):
+    app.config['IMPORT_BATCH_SIZE'] = 3
+    try:
+        records = [_memory(n) for n in range(1, 11)]
+        records[1] = _memory(2, title=['not', 'a', 'string'])        # rejected while parsing
+        records[7] = _memory(8, created_at='2026-01-01T00:00:00Z')  # aware, stored as naive UTC
+        records[8] = {'type': 'memory', 'data': 'not an object'}
+        records.append({'type': 'reminder', 'data': {'title': 'Linked', 'memory_id': 10,
+                                                     'trigger_date': '2030-01-01T09:00:00+02:00'}})
+        response = _import(client, _ndjson(*records) + '{broken json\n')
+    finally:
+        app.config['IMPORT_BATCH_SIZE'] = 500
+
+    assert response.status_code == 200
+    summary = response.get_json()
+    assert summary['imported'] == {'memories': 8, 'reminders': 1}
+    assert summary['skipped'] == {'memories': 2, 'reminders': 0}
+    assert [error['line'] for error in summary['errors']] == [2, 9, 12]
+    assert summary['committed_through_line'] == 11
+
+    reminder = client.get('/api/reminders/').get_json()['reminders'][0]
+    assert reminder['trigger_date'] == '2030-01-01T07:00:00'
+    assert reminder['memory_id'] is not None
+
+def test_rows_the_database_rejects_are_skipped(app, client, monkeypatch):
+    import services.vault as vault
+    build = vault._memory_from_record
+
+    # A value that passes parsing but that the database driver rejects
+    def memory_from_record(data, user_id):
+        memory = build(data, user_id)
+        if data.get('id') == 3:
+            memory.importance_level = object()
+        return memory
+
+    monkeypatch.setattr(vault, '_memory_from_record', memory_from_record)
+    response = _import(client, _ndjson(*[_memory(n) for n in range(1, 6)]))
+
+    assert response.status_code == 200
+    summary = response.get_json()
+    assert summary['imported']['memories'] == 4
+    assert summary['skipped']['memories'] == 1
+    assert [error['line'] for error in summary['errors']] == [3]
+    assert client.get('/api/memories/stats').get_json()['total_memories'] == 4
+
+def test_export_reads_rows_in_index_order(app, seeded):
+    from database import db
+
+    with recorded_statements(app) as statements:
+        seeded.get('/api/users/export').get_data()
+
+    connection = db.session.connection()
+    for sql, parameters in statements:
+        plan = [row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}', parameters)]
+        assert not any('TEMP B-TREE' in step for step in plan), plan
+
+def test_unreadable_gzip_reports_what_was_committed(client):
+    response = client.post('/api/users/import', data=b'not gzip', content_type='application/gzip')
+
+    assert response.status_code == 400
+    assert response.get_json()['committed_through_line'] == 0
+
+def test_memory_stays_flat_as_the_vault_grows(make_client, record_property):
+    """Peak Python allocations of importing then exporting N and 4N memories"""
+    import time
+    import tracemalloc
+    from services.vault import export_ndjson, import_ndjson
+
+    def measure(rows):
+        user_id = make_client().user_id
+        lines = (json.dumps(_memory(n, tags=['bulk'], content='x' * 200)).encode() + b'\n' for n in range(1, rows + 1))
+
+        tracemalloc.start()
+        started_at = time.perf_counter()
+        summary = import_ndjson(lines, user_id, batch_size=250)
+        import_seconds = time.perf_counter() - started_at
+        import_peak = tracemalloc.get_traced_memory()[1]
+
+        tracemalloc.reset_peak()
+        started_at = time.perf_counter()
+        exported = sum(chunk.count(b'\n') for chunk in export_ndjson(user_id, batch_size=250))
+        export_seconds = time.perf_counter() - started_at
+        export_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        assert summary['imported']['memories'] == rows
+        assert exported == rows + 1  # with the header
+        return import_peak, export_peak, rows / import_seconds, rows / export_seconds
+
+    small, large = measure(500), measure(2000)
+
+    record_property('import_peak_kb', [round(small[0] / 1024), round(large[0] / 1024)])
+    record_property('export_peak_kb', [round(small[1] / 1024), round(large[1] / 1024)])
+    record_property('import_rows_per_second', round(large[2]))
+    record_property('export_rows_per_second', round(large[3]))
+    assert large[0] < small[0] * 2
+    assert large[1] < small[1] * 2
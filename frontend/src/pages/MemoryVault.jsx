@@ -44,7 +44,9 @@ const MemoryVault = () => {
     try {
       const params = new URLSearchParams({
         page: page.toString(),
-        per_page: pagination.per_page.toString()
+        per_page: pagination.per_page.toString(),
+        // The cards only show a preview, so the full content isn't fetched
+        fields: 'id,title,content_preview,memory_type,tags,importance_level,created_at'
       })
       
       if (searchTerm) params.append('search', searchTerm)
@@ -375,7 +377,7 @@ const MemoryVault = () => {
 
                       {/* Content Preview */}
                       <p className="card-text text-white opacity-90 mb-3 line-clamp-3">
-                        {truncateContent(memory.content)}
+                        {truncateContent(memory.content_preview || '')}
                       </p>
 
                       {/* Tags */}